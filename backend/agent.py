@@ -0,0 +1,115 @@
+"""Headless agent: run the collectors and push them to a central aggregator.
+
+No MongoDB, HTTP API or frontend is needed on the agent host:
+
+    AGGREGATOR_URL=ws://monitor.local:8003/api/fleet/ingest \\
+    FEDERATION_TOKEN=shared-secret AGENT_HOST_ID=pi-kitchen python agent.py
+
+The aggregator is a normal backend started with the same FEDERATION_TOKEN;
+each agent then shows up under /api/fleet/hosts and every /api/metrics/*
+route accepts ``?host=<AGENT_HOST_ID>``.
+"""
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict, Tuple
+
+import websockets
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from utils.cache_store import cache_store
+from utils.collectors import start_collectors, stop_collectors
+from utils.federation import FEDERATED_KEYS, FEDERATION_TOKEN, diff
+from utils.loop_monitor import loop_monitor
+
+logger = logging.getLogger("agent")
+
+AGGREGATOR_URL = os.getenv("AGGREGATOR_URL", "ws://127.0.0.1:8003/api/fleet/ingest")
+AGENT_HOST_ID = os.getenv("AGENT_HOST_ID", socket.gethostname())
+AGENT_PUSH_INTERVAL = float(os.getenv("AGENT_PUSH_INTERVAL", "2"))
+# The dongle collector needs MongoDB for SMTP settings, so it is opt-in here.
+AGENT_COLLECTORS = [c.strip() for c in os.getenv("AGENT_COLLECTORS", "fast,interfaces,processes,disk,usb,docker,health").split(",") if c.strip()]
+RECONNECT_MAX_DELAY = 30.0
+
+
+def _changes(sent: Dict[str, Tuple[int, Any]], full: bool) -> Dict[str, Dict[str, Any]]:
+    """Collect keys whose generation moved since they were last sent."""
+    now = time.time()
+    keys = {}
+    for key, entry in cache_store.get_many(FEDERATED_KEYS).items():
+        if entry is None:
+            continue
+        previous = sent.get(key)
+        if not full and previous and previous[0] == entry.generation:
+            continue
+        patch = {"$v": entry.data} if full or not previous else diff(previous[1], entry.data)
+        sent[key] = (entry.generation, entry.data)
+        if patch is None and previous:
+            # Rewritten with identical data; refresh freshness only.
+            patch = {"$d": {}} if isinstance(entry.data, dict) else {"$v": entry.data}
+        keys[key] = {
+            "patch": patch,
+            "ttl": entry.ttl,
+            "stale_ttl": entry.stale_ttl,
+            "age": max(0.0, now - entry.updated_at),
+        }
+    return keys
+
+
+async def push_forever(stop: asyncio.Event) -> None:
+    delay = 1.0
+    while not stop.is_set():
+        try:
+            async with websockets.connect(AGGREGATOR_URL, max_size=None) as ws:
+                await ws.send(json.dumps({"type": "hello", "host": AGENT_HOST_ID, "token": FEDERATION_TOKEN}))
+                logger.info(f"connected to {AGGREGATOR_URL} as {AGENT_HOST_ID}")
+                delay = 1.0
+                sent: Dict[str, Tuple[int, Any]] = {}
+                full = True
+                while not stop.is_set():
+                    keys = _changes(sent, full)
+                    if keys:
+                        await ws.send(json.dumps(
+                            {"type": "full" if full else "delta", "keys": keys},
+                            separators=(",", ":"), default=str,
+                        ))
+                    full = False
+                    try:
+                        await asyncio.wait_for(stop.wait(), timeout=AGENT_PUSH_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+        except (OSError, websockets.WebSocketException) as e:
+            logger.warning(f"aggregator connection lost: {e}; retrying in {delay:.0f}s")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+
+async def main():
+    if not FEDERATION_TOKEN:
+        raise SystemExit("FEDERATION_TOKEN must be set")
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    loop_monitor.start()
+    tasks = await start_collectors(AGENT_COLLECTORS)
+    try:
+        await push_forever(stop)
+    finally:
+        await stop_collectors(tasks)
+        await loop_monitor.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
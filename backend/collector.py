@@ -0,0 +1,47 @@
+"""Standalone collector process for multi-worker deployments.
+
+Runs every collector once and publishes the cache into a shared memory
+segment that API workers started with CACHE_SHM_ROLE=reader serve from:
+
+    CACHE_SHM_ROLE=writer python collector.py &
+    CACHE_SHM_ROLE=reader uvicorn server:app --workers 4 --port 8003
+"""
+import asyncio
+import os
+import signal
+
+from dotenv import load_dotenv
+
+load_dotenv()
+os.environ["CACHE_SHM_ROLE"] = "writer"
+
+from utils.database import connect_to_mongo, close_mongo_connection
+from utils.collectors import start_collectors, stop_collectors
+from utils.loop_monitor import loop_monitor
+from utils.snapshot import checkpoint_forever, load_snapshot, save_snapshot
+
+
+async def main():
+    loop_monitor.start()
+    await connect_to_mongo()
+    restored = load_snapshot()
+    if restored:
+        print(f"Restored {restored} cache entries from snapshot (stale until refreshed)")
+    tasks = await start_collectors()
+    tasks.append(asyncio.create_task(checkpoint_forever(), name="snapshot"))
+    print("Collectors publishing to shared cache")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    await stop_collectors(tasks)
+    await save_snapshot()
+    await close_mongo_connection()
+    await loop_monitor.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import List, Literal, Optional, Dict
 import uuid
 
 class ServiceLink(BaseModel):
@@ -28,6 +28,20 @@ class APIKeys(BaseModel):
     anilist_client_secret: Optional[str] = None
     myanimelist_client_id: Optional[str] = None
 
+class AlertRule(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    metric: str  # "cpu", "memory", "temp" or a dotted path into the metrics summary
+    condition: Literal["above", "below"] = "above"
+    threshold: float
+    window: int = 0  # seconds; 0 evaluates every sample on its own
+    aggregate: Literal["avg", "min", "max"] = "avg"
+    hysteresis: float = 2.0  # how far back past the threshold before the alert clears
+    severity: Literal["warning", "critical"] = "warning"
+    silence: int = 900  # seconds between repeated notifications for this rule
+    notify: bool = True
+    enabled: bool = True
+
 class AppSettings(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     refresh_rate: int = 2  # seconds
@@ -38,3 +52,5 @@ class AppSettings(BaseModel):
     temperature_critical_threshold: int = 80
     cpu_warning_threshold: int = 80
     cpu_critical_threshold: int = 95
+    alert_rules: List[AlertRule] = []
+
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from models.user import User, UserCreate, UserLogin, Token
-from utils.auth import verify_password, get_password_hash, create_access_token, verify_token
+from utils.auth import (
+    check_password, hash_password, create_access_token, verify_token, hash_pool, PasswordPoolBusy
+)
 from utils.database import get_database
+from utils.ratelimit import login_limiter
+from utils.users import is_admin
 from datetime import timedelta
 import os
 
@@ -26,17 +30,44 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is inactive")
     return user
 
+def password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password operations in progress, try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = login_limiter.check(client_ip, form_data.username)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(int(retry_after) + 1)},
+        )
+
     db = get_database()
     user = await db.users.find_one({"username": form_data.username})
-    
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await check_password(form_data.password, user["hashed_password"])
+        except PasswordPoolBusy:
+            raise password_pool_busy()
+
+    if not valid:
+        login_limiter.failed(client_ip, form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    login_limiter.succeeded(client_ip, form_data.username)
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this password was stored.
+        await db.users.update_one({"username": user["username"]}, {"$set": {"hashed_password": new_hash}})
     
     access_token = create_access_token(data={"sub": user["username"]})
     return {"access_token": access_token, "token_type": "bearer"}
@@ -54,7 +85,10 @@ async def register(user: UserCreate, current_user: dict = Depends(get_current_us
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already exists")
     
-    hashed_password = get_password_hash(user.password)
+    try:
+        hashed_password = await hash_password(user.password)
+    except PasswordPoolBusy:
+        raise password_pool_busy()
     new_user = {
         "username": user.username,
         "hashed_password": hashed_password,
@@ -63,3 +97,10 @@ async def register(user: UserCreate, current_user: dict = Depends(get_current_us
     
     await db.users.insert_one(new_user)
     return {"message": "User created successfully"}
+
+@router.get("/stats")
+async def auth_stats(current_user: dict = Depends(get_current_user)):
+    """Password hashing queue and login throttling counters (admin only)."""
+    if not is_admin(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
+    return {"hashing": hash_pool.stats(), "login_limiter": login_limiter.stats()}
@@ -0,0 +1,95 @@
+import time
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from routes.auth import get_current_user
+from routes.federation import store_for_host
+from utils.collectors import (
+    KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_DISK, KEY_NETWORK, KEY_NETWORK_ADDRS, KEY_SUMMARY, KEY_HISTORY,
+    KEY_STATS, KEY_PROCESSES, KEY_USB, KEY_DOCKER, KEY_DONGLE, KEY_HEALTH, KEY_SMS_FORWARDER,
+    KEY_LOOP, KEY_THERMAL_HISTORY
+)
+from utils.http_cache import entry_etag
+from utils.projection import compile_fields, project
+from utils.wire import render
+
+router = APIRouter(prefix="/api/batch", tags=["batch"])
+
+BATCH_KEYS = {
+    KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_DISK, KEY_NETWORK, KEY_NETWORK_ADDRS, KEY_SUMMARY, KEY_HISTORY,
+    KEY_STATS, KEY_PROCESSES, KEY_USB, KEY_DOCKER, KEY_DONGLE, KEY_HEALTH, KEY_SMS_FORWARDER,
+    KEY_LOOP, KEY_THERMAL_HISTORY,
+}
+
+
+def _split(raw: str) -> List[str]:
+    return [part.strip() for part in (raw or "").split(",") if part.strip()]
+
+
+def _fields_by_key(raw: str, keys: List[str]) -> Dict[str, str]:
+    """Split ``fields`` paths by the requested key they start with (longest key wins)."""
+    grouped: Dict[str, List[str]] = {}
+    for path in _split(raw):
+        owners = [key for key in keys if path.startswith(key + ".")]
+        if not owners:
+            raise HTTPException(status_code=400, detail=f"Field {path!r} does not start with a requested key")
+        owner = max(owners, key=len)
+        grouped.setdefault(owner, []).append(path[len(owner) + 1:])
+    return {key: ",".join(paths) for key, paths in grouped.items()}
+
+
+def _parse_etags(raw: str) -> Dict[str, str]:
+    etags = {}
+    for part in _split(raw):
+        key, sep, etag = part.partition(":")
+        if sep:
+            etags[key] = etag
+    return etags
+
+
+@router.get("")
+async def batch(
+    request: Request,
+    keys: str,
+    since: float = 0.0,
+    etags: str = "",
+    host: str = "",
+    fields: str = "",
+    current_user: dict = Depends(get_current_user),
+):
+    """Several cache keys in one authenticated request, read from one generation.
+
+    ``since`` omits keys not updated after that epoch time; ``etags`` takes
+    ``key:etag`` pairs from a previous response and omits keys whose etag is
+    unchanged. Omitted keys are listed under ``unchanged``. ``fields`` paths are
+    prefixed with their key, e.g. ``metrics.summary.cpu.overall_usage``.
+    """
+    requested = _split(keys)
+    unknown = [key for key in requested if key not in BATCH_KEYS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown keys: {', '.join(unknown)}")
+    known_etags = _parse_etags(etags)
+    try:
+        projections = {key: compile_fields(paths) for key, paths in _fields_by_key(fields, requested).items()}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    store = store_for_host(host)
+    entries = store.get_many(requested)
+    result = {}
+    unchanged = []
+    for key, entry in entries.items():
+        if entry is None:
+            result[key] = {"data": None, "meta": {"stale": True, "expired": True, "age": None}, "etag": None}
+            continue
+        etag = entry_etag(entry)
+        if (since and entry.updated_at <= since) or known_etags.get(key) == etag:
+            unchanged.append(key)
+            continue
+        result[key] = {"data": project(entry.data, projections.get(key)), "meta": entry.meta(), "etag": etag}
+
+    return render(request, {
+        "keys": result,
+        "unchanged": unchanged,
+        "timestamp": time.time(),
+    })
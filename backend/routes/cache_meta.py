@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends
 from routes.auth import get_current_user
 from utils.cache_store import cache_store
 from utils.collectors import (
-    KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_DISK, KEY_NETWORK, KEY_SUMMARY,
-    KEY_HISTORY, KEY_USB, KEY_DOCKER, KEY_DONGLE, KEY_HEALTH
+    KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_DISK, KEY_NETWORK, KEY_NETWORK_ADDRS, KEY_SUMMARY,
+    KEY_PROCESSES, KEY_HISTORY, KEY_STATS, KEY_USB, KEY_DOCKER, KEY_DONGLE, KEY_HEALTH,
+    KEY_LOOP, KEY_THERMAL_HISTORY
 )
 
 router = APIRouter(prefix="/api/cache", tags=["cache"])
@@ -11,7 +12,8 @@ router = APIRouter(prefix="/api/cache", tags=["cache"])
 @router.get("/status")
 async def cache_status(current_user: dict = Depends(get_current_user)):
     keys = [
-        KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_DISK, KEY_NETWORK,
-        KEY_SUMMARY, KEY_HISTORY, KEY_USB, KEY_DOCKER, KEY_DONGLE, KEY_HEALTH
+        KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_DISK, KEY_NETWORK, KEY_NETWORK_ADDRS,
+        KEY_SUMMARY, KEY_PROCESSES, KEY_HISTORY, KEY_STATS, KEY_USB, KEY_DOCKER, KEY_DONGLE, KEY_HEALTH,
+        KEY_LOOP, KEY_THERMAL_HISTORY
     ]
-    return {key: cache_store.snapshot(key)["meta"] for key in keys}
+    return {key: snap["meta"] for key, snap in cache_store.snapshot_many(keys).items()}
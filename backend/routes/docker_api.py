@@ -1,57 +1,319 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Literal, Optional, Set
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from routes.auth import get_current_user
 from utils.cache_store import cache_store
-from utils.collectors import KEY_DOCKER
+from utils.projection import fields_param, project_snapshot
+from utils.timeparse import parse_since
+from utils.wire import render
+from utils.collectors import KEY_DOCKER, KEY_DOCKER_HISTORY, refresh_container
+from utils.container_history import CONTAINER_SERIES, unpack
+from utils.docker_bulk import DOCKER_BULK_PARALLELISM, DOCKER_BULK_THREADS, LABEL_PROJECT, dependency_levels, prerequisites
+from utils.downsample import merged_indices
+from utils.jobs import JobConflict, jobs
+from utils.log_tail import LOG_TAIL_MAX, LogFollower, follower_slot, release_follower_slot
 
-import docker
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/docker", tags=["docker"])
 
-
-def get_docker_client():
-    try:
-        return docker.from_env()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Docker not available: {str(e)}")
+# Bulk runs outlive their request if the client goes away.
+_bulk_tasks = set()
+# Bulk actions block on the Docker API; keep them off the default executor the collectors share.
+_bulk_executor = ThreadPoolExecutor(max_workers=max(1, DOCKER_BULK_THREADS), thread_name_prefix="docker-bulk")
 
 
 @router.get("/containers")
-async def get_containers(current_user: dict = Depends(get_current_user)):
+async def get_containers(request: Request, projection=Depends(fields_param), current_user: dict = Depends(get_current_user)):
     """Get all Docker containers with their status and stats from cache"""
-    return cache_store.snapshot(KEY_DOCKER)
+    return render(request, project_snapshot(cache_store.snapshot(KEY_DOCKER), projection))
 
 
-@router.post("/containers/{container_id}/restart")
-async def restart_container(container_id: str, current_user: dict = Depends(get_current_user)):
-    """Restart a Docker container"""
+@router.get("/containers/{container_id}/history")
+async def get_container_history(
+    request: Request,
+    container_id: str,
+    points: int = 0,
+    current_user: dict = Depends(get_current_user),
+):
+    """CPU, memory and network history of one container (id or name), optionally LTTB-downsampled."""
+    if points < 0:
+        raise HTTPException(status_code=400, detail="points must not be negative")
+    snapshot = cache_store.snapshot(KEY_DOCKER_HISTORY)
+    history = snapshot["data"] or {"containers": {}}
+    entry = history["containers"].get(container_id)
+    if entry is None:
+        entry = next((e for e in history["containers"].values() if e["name"] == container_id), None)
+    if entry is None:
+        containers = (cache_store.snapshot(KEY_DOCKER)["data"] or {}).get("containers", [])
+        if not any(container_id in (c["id"], c["name"]) for c in containers):
+            raise HTTPException(status_code=404, detail="Container not found")
+        # Known container, but no completed history step yet.
+        entry = {"name": container_id, "count": 0}
+    data = unpack(entry) if entry["count"] else {"ts": [], "series": {name: [] for name in CONTAINER_SERIES}}
+    if points and len(data["ts"]) > points:
+        indices = merged_indices(data["ts"], data["series"].values(), points)
+        data = {
+            "ts": [data["ts"][i] for i in indices],
+            "series": {name: [values[i] for i in indices] for name, values in data["series"].items()},
+        }
+    data["name"] = entry["name"]
+    data["step"] = history.get("step")
+    return render(request, {"data": data, "meta": snapshot["meta"]})
+
+
+_PAST_TENSE = {"start": "started", "stop": "stopped", "restart": "restarted"}
+
+
+def _container_action(container_id: str, action: str) -> Dict[str, Any]:
+    # Runs on a job thread: these SDK calls block for as long as the container takes.
+    import docker
+    client = docker.from_env()
+    container = client.containers.get(container_id)
+    getattr(container, action)()
+    return {"id": container.short_id, "name": container.name, "message": f"Container {container.name} {_PAST_TENSE[action]} successfully"}
+
+
+async def _refresh_container(result: Dict[str, Any]) -> None:
     try:
-        client = get_docker_client()
-        container = client.containers.get(container_id)
-        container.restart()
-        return {"message": f"Container {container.name} restarted successfully"}
+        await refresh_container(result["id"])
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error restarting container: {str(e)}")
+        logger.warning(f"refresh of container {result['id']} after action failed: {e}")
 
 
-@router.post("/containers/{container_id}/stop")
-async def stop_container(container_id: str, current_user: dict = Depends(get_current_user)):
-    """Stop a Docker container"""
+def submit_action(container_id: str, action: str) -> Dict[str, Any]:
     try:
-        client = get_docker_client()
-        container = client.containers.get(container_id)
-        container.stop()
-        return {"message": f"Container {container.name} stopped successfully"}
+        job = jobs.submit(
+            f"container.{action}", container_id,
+            lambda: _container_action(container_id, action),
+            on_success=_refresh_container,
+        )
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=f"Container {container_id} already has job {e.job['id']} running")
+    return {
+        "job_id": job["id"],
+        "status_url": f"/api/docker/jobs/{job['id']}",
+        "message": f"{action.capitalize()} of {container_id} started",
+    }
+
+
+def _open_logs(container_id: str, tail, since: Optional[int], follow: bool, timestamps: bool):
+    import docker
+    from docker.errors import NotFound
+    try:
+        container = docker.from_env().containers.get(container_id)
+    except NotFound:
+        return None
+    return container.logs(stream=True, follow=follow, tail=tail, since=since, timestamps=timestamps)
+
+
+@router.get("/containers/{container_id}/logs")
+async def container_logs(
+    container_id: str,
+    tail: str = "100",
+    since: Optional[str] = None,
+    follow: bool = True,
+    timestamps: bool = False,
+    current_user: dict = Depends(get_current_user),
+):
+    """Stream a container's logs as text/plain (``docker logs -f --tail --since``).
+
+    ``tail`` is a line count (at most 5000) or ``all``; ``since`` is a unix
+    timestamp or a duration such as ``10m``. Lines are dropped, with a marker,
+    if the client reads slower than the container logs.
+    """
+    if tail != "all":
+        if not tail.isdigit():
+            raise HTTPException(status_code=400, detail="tail must be a number or 'all'")
+        tail = min(int(tail), LOG_TAIL_MAX)
+    try:
+        since_ts = parse_since(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not follower_slot():
+        raise HTTPException(status_code=429, detail="Too many log followers, try again later", headers={"Retry-After": "5"})
+    try:
+        stream = await asyncio.to_thread(_open_logs, container_id, tail, since_ts, follow, timestamps)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error stopping container: {str(e)}")
+        release_follower_slot()
+        raise HTTPException(status_code=500, detail=f"Docker not available: {str(e)}")
+    if stream is None:
+        release_follower_slot()
+        raise HTTPException(status_code=404, detail="Container not found")
+
+    follower = LogFollower(stream)
+    follower.start()
+
+    async def body():
+        try:
+            async for chunk in follower.chunks():
+                yield chunk
+        finally:
+            follower.close()
+            release_follower_slot()
+
+    return StreamingResponse(body(), media_type="text/plain; charset=utf-8", headers={"X-Accel-Buffering": "no"})
 
 
-@router.post("/containers/{container_id}/start")
+@router.post("/containers/{container_id}/restart", status_code=202)
+async def restart_container(container_id: str, current_user: dict = Depends(get_current_user)):
+    """Restart a Docker container in the background; poll the returned job"""
+    return submit_action(container_id, "restart")
+
+
+@router.post("/containers/{container_id}/stop", status_code=202)
+async def stop_container(container_id: str, current_user: dict = Depends(get_current_user)):
+    """Stop a Docker container in the background; poll the returned job"""
+    return submit_action(container_id, "stop")
+
+
+@router.post("/containers/{container_id}/start", status_code=202)
 async def start_container(container_id: str, current_user: dict = Depends(get_current_user)):
-    """Start a Docker container"""
+    """Start a Docker container in the background; poll the returned job"""
+    return submit_action(container_id, "start")
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """State of a container action job: running, succeeded or failed"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+class BulkActionIn(BaseModel):
+    action: Literal["start", "stop", "restart"]
+    containers: List[str] = []
+    label: Optional[str] = None
+    project: Optional[str] = None
+    parallelism: int = Field(DOCKER_BULK_PARALLELISM, ge=1, le=16)
+    ordered: bool = True
+
+
+def _select_containers(payload: BulkActionIn) -> Dict[str, Any]:
+    import docker
+    from docker.errors import NotFound
+    client = docker.from_env()
+    selected: Dict[str, Any] = {}
+    missing = []
+    for ref in payload.containers:
+        try:
+            container = client.containers.get(ref)
+        except NotFound:
+            missing.append(ref)
+            continue
+        selected[container.short_id] = container
+    labels = [payload.label] if payload.label else []
+    if payload.project:
+        labels.append(f"{LABEL_PROJECT}={payload.project}")
+    if labels:
+        for container in client.containers.list(all=True, filters={"label": labels}):
+            selected[container.short_id] = container
+    items = [{"id": c.short_id, "name": c.name, "labels": c.labels} for c in selected.values()]
+    return {"items": items, "missing": missing}
+
+
+async def _run_bulk(
+    payload: BulkActionIn,
+    levels: List[List[Dict[str, Any]]],
+    requires: Dict[str, Set[str]],
+    events: asyncio.Queue,
+) -> None:
+    semaphore = asyncio.Semaphore(payload.parallelism)
+    counts = {"succeeded": 0, "failed": 0, "skipped": 0}
+    # Failed or skipped; anything that requires one of these is skipped in turn.
+    unmet: Set[str] = set()
+
+    async def run_one(item: Dict[str, Any]) -> None:
+        blocked = sorted(requires.get(item["id"], set()) & unmet)
+        if blocked:
+            unmet.add(item["id"])
+            counts["skipped"] += 1
+            await events.put({"event": "skipped", "id": item["id"], "name": item["name"], "blocked_by": blocked})
+            return
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                job = jobs.submit(
+                    f"container.{payload.action}", item["id"],
+                    lambda: _container_action(item["id"], payload.action),
+                    on_success=_refresh_container,
+                    executor=_bulk_executor,
+                )
+            except JobConflict as e:
+                job = {"id": e.job["id"], "state": "failed", "error": f"busy with job {e.job['id']}"}
+            else:
+                await events.put({"event": "started", "id": item["id"], "name": item["name"], "job_id": job["id"]})
+                job_id = job["id"]
+                job = await jobs.wait(job_id) or {"id": job_id, "state": "failed", "error": "job record lost"}
+            if job["state"] != "succeeded":
+                unmet.add(item["id"])
+            counts[job["state"]] += 1
+            await events.put({
+                "event": job["state"],
+                "id": item["id"],
+                "name": item["name"],
+                "job_id": job["id"],
+                "error": job["error"],
+                "elapsed_ms": round((time.monotonic() - started) * 1000),
+            })
+
+    try:
+        for level in levels:
+            await asyncio.gather(*(run_one(item) for item in level))
+    finally:
+        await events.put({"event": "done", **counts})
+
+
+@router.post("/containers/bulk")
+async def bulk_action(payload: BulkActionIn, current_user: dict = Depends(get_current_user)):
+    """Start, stop or restart many containers, streaming NDJSON progress per container.
+
+    Containers are picked by id/name, a ``label`` filter (``key`` or
+    ``key=value``) and/or a compose ``project``. With ``ordered`` they run in
+    compose dependency order (dependencies first; dependents first for stop),
+    at most ``parallelism`` at a time, and a container whose prerequisite
+    failed is reported as ``skipped`` instead of run. The run continues if
+    the client disconnects; each container is also visible as a job.
+    """
+    if not (payload.containers or payload.label or payload.project):
+        raise HTTPException(status_code=400, detail="Select containers by list, label or project")
     try:
-        client = get_docker_client()
-        container = client.containers.get(container_id)
-        container.start()
-        return {"message": f"Container {container.name} started successfully"}
+        selection = await asyncio.to_thread(_select_containers, payload)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error starting container: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Docker not available: {str(e)}")
+    items = selection["items"]
+    if payload.ordered:
+        levels = dependency_levels(items, reverse=payload.action == "stop")
+        requires = prerequisites(items, reverse=payload.action == "stop")
+    else:
+        levels = [items] if items else []
+        requires = {}
+
+    events: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(_run_bulk(payload, levels, requires, events), name="job:bulk")
+    _bulk_tasks.add(task)
+    task.add_done_callback(_bulk_tasks.discard)
+
+    async def stream():
+        yield json.dumps({
+            "event": "plan",
+            "action": payload.action,
+            "levels": [[item["name"] for item in level] for level in levels],
+            "missing": selection["missing"],
+        }) + "\n"
+        while True:
+            event = await events.get()
+            yield json.dumps(event) + "\n"
+            if event["event"] == "done":
+                break
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
@@ -1,29 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from routes.auth import get_current_user
 from utils.cache_store import cache_store
+from utils.projection import fields_param, project, project_snapshot
+from utils.sms_store import sms_store
+from utils.wire import render
 from utils.collectors import KEY_DONGLE
 import os
 
-try:
-    from huawei_lte_api.Client import Client
-    from huawei_lte_api.Connection import Connection
-    from huawei_lte_api.enums.sms import BoxTypeEnum
-    HUAWEI_API_AVAILABLE = True
-except ImportError:
-    HUAWEI_API_AVAILABLE = False
-
 router = APIRouter(prefix="/api/dongle", tags=["dongle"])
 
 @router.get("/status")
-async def dongle_status(current_user: dict = Depends(get_current_user)):
+async def dongle_status(request: Request, projection=Depends(fields_param), current_user: dict = Depends(get_current_user)):
     """Get dongle status from cache"""
-    return cache_store.snapshot(KEY_DONGLE)
+    return render(request, project_snapshot(cache_store.snapshot(KEY_DONGLE), projection))
+
+
+@router.get("/sms")
+async def list_sms(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=200),
+    q: str = "",
+    unread: bool = False,
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    """SMS inbox, newest first; ``q`` searches sender and text, ``unread`` keeps unread only."""
+    page = await asyncio.to_thread(sms_store.page, offset, limit, q.strip(), unread)
+    return render(request, project(page, projection))
 
 
 @router.post("/sms/{message_index}/delete")
 async def delete_sms(message_index: int, current_user: dict = Depends(get_current_user)):
     """Delete an SMS message"""
-    if not HUAWEI_API_AVAILABLE:
+    try:
+        from huawei_lte_api.Client import Client
+        from huawei_lte_api.Connection import Connection
+    except ImportError:
         raise HTTPException(status_code=500, detail="Huawei LTE API not available")
 
     modem_ip = os.getenv('MODEM_IP', '192.168.8.1')
@@ -31,6 +46,7 @@ async def delete_sms(message_index: int, current_user: dict = Depends(get_curren
         with Connection(f'http://{modem_ip}/') as connection:
             client = Client(connection)
             client.sms.delete_sms(message_index)
+        await asyncio.to_thread(sms_store.delete, message_index)
         return {"message": "SMS deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting SMS: {str(e)}")
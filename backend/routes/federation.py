@@ -0,0 +1,132 @@
+import hmac
+import json
+import logging
+import time
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from routes.auth import get_current_user
+from utils.cache_store import cache_store, CacheStore
+from utils.collectors import KEY_SUMMARY, KEY_HEALTH
+from utils.federation import FEDERATION_TOKEN, LOCAL_HOST, fleet
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/fleet", tags=["fleet"])
+
+
+def store_for_host(host: str = "") -> CacheStore:
+    """Resolve the ``host`` query parameter used by the per-host metric routes."""
+    if not host or host == LOCAL_HOST:
+        return cache_store
+    state = fleet.get(host)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Unknown host: {host}")
+    return state.store
+
+
+def _host_summary(host: str, store: CacheStore) -> Dict[str, Any]:
+    snaps = store.snapshot_many([KEY_SUMMARY, KEY_HEALTH])
+    summary = snaps[KEY_SUMMARY]["data"] or {}
+    return {
+        "host": host,
+        "health": (snaps[KEY_HEALTH]["data"] or {}).get("status"),
+        "stale": snaps[KEY_SUMMARY]["meta"]["stale"],
+        "cpu": (summary.get("cpu") or {}).get("overall_usage"),
+        "memory": (summary.get("memory") or {}).get("percent"),
+        "temp": (summary.get("temperature") or {}).get("cpu_temp"),
+        "timestamp": summary.get("timestamp"),
+    }
+
+
+@router.get("/hosts")
+async def list_hosts(current_user: dict = Depends(get_current_user)):
+    hosts = [{"host": LOCAL_HOST, "connected": True, "local": True}]
+    hosts += [fleet.hosts[host_id].info() for host_id in fleet.host_ids()]
+    return {"hosts": hosts}
+
+
+@router.get("/summary")
+async def fleet_summary(current_user: dict = Depends(get_current_user)):
+    rows: List[Dict[str, Any]] = [_host_summary(LOCAL_HOST, cache_store)]
+    rows += [_host_summary(host_id, fleet.hosts[host_id].store) for host_id in fleet.host_ids()]
+    live = [row for row in rows if not row["stale"] and row["cpu"] is not None]
+    by_health: Dict[str, int] = {}
+    for row in rows:
+        key = row["health"] or "unknown"
+        by_health[key] = by_health.get(key, 0) + 1
+
+    def _avg(field: str):
+        values = [row[field] for row in live if row[field] is not None]
+        return round(sum(values) / len(values), 2) if values else None
+
+    def _max(field: str):
+        values = [row[field] for row in live if row[field] is not None]
+        return max(values) if values else None
+
+    return {
+        "hosts": rows,
+        "fleet": {
+            "hosts": len(rows),
+            "reporting": len(live),
+            "by_health": by_health,
+            "avg_cpu": _avg("cpu"),
+            "max_cpu": _max("cpu"),
+            "avg_memory": _avg("memory"),
+            "max_temp": _max("temp"),
+        },
+    }
+
+
+@router.websocket("/ingest")
+async def ingest(websocket: WebSocket):
+    """Persistent agent connection; see utils/federation.py for the protocol."""
+    await websocket.accept()
+    if not FEDERATION_TOKEN:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Federation disabled")
+        return
+    try:
+        hello = json.loads(await websocket.receive_text())
+    except (WebSocketDisconnect, ValueError):
+        return
+    if not isinstance(hello, dict):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid hello")
+        return
+    host_id = str(hello.get("host") or "")
+    token = str(hello.get("token") or "")
+    if hello.get("type") != "hello" or not host_id or host_id == LOCAL_HOST \
+            or not hmac.compare_digest(token, FEDERATION_TOKEN):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid hello")
+        return
+
+    state = fleet.host(host_id)
+    state.connected = True
+    state.connected_at = time.time()
+    state.remote = websocket.client.host if websocket.client else None
+    # A reconnecting agent starts over with full values.
+    state.store = CacheStore()
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict) or not isinstance(message.get("keys") or {}, dict):
+                await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason="Malformed message")
+                break
+            state.last_seen = time.time()
+            state.messages += 1
+            state.bytes += len(raw)
+            if message.get("type") in ("full", "delta"):
+                try:
+                    state.apply(message.get("keys") or {})
+                except (AttributeError, KeyError, TypeError, ValueError) as e:
+                    # Nothing from a bad message is published; the agent reconnects and resends full values.
+                    logger.warning(f"fleet host {host_id}: malformed patch: {e}")
+                    await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason="Malformed patch")
+                    break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        state.connected = False
@@ -1,10 +1,21 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from routes.auth import get_current_user
 from utils.cache_store import cache_store
+from utils.projection import fields_param, project_snapshot
+from utils.wire import render
 from utils.collectors import KEY_HEALTH
+from utils.loop_monitor import loop_monitor
+from utils.users import is_admin
 
 router = APIRouter(prefix="/api/health", tags=["health"])
 
 @router.get("")
-async def get_health():
-    return cache_store.snapshot(KEY_HEALTH)
+async def get_health(request: Request, projection=Depends(fields_param)):
+    return render(request, project_snapshot(cache_store.snapshot(KEY_HEALTH), projection))
+
+@router.get("/loop")
+async def get_loop_stalls(current_user: dict = Depends(get_current_user)):
+    """This process's loop lag report including the stacks captured during stalls (admin only)."""
+    if not is_admin(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
+    return loop_monitor.snapshot(stacks=True)
@@ -1,15 +1,31 @@
-from fastapi import APIRouter, Depends
+import hashlib
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from routes.auth import get_current_user
-from utils.cache_store import cache_store
+from routes.federation import store_for_host
+from utils.downsample import history_indices
+from utils.history import HISTORY_SERIES, columnar
+from utils.cache_store import SHM_ROLE, cache_store
+from utils.history_archive import (
+    BackgroundIterator, bucketed, byte_range, encode_rows, export_slot, history_archive, parse_range,
+    release_export_slot,
+)
+from utils.loop_monitor import worker_reports
+from utils.projection import fields_param, project, project_snapshot
+from utils.timeparse import parse_since
+from utils.wire import is_binary, render
 from utils.collectors import (
-    KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_DISK, KEY_NETWORK, KEY_SUMMARY, KEY_HISTORY
+    KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_DISK, KEY_NETWORK, KEY_NETWORK_ADDRS, KEY_SUMMARY, KEY_HISTORY,
+    KEY_PROCESSES, KEY_STATS, KEY_LOOP, KEY_THERMAL_HISTORY
 )
 
 router = APIRouter(prefix="/api/metrics", tags=["metrics"])
 
 
-def _cached_or_empty(key: str):
-    snapshot = cache_store.snapshot(key)
+def _cached_or_empty(key: str, host: str = "", projection=None):
+    snapshot = project_snapshot(store_for_host(host).snapshot(key), projection)
     return {
         "data": snapshot["data"],
         "meta": snapshot["meta"],
@@ -17,35 +33,266 @@ def _cached_or_empty(key: str):
 
 
 @router.get("/cpu")
-async def cpu_metrics(current_user: dict = Depends(get_current_user)):
-    return _cached_or_empty(KEY_CPU)
+async def cpu_metrics(
+    request: Request,
+    host: str = "",
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    return render(request, _cached_or_empty(KEY_CPU, host, projection))
 
 
 @router.get("/memory")
-async def memory_metrics(current_user: dict = Depends(get_current_user)):
-    return _cached_or_empty(KEY_MEMORY)
+async def memory_metrics(
+    request: Request,
+    host: str = "",
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    return render(request, _cached_or_empty(KEY_MEMORY, host, projection))
 
 
 @router.get("/temperature")
-async def temperature_metrics(current_user: dict = Depends(get_current_user)):
-    return _cached_or_empty(KEY_TEMP)
+async def temperature_metrics(
+    request: Request,
+    host: str = "",
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    return render(request, _cached_or_empty(KEY_TEMP, host, projection))
+
+
+@router.get("/temperature/history")
+async def temperature_history(
+    request: Request,
+    host: str = "",
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    """Every sensor and throttle flag (0/1) over the chart window, in the columnar layout."""
+    return render(request, _cached_or_empty(KEY_THERMAL_HISTORY, host, projection))
 
 
 @router.get("/disk")
-async def disk_metrics(current_user: dict = Depends(get_current_user)):
-    return _cached_or_empty(KEY_DISK)
+async def disk_metrics(
+    request: Request,
+    host: str = "",
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    return render(request, _cached_or_empty(KEY_DISK, host, projection))
 
 
 @router.get("/network")
-async def network_metrics(current_user: dict = Depends(get_current_user)):
-    return _cached_or_empty(KEY_NETWORK)
+async def network_metrics(
+    request: Request,
+    host: str = "",
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    # Counters and addresses are cached separately; the route keeps the combined shape.
+    store = store_for_host(host)
+    snapshot = store.snapshot(KEY_NETWORK)
+    data = snapshot["data"]
+    if data is not None:
+        addresses = store.snapshot(KEY_NETWORK_ADDRS)["data"] or {"interfaces": []}
+        data = project({**addresses, **data}, projection)
+    return render(request, {"data": data, "meta": snapshot["meta"]})
+
+
+@router.get("/network/interfaces")
+async def network_interfaces(
+    request: Request,
+    host: str = "",
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    return render(request, _cached_or_empty(KEY_NETWORK_ADDRS, host, projection))
+
+
+@router.get("/processes")
+async def process_metrics(
+    request: Request,
+    host: str = "",
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    """Top processes by CPU, memory and disk I/O."""
+    return render(request, _cached_or_empty(KEY_PROCESSES, host, projection))
+
+
+@router.get("/stats")
+async def window_stats(
+    request: Request,
+    host: str = "",
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    """Rolling min/max/mean/p95 of cpu, memory and temp over 1m, 5m, 15m and 1h."""
+    return render(request, _cached_or_empty(KEY_STATS, host, projection))
+
+
+@router.get("/loop")
+async def loop_metrics(
+    request: Request,
+    host: str = "",
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    """Event-loop lag histogram and blocking-call counts per collector or route.
+
+    Behind ``CACHE_SHM_ROLE=reader`` workers this is collector.py's loop, with
+    each API worker's own report under ``workers`` (by pid).
+    """
+    if SHM_ROLE != "reader" or store_for_host(host) is not cache_store:
+        return render(request, _cached_or_empty(KEY_LOOP, host, projection))
+    snapshot = cache_store.snapshot(KEY_LOOP)
+    data = {**(snapshot["data"] or {}), "workers": worker_reports()}
+    return render(request, {"data": project(data, projection), "meta": snapshot["meta"]})
 
 
 @router.get("/summary")
-async def summary_metrics(current_user: dict = Depends(get_current_user)):
-    return _cached_or_empty(KEY_SUMMARY)
+async def summary_metrics(
+    request: Request,
+    host: str = "",
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    return render(request, _cached_or_empty(KEY_SUMMARY, host, projection))
 
 
 @router.get("/history")
-async def history_metrics(current_user: dict = Depends(get_current_user)):
-    return _cached_or_empty(KEY_HISTORY)
+async def history_metrics(
+    request: Request,
+    host: str = "",
+    layout: str = "",
+    points: int = 0,
+    window: float = 0,
+    series: str = "",
+    projection=Depends(fields_param),
+    current_user: dict = Depends(get_current_user),
+):
+    """Chart history as rows (JSON default) or columns (binary default, or ``layout=columnar``).
+
+    ``window`` keeps the last N seconds; ``points`` downsamples with LTTB so the
+    ``series`` listed (default: all) keep their shape in at most that many points.
+    """
+    layout = layout or ("columnar" if is_binary(request) else "rows")
+    if layout not in ("rows", "columnar"):
+        raise HTTPException(status_code=400, detail="layout must be 'rows' or 'columnar'")
+    if points < 0 or window < 0:
+        raise HTTPException(status_code=400, detail="points and window must not be negative")
+    selected = tuple(name.strip() for name in series.split(",") if name.strip()) or HISTORY_SERIES
+    unknown = [name for name in selected if name not in HISTORY_SERIES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown series: {', '.join(unknown)}")
+
+    payload = _cached_or_empty(KEY_HISTORY, host)
+    rows = payload["data"] or []
+    indices = None
+    if rows and (points or window):
+        indices = history_indices(rows, selected, window, points)
+        payload["source_points"] = len(rows)
+    if layout == "columnar":
+        columns = columnar(rows)
+        if indices is not None:
+            columns = {
+                "ts": [columns["ts"][i] for i in indices],
+                "series": {name: [values[i] for i in indices] for name, values in columns["series"].items()},
+            }
+        payload["data"] = columns
+        payload["layout"] = "columnar"
+    elif indices is not None:
+        payload["data"] = [rows[i] for i in indices]
+    return render(request, project_snapshot(payload, projection))
+
+
+EXPORT_MEDIA = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+@router.get("/history/export")
+async def export_history(
+    request: Request,
+    start: str = "1d",
+    end: str = "",
+    series: str = "",
+    resolution: float = 0,
+    fmt: str = Query("csv", alias="format"),
+    current_user: dict = Depends(get_current_user),
+):
+    """Stream archived history as CSV or NDJSON.
+
+    ``start``/``end`` are unix timestamps or durations ago (``7d``, ``12h``);
+    ``end`` defaults to now. ``resolution`` averages points into buckets of
+    that many seconds (0 keeps every point). A range that ended in the past
+    always produces the same bytes, so it honours ``Range``/``If-Range`` for
+    resuming; a range running up to now is sent whole.
+    """
+    if fmt not in EXPORT_MEDIA:
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+    if resolution < 0:
+        raise HTTPException(status_code=400, detail="resolution must not be negative")
+    if not history_archive.enabled:
+        raise HTTPException(status_code=404, detail="History archive is disabled")
+    selected = [name.strip() for name in series.split(",") if name.strip()] or list(HISTORY_SERIES)
+    unknown = [name for name in selected if name not in HISTORY_SERIES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown series: {', '.join(unknown)}")
+    now = time.time()
+    try:
+        start_ts = parse_since(start, now, "start")
+        end_ts = parse_since(end, now, "end") if end else now
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if start_ts >= end_ts:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    def chunks():
+        points = bucketed(history_archive.points(start_ts, end_ts), selected, resolution)
+        return encode_rows(points, selected, fmt)
+
+    filename = f"statlog-history-{int(start_ts)}-{int(end_ts)}.{fmt}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "X-Accel-Buffering": "no"}
+    # The newest bucket may still be filling; only a range that ended before it is stable.
+    resumable = end_ts < now - max(resolution, 5)
+    requested = None
+    if resumable:
+        files = history_archive.files_between(start_ts, end_ts)
+        key = f"{start_ts}:{end_ts}:{','.join(selected)}:{resolution}:{fmt}:{','.join(files)}"
+        etag = '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+        headers.update({"Accept-Ranges": "bytes", "ETag": etag})
+        if_range = request.headers.get("if-range")
+        if if_range is None or if_range == etag:
+            requested = parse_range(request.headers.get("range"))
+    else:
+        headers["Accept-Ranges"] = "none"
+
+    if not export_slot():
+        raise HTTPException(status_code=429, detail="Too many exports running, try again later", headers={"Retry-After": "10"})
+    status_code = 200
+    produce = chunks
+    try:
+        if requested is not None:
+            # Sizing the response means generating it once; that runs on the export thread too.
+            total = 0
+            async for total in BackgroundIterator(lambda: [sum(len(chunk) for chunk in chunks())]).items():
+                pass
+            first, last = requested[0], min(requested[1] if requested[1] is not None else total - 1, total - 1)
+            if first >= total:
+                release_export_slot()
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{total}"})
+            status_code = 206
+            headers.update({"Content-Range": f"bytes {first}-{last}/{total}", "Content-Length": str(last - first + 1)})
+            produce = lambda: byte_range(chunks(), first, last)
+    except BaseException:
+        release_export_slot()
+        raise
+
+    async def body():
+        try:
+            async for chunk in BackgroundIterator(produce).items():
+                yield chunk
+        finally:
+            release_export_slot()
+
+    return StreamingResponse(body(), status_code=status_code, media_type=EXPORT_MEDIA[fmt], headers=headers)
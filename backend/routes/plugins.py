@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Depends
+from routes.auth import get_current_user
+from utils import plugins
+
+router = APIRouter(prefix="/api/plugins", tags=["plugins"])
+
+@router.get("")
+async def list_plugins(current_user: dict = Depends(get_current_user)):
+    """Which collector plugins run on this host, why others are off, and their import cost."""
+    return {"plugins": plugins.report()}
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from routes.auth import get_current_user
-from models.settings import AppSettings, ServiceLink, SMTPSettings, APIKeys
+from models.settings import AppSettings, ServiceLink, SMTPSettings, APIKeys, AlertRule
 from utils.database import get_database
 from utils.users import is_admin
 from utils.smtp_mailer import smtp_is_configured, send_email_sync
@@ -251,6 +251,20 @@ async def smtp_forwarding_status(current_user: dict = Depends(get_current_user))
     return status
 
 
+@router.put("/alert-rules")
+async def update_alert_rules(rules: List[AlertRule], current_user: dict = Depends(get_current_user)):
+    """Replace the alert rules; an empty list falls back to the threshold fields."""
+    db = get_database()
+
+    await db.settings.update_one(
+        {},
+        {"$set": {"alert_rules": [rule.dict() for rule in rules]}},
+        upsert=True
+    )
+
+    return {"message": "Alert rules updated successfully"}
+
+
 @router.put("/api-keys")
 async def update_api_keys(api_keys: APIKeys, current_user: dict = Depends(get_current_user)):
     """Update API keys"""
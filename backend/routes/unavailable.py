@@ -0,0 +1,48 @@
+"""Stand-in routes for optional integrations whose plugin is switched off.
+
+A disabled plugin's real router (and SDK) is never imported, but the
+frontend still polls its pages. These answer with the "not available"
+payloads the collectors published before plugins existed, instead of a 404.
+"""
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from routes.auth import get_current_user
+from utils.wire import render
+
+
+def _snapshot(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {"data": data, "meta": {"stale": False, "expired": False, "age": None}}
+
+
+# Plugin name -> (route prefix, error for every other request, GET path -> payload).
+STAND_INS = {
+    "docker": (
+        "/api/docker",
+        "Docker not available",
+        {"containers": _snapshot({"containers": [], "error": "Docker not available"})},
+    ),
+    "dongle": (
+        "/api/dongle",
+        "Huawei LTE API not available",
+        {
+            "status": _snapshot({"error": "Huawei LTE API not available", "connected": False}),
+            "sms": {"total": 0, "offset": 0, "limit": 20, "items": []},
+        },
+    ),
+    "usb": ("/api/usb", "USB devices not available", {"devices": _snapshot({"devices": []})}),
+}
+
+
+def router_for(name: str) -> APIRouter:
+    prefix, message, payloads = STAND_INS[name]
+    router = APIRouter(prefix=prefix, tags=[name])
+
+    @router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"], include_in_schema=False)
+    async def not_available(request: Request, path: str, current_user: dict = Depends(get_current_user)):
+        payload = payloads.get(path)
+        if request.method != "GET" or payload is None:
+            raise HTTPException(status_code=500, detail=message)
+        return render(request, payload)
+
+    return router
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from routes.auth import get_current_user
 from utils.cache_store import cache_store
+from utils.projection import fields_param, project_snapshot
+from utils.wire import render
 from utils.collectors import KEY_USB
 
 router = APIRouter(prefix="/api/usb", tags=["usb"])
 
 @router.get("/devices")
-async def get_usb_devices(current_user: dict = Depends(get_current_user)):
+async def get_usb_devices(request: Request, projection=Depends(fields_param), current_user: dict = Depends(get_current_user)):
     """Get all connected USB devices from cache"""
-    return cache_store.snapshot(KEY_USB)
+    return render(request, project_snapshot(cache_store.snapshot(KEY_USB), projection))
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from routes.auth import get_current_user
+from routes.auth import get_current_user, password_pool_busy
 from utils.database import get_database
-from utils.auth import get_password_hash, verify_password
+from utils.auth import check_password, hash_password, PasswordPoolBusy
 from utils.users import public_user, is_admin
 from pydantic import BaseModel
 from typing import Optional
@@ -47,9 +47,13 @@ async def create_user(user: UserCreateIn, current_user: dict = Depends(get_curre
     existing = await db.users.find_one({"username": user.username})
     if existing:
         raise HTTPException(status_code=400, detail="Username already exists")
+    try:
+        hashed_password = await hash_password(user.password)
+    except PasswordPoolBusy:
+        raise password_pool_busy()
     new_user = {
         "username": user.username,
-        "hashed_password": get_password_hash(user.password),
+        "hashed_password": hashed_password,
         "is_active": user.is_active,
         "role": user.role or "admin"
     }
@@ -79,10 +83,14 @@ async def update_user(username: str, payload: UserUpdateIn, current_user: dict =
 async def reset_password(username: str, payload: PasswordResetIn, current_user: dict = Depends(get_current_user)):
     if not is_admin(current_user):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
+    try:
+        hashed_password = await hash_password(payload.new_password)
+    except PasswordPoolBusy:
+        raise password_pool_busy()
     db = get_database()
     result = await db.users.update_one(
         {"username": username},
-        {"$set": {"hashed_password": get_password_hash(payload.new_password)}}
+        {"$set": {"hashed_password": hashed_password}}
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
@@ -94,10 +102,15 @@ async def change_password(payload: PasswordChangeIn, current_user: dict = Depend
     db = get_database()
     username = current_user.get("username")
     user = await db.users.find_one({"username": username})
-    if not user or not verify_password(payload.current_password, user["hashed_password"]):
-        raise HTTPException(status_code=400, detail="Current password incorrect")
+    try:
+        valid = user is not None and (await check_password(payload.current_password, user["hashed_password"]))[0]
+        if not valid:
+            raise HTTPException(status_code=400, detail="Current password incorrect")
+        hashed_password = await hash_password(payload.new_password)
+    except PasswordPoolBusy:
+        raise password_pool_busy()
     await db.users.update_one(
         {"username": username},
-        {"$set": {"hashed_password": get_password_hash(payload.new_password)}}
+        {"$set": {"hashed_password": hashed_password}}
     )
     return {"message": "Password changed"}
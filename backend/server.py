@@ -1,3 +1,8 @@
+import asyncio
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -8,17 +13,43 @@ load_dotenv()
 
 from utils.database import connect_to_mongo, close_mongo_connection, get_database
 from utils.collectors import start_collectors, stop_collectors
-from utils.auth import get_password_hash
-from routes import auth, metrics, usb, docker_api, dongle, settings, health, users, cache_meta
+from utils.auth import hash_password
+from utils.cache_store import SHM_ROLE
+from utils.federation import FEDERATION_TOKEN
+from utils.loop_monitor import loop_monitor, publish_worker_report
+from utils.snapshot import checkpoint_forever, load_snapshot, save_snapshot
+from utils import plugins
+from routes import auth, metrics, settings, health, users, cache_meta, federation, batch
+from routes import plugins as plugins_route
+from routes import unavailable
+
+# Optional integrations (Docker, dongle, USB) import their SDKs and routes only when enabled.
+enabled_plugins = plugins.active()
+import_ms = round((time.perf_counter() - _import_started) * 1000, 1)
 
 collector_tasks = []
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    print(f"Startup imports took {import_ms} ms")
+    for line in plugins.report_lines():
+        print(line)
+    loop_monitor.start()
     await connect_to_mongo()
     global collector_tasks
-    collector_tasks = await start_collectors()
+    # Workers reading a shared segment leave collection to collector.py.
+    if SHM_ROLE != "reader":
+        restored = load_snapshot()
+        if restored:
+            print(f"Restored {restored} cache entries from snapshot (stale until refreshed)")
+        collector_tasks = await start_collectors()
+        collector_tasks.append(asyncio.create_task(checkpoint_forever(), name="snapshot"))
+    else:
+        # collector.py's report is in the cache; each worker publishes its own beside it.
+        collector_tasks = [asyncio.create_task(publish_worker_report(), name="loop-report")]
+        if FEDERATION_TOKEN:
+            print("Warning: fleet state is per worker; run the federation aggregator as a single worker")
     
     # Initialize default admin user if not exists
     db = get_database()
@@ -29,7 +60,7 @@ async def lifespan(app: FastAPI):
     if not existing_admin:
         await db.users.insert_one({
             "username": admin_username,
-            "hashed_password": get_password_hash(admin_password),
+            "hashed_password": await hash_password(admin_password),
             "is_active": True,
             "role": "admin"
         })
@@ -39,7 +70,10 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     await stop_collectors(collector_tasks)
+    if SHM_ROLE != "reader":
+        await save_snapshot()
     await close_mongo_connection()
+    await loop_monitor.stop()
 
 app = FastAPI(
     title="Raspberry Pi Monitor API",
@@ -61,12 +95,18 @@ app.add_middleware(
 app.include_router(health.router)
 app.include_router(auth.router)
 app.include_router(metrics.router)
-app.include_router(usb.router)
-app.include_router(docker_api.router)
-app.include_router(dongle.router)
 app.include_router(settings.router)
 app.include_router(users.router)
 app.include_router(cache_meta.router)
+app.include_router(federation.router)
+app.include_router(batch.router)
+app.include_router(plugins_route.router)
+for plugin_router in plugins.routers(enabled_plugins):
+    app.include_router(plugin_router)
+# Disabled integrations answer "not available" instead of 404 so their pages still render.
+for plugin in plugins.REGISTRY.values():
+    if plugin.router and not plugin.enabled:
+        app.include_router(unavailable.router_for(plugin.name))
 
 @app.get("/")
 async def root():
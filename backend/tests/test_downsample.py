@@ -0,0 +1,45 @@
+import random
+from datetime import datetime, timedelta
+
+from utils.downsample import history_indices, lttb_indices
+from utils.history import HISTORY_SERIES, MEL_TZ
+
+
+def _rows(n, flat=False):
+    rng = random.Random(n)
+    start = datetime(2026, 1, 1, tzinfo=MEL_TZ)
+    rows = []
+    for i in range(n):
+        ts = start + timedelta(seconds=2 * i)
+        value = 10.0 if flat else rng.uniform(0, 100)
+        rows.append({"ts": ts.isoformat(), "time": ts.strftime("%H:%M:%S"), "cpu": value, "memory": value, "temp": value})
+    return rows
+
+
+def test_window_only_keeps_every_sample():
+    for flat in (False, True):
+        rows = _rows(450, flat)
+        # 2 s cadence: the last 300 s is 151 samples, both ends inclusive.
+        assert history_indices(rows, HISTORY_SERIES, 300, 0) == list(range(299, 450))
+        assert history_indices(rows, HISTORY_SERIES, 10000, 0) == list(range(450))
+
+
+def test_points_at_or_above_window_length_is_unchanged():
+    rows = _rows(450)
+    assert history_indices(rows, HISTORY_SERIES, 0, 450) == list(range(450))
+    assert history_indices(rows, HISTORY_SERIES, 300, 151) == list(range(299, 450))
+
+
+def test_points_below_window_length_downsamples():
+    rows = _rows(450)
+    indices = history_indices(rows, HISTORY_SERIES, 0, 120)
+    assert indices[0] == 0 and indices[-1] == 449
+    assert len(indices) <= 120
+    assert indices == sorted(set(indices))
+
+
+def test_lttb_keeps_spike():
+    ys = [0.0] * 100
+    ys[37] = 50.0
+    kept = lttb_indices(list(range(100)), ys, 10)
+    assert len(kept) == 10 and 37 in kept
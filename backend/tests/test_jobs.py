@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import collectors
+from utils.jobs import JobConflict, JobManager
+from utils.shm_cache import send_to_writer, serve_writer_requests
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_job_visible_from_another_worker(tmp_path):
+    accepting, polled = JobManager(str(tmp_path)), JobManager(str(tmp_path))
+
+    async def scenario():
+        job = accepting.submit("container.restart", "web", lambda: {"id": "web"})
+        assert polled.get(job["id"])["state"] == "running"
+        await accepting.wait(job["id"])
+        return job["id"]
+
+    job_id = asyncio.run(scenario())
+    job = polled.get(job_id)
+    assert job["state"] == "succeeded"
+    assert job["result"] == {"id": "web"}
+    assert "pid" not in job
+    assert polled.get("../../etc/passwd") is None
+
+
+def test_one_job_per_target_across_workers(tmp_path):
+    first, second = JobManager(str(tmp_path)), JobManager(str(tmp_path))
+
+    async def scenario():
+        job = first.submit("container.stop", "db", lambda: None)
+        with pytest.raises(JobConflict) as conflict:
+            second.submit("container.start", "db", lambda: None)
+        assert conflict.value.job["id"] == job["id"]
+        await first.wait(job["id"])
+        # The lock is released once the job finishes.
+        later = second.submit("container.start", "db", lambda: None)
+        await second.wait(later["id"])
+
+    asyncio.run(scenario())
+
+
+def test_job_of_dead_worker(tmp_path):
+    manager = JobManager(str(tmp_path))
+    pid = _dead_pid()
+    record = {"id": "0123456789ab", "kind": "container.restart", "target": "web", "state": "running",
+              "created_at": 1.0, "finished_at": None, "result": None, "error": None, "pid": pid}
+    (tmp_path / "0123456789ab.json").write_text(json.dumps(record))
+    (tmp_path / os.path.basename(manager._lock_path("web"))).write_text(f"{pid} 0123456789ab")
+    assert manager.get("0123456789ab")["state"] == "failed"
+
+    async def scenario():
+        # The stale lock does not block a new job on the same target.
+        job = manager.submit("container.restart", "web", lambda: None)
+        await manager.wait(job["id"])
+
+    asyncio.run(scenario())
+
+
+def test_reader_forwards_container_refresh_to_writer(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sock")
+    received = []
+    sent = []
+
+    async def scenario():
+        done = asyncio.Event()
+
+        async def handler(message):
+            received.append(message)
+            done.set()
+
+        server = asyncio.create_task(serve_writer_requests(handler, path))
+        while not os.path.exists(path):
+            await asyncio.sleep(0.01)
+        monkeypatch.setattr(collectors, "SHM_ROLE", "reader")
+        monkeypatch.setattr(collectors, "send_to_writer", lambda message: sent.append(message) or send_to_writer(message, path))
+        await collectors.refresh_container("abc123")
+        await asyncio.wait_for(done.wait(), 2)
+        server.cancel()
+        await asyncio.gather(server, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert sent == received == [{"refresh": "container", "id": "abc123"}]
+    assert not os.path.exists(path)
+
+
+def test_writer_request_without_writer_is_dropped(tmp_path):
+    assert send_to_writer({"refresh": "container", "id": "x"}, str(tmp_path / "missing.sock")) is False
+
+
+def test_job_runs_on_the_given_executor():
+    manager = JobManager("")
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bulk-test")
+
+    async def scenario():
+        job = manager.submit("container.restart", "web", lambda: threading.current_thread().name, executor=executor)
+        return (await manager.wait(job["id"]))["result"]
+
+    try:
+        assert asyncio.run(scenario()).startswith("bulk-test")
+    finally:
+        executor.shutdown()
@@ -0,0 +1,30 @@
+import pytest
+
+from utils.projection import compile_fields, project
+
+
+def test_nested_paths_and_lists():
+    data = {"cpu": {"overall_usage": 5, "per_core_usage": [1, 2]}, "containers": [{"name": "a", "id": 1}]}
+    tree = compile_fields("cpu.overall_usage,containers.name")
+    assert project(data, tree) == {"cpu": {"overall_usage": 5}, "containers": [{"name": "a"}]}
+
+
+def test_wildcard_with_named_sibling_keeps_both():
+    data = {"a": {"x": 1, "y": 2, "z": 3}, "b": {"x": 4, "y": 5}}
+    assert project(data, compile_fields("*.x,a.y")) == {"a": {"x": 1, "y": 2}, "b": {"x": 4}}
+
+
+def test_wildcard_merges_below_named_sibling():
+    data = {"eth0": {"stats": {"rx": 1, "tx": 2}, "up": True}, "lo": {"stats": {"rx": 3, "tx": 4}, "up": True}}
+    tree = compile_fields("*.stats.rx,eth0.stats.tx,eth0.up")
+    assert project(data, tree) == {"eth0": {"stats": {"rx": 1, "tx": 2}, "up": True}, "lo": {"stats": {"rx": 3}}}
+
+
+def test_whole_subtree_wins_over_wildcard_leaf():
+    data = {"a": {"x": 1, "y": 2}, "b": {"x": 3, "y": 4}}
+    assert project(data, compile_fields("*.x,a")) == {"a": {"x": 1, "y": 2}, "b": {"x": 3}}
+
+
+def test_invalid_path():
+    with pytest.raises(ValueError):
+        compile_fields("a..b")
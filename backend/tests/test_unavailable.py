@@ -0,0 +1,29 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes import unavailable
+from routes.auth import get_current_user
+
+
+def _client(*names):
+    app = FastAPI()
+    for name in names:
+        app.include_router(unavailable.router_for(name))
+    app.dependency_overrides[get_current_user] = lambda: {"username": "admin"}
+    return TestClient(app)
+
+
+def test_polled_pages_get_not_available_payloads():
+    client = _client("docker", "dongle", "usb")
+    assert client.get("/api/docker/containers").json()["data"] == {"containers": [], "error": "Docker not available"}
+    assert client.get("/api/dongle/status").json()["data"]["connected"] is False
+    assert client.get("/api/dongle/sms").json()["items"] == []
+    assert client.get("/api/usb/devices").json()["data"] == {"devices": []}
+
+
+def test_other_requests_fail_like_a_missing_integration():
+    client = _client("docker")
+    response = client.post("/api/docker/containers/abc/restart")
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Docker not available"
+    assert client.get("/api/docker/containers/abc/history").status_code == 500
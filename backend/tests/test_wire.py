@@ -0,0 +1,22 @@
+import pytest
+
+from utils.wire import MEDIA_JSON, negotiate
+
+pytest.importorskip("msgpack")
+MSGPACK = "application/msgpack"
+
+
+def test_equal_q_goes_to_the_first_listed():
+    assert negotiate("application/msgpack, application/json") == MSGPACK
+    assert negotiate("application/json, application/msgpack") == MEDIA_JSON
+
+
+def test_higher_q_wins_regardless_of_order():
+    assert negotiate("application/json;q=0.5, application/msgpack") == MSGPACK
+    assert negotiate("application/msgpack;q=0.5, application/json") == MEDIA_JSON
+
+
+def test_wildcards_stay_json():
+    assert negotiate("*/*") == MEDIA_JSON
+    assert negotiate("text/html,*/*;q=0.8") == MEDIA_JSON
+    assert negotiate(None) == MEDIA_JSON
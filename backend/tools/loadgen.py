@@ -0,0 +1,359 @@
+"""Simulate N browser dashboards polling the backend the way the frontend does.
+
+Each simulated screen logs in once, then runs the same pollers as the React
+pages, with the same intervals and the same parallel request groups:
+
+    Dashboard.jsx         every max(refresh, 2)s: summary, health, history, resolved settings, processes;
+                          every 60s: network interfaces
+    DockerContainers.jsx  every 5s: docker containers
+    DongleStatus.jsx      every 7s: dongle status, first SMS page
+    SystemMetrics.jsx     every 8s: disk, usb devices
+
+A "household" screen only shows the Dashboard; an "ops" screen keeps all four
+pages open. Typical run against the stub backend:
+
+    cd backend
+    python -m tools.stub_server --port 8013 &
+    python -m tools.loadgen --url http://127.0.0.1:8013 --screens 5,10,25,50 --ops-ratio 0.2
+
+Run against a real Pi by pointing --url at it and passing --pid so backend
+RSS can be read from /proc (event loop lag is only available from the stub).
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+DASHBOARD_REFRESH_CHOICES = [1, 2, 3, 5]
+MAX_CONNECTIONS_PER_SCREEN = 6
+
+HOUSEHOLD_POLLERS = ["dashboard", "interfaces"]
+OPS_POLLERS = ["dashboard", "interfaces", "docker", "dongle", "system"]
+
+# (fixed interval or None for the dashboard refresh rate, endpoints fetched in parallel)
+POLLERS: Dict[str, Tuple[Optional[float], List[str]]] = {
+    "dashboard": (None, [
+        "/api/metrics/summary",
+        "/api/health",
+        "/api/metrics/history",
+        "/api/settings/resolved/{host}",
+        "/api/metrics/processes",
+    ]),
+    # Dashboard.jsx refreshes the interface list once a minute on its own timer.
+    "interfaces": (60.0, ["/api/metrics/network/interfaces"]),
+    "docker": (5.0, ["/api/docker/containers"]),
+    "dongle": (7.0, ["/api/dongle/status", "/api/dongle/sms?offset=0&limit=20"]),
+    "system": (8.0, ["/api/metrics/disk", "/api/usb/devices"]),
+}
+
+
+class HttpError(Exception):
+    pass
+
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 client; enough for JSON GET/POST polling."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def _ensure_open(self) -> None:
+        if self.writer is None or self.writer.is_closing():
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, path: str, headers: Dict[str, str], body: bytes = b"") -> Tuple[int, bytes]:
+        reused = self.writer is not None
+        try:
+            return await self._request_once(method, path, headers, body)
+        except HttpError:
+            # The server may have closed an idle keep-alive connection; browsers retry once.
+            if not reused:
+                raise
+            return await self._request_once(method, path, headers, body)
+
+    async def _request_once(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, bytes]:
+        await self._ensure_open()
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        if body:
+            lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        try:
+            await self.writer.drain()
+            return await self._read_response()
+        except (ConnectionError, asyncio.IncompleteReadError, IndexError) as e:
+            self.close()
+            raise HttpError(str(e))
+
+    async def _read_response(self) -> Tuple[int, bytes]:
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed")
+        status = int(status_line.split()[1])
+        length = None
+        chunked = False
+        keep_alive = True
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            value = value.strip()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding" and "chunked" in value.lower():
+                chunked = True
+            elif name == "connection" and value.lower() == "close":
+                keep_alive = False
+        if chunked:
+            body = bytearray()
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                body += await self.reader.readexactly(size)
+                await self.reader.readexactly(2)
+            body = bytes(body)
+        elif length is not None:
+            body = await self.reader.readexactly(length)
+        else:
+            body = await self.reader.read()
+            keep_alive = False
+        if not keep_alive:
+            self.close()
+        return status, body
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.writer = None
+        self.reader = None
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.bytes = 0
+
+    def record(self, endpoint: str, seconds: float, size: int) -> None:
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        self.bytes += size
+
+    def error(self, endpoint: str) -> None:
+        self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        elapsed = max(elapsed, 1e-9)
+        endpoints = {}
+        total = 0
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies.get(endpoint, []))
+            total += len(samples)
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "errors": self.errors.get(endpoint, 0),
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": _percentile_ms(samples, 0.50),
+                "p99_ms": _percentile_ms(samples, 0.99),
+                "max_ms": round(samples[-1] * 1000, 2) if samples else None,
+            }
+        return {
+            "elapsed": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "rps": round(total / elapsed, 2),
+            "kib_per_s": round(self.bytes / 1024 / elapsed, 1),
+            "endpoints": endpoints,
+        }
+
+
+def _percentile_ms(ordered: List[float], p: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2)
+
+
+class Screen:
+    """One browser tab: a login, a small connection pool and the page pollers."""
+
+    def __init__(self, target, pollers: List[str], refresh: int, stats: Stats):
+        self.host, self.port, self.public_host = target
+        self.pollers = pollers
+        self.refresh = refresh
+        self.stats = stats
+        self.token = None
+        self.pool: asyncio.Queue = asyncio.Queue()
+        for _ in range(MAX_CONNECTIONS_PER_SCREEN):
+            self.pool.put_nowait(Connection(self.host, self.port))
+
+    async def _call(self, method: str, path: str, label: str, body: bytes = b"", headers=None) -> Optional[bytes]:
+        conn = await self.pool.get()
+        headers = dict(headers or {})
+        headers.setdefault("Accept", "application/json")
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        started = time.monotonic()
+        try:
+            status, payload = await conn.request(method, path, headers, body)
+            if status >= 400:
+                self.stats.error(label)
+                return None
+            self.stats.record(label, time.monotonic() - started, len(payload))
+            return payload
+        except (HttpError, OSError, ValueError):
+            self.stats.error(label)
+            return None
+        finally:
+            self.pool.put_nowait(conn)
+
+    async def login(self, username: str, password: str) -> bool:
+        body = urlencode({"username": username, "password": password}).encode()
+        payload = await self._call("POST", "/api/auth/login", "POST /api/auth/login", body,
+                                   {"Content-Type": "application/x-www-form-urlencoded"})
+        if payload is None:
+            return False
+        self.token = json.loads(payload)["access_token"]
+        return True
+
+    async def _poll(self, name: str, deadline: float) -> None:
+        interval, endpoints = POLLERS[name]
+        interval = interval or max(self.refresh, 2)
+        # Pages mount at slightly different moments; don't fire every screen in lockstep.
+        await asyncio.sleep(random.uniform(0, min(interval, max(0.0, deadline - time.monotonic()))))
+        while time.monotonic() < deadline:
+            await asyncio.gather(*[
+                self._call("GET", path.format(host=self.public_host), path) for path in endpoints
+            ])
+            await asyncio.sleep(max(0.0, min(interval, deadline - time.monotonic())))
+
+    async def run(self, deadline: float) -> None:
+        await asyncio.gather(*[self._poll(name, deadline) for name in self.pollers])
+
+    def close(self) -> None:
+        while not self.pool.empty():
+            self.pool.get_nowait().close()
+
+
+async def _backend_stats(target, pid: Optional[int], reset: bool = False) -> Dict[str, Any]:
+    host, port, _ = target
+    conn = Connection(host, port)
+    try:
+        status, payload = await conn.request("GET", f"/api/loadtest/stats?reset={str(reset).lower()}", {})
+        if status == 200:
+            return json.loads(payload)
+    except (HttpError, OSError, ValueError):
+        pass
+    finally:
+        conn.close()
+    return {"pid": pid, "rss": _read_rss(pid) if pid else None, "loop_lag": None}
+
+
+def _read_rss(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+async def run_level(target, screens: int, ops_ratio: float, duration: float, args) -> Dict[str, Any]:
+    stats = Stats()
+    ops_count = round(screens * ops_ratio)
+    clients = [
+        Screen(target, OPS_POLLERS if i < ops_count else HOUSEHOLD_POLLERS,
+               random.choice(DASHBOARD_REFRESH_CHOICES), stats)
+        for i in range(screens)
+    ]
+    logged_in = await asyncio.gather(*[c.login(args.username, args.password) for c in clients])
+    if not all(logged_in):
+        raise SystemExit("login failed; check --username/--password")
+
+    # Logins are a one-off bcrypt burst; keep them out of the steady-state numbers.
+    login_stats = stats.report(duration)["endpoints"]
+    stats.latencies.clear()
+    stats.errors.clear()
+    stats.bytes = 0
+    await _backend_stats(target, args.pid, reset=True)
+    started = time.monotonic()
+    await asyncio.gather(*[c.run(started + duration) for c in clients])
+    report = stats.report(time.monotonic() - started)
+    report["login"] = login_stats.get("POST /api/auth/login")
+    report["screens"] = screens
+    report["ops_screens"] = ops_count
+    report["backend"] = await _backend_stats(target, args.pid)
+    for client in clients:
+        client.close()
+    return report
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    backend = report["backend"]
+    rss = backend.get("rss")
+    lag = backend.get("loop_lag") or {}
+    print(f"\n== {report['screens']} screens ({report['ops_screens']} ops) over {report['elapsed']}s ==")
+    print(f"total {report['requests']} req, {report['errors']} errors, {report['rps']} req/s, {report['kib_per_s']} KiB/s")
+    print(f"backend rss {rss / 1024 / 1024:.1f} MiB" if rss else "backend rss n/a", end="")
+    if lag.get("samples"):
+        print(f", loop lag p50 {lag['p50_ms']}ms p99 {lag['p99_ms']}ms max {lag['max_ms']}ms")
+    else:
+        print(", loop lag n/a")
+    login = report.get("login") or {}
+    if login.get("requests"):
+        print(f"login p50 {login['p50_ms']}ms p99 {login['p99_ms']}ms (excluded from totals)")
+    print(f"{'endpoint':<36}{'req':>7}{'err':>6}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}")
+    for endpoint, row in report["endpoints"].items():
+        print(f"{endpoint:<36}{row['requests']:>7}{row['errors']:>6}{row['rps']:>8}"
+              f"{row['p50_ms'] if row['p50_ms'] is not None else '-':>9}"
+              f"{row['p99_ms'] if row['p99_ms'] is not None else '-':>9}")
+
+
+async def main_async(args) -> List[Dict[str, Any]]:
+    parsed = urlparse(args.url)
+    target = (parsed.hostname, parsed.port or 80, args.public_host or parsed.hostname)
+    reports = []
+    for screens in [int(s) for s in args.screens.split(",") if s.strip()]:
+        report = await run_level(target, screens, args.ops_ratio, args.duration, args)
+        reports.append(report)
+        if not args.json:
+            _print_report(report)
+        p99 = max((r["p99_ms"] or 0) for r in report["endpoints"].values()) if report["endpoints"] else 0
+        if args.max_p99_ms and p99 > args.max_p99_ms:
+            if not args.json:
+                print(f"\nstopping: worst p99 {p99}ms exceeds --max-p99-ms {args.max_p99_ms}")
+            break
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay dashboard polling from many simulated screens")
+    parser.add_argument("--url", default="http://127.0.0.1:8013", help="Backend base URL")
+    parser.add_argument("--screens", default="5", help="Comma separated screen counts to run in sequence")
+    parser.add_argument("--ops-ratio", type=float, default=0.0, help="Fraction of screens with every page open")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per level")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="changeme")
+    parser.add_argument("--public-host", default="", help="Host used in /api/settings/resolved/{host}")
+    parser.add_argument("--pid", type=int, default=None, help="Backend PID for RSS when not using the stub")
+    parser.add_argument("--max-p99-ms", type=float, default=0.0, help="Stop ramping once any endpoint p99 exceeds this")
+    parser.add_argument("--json", action="store_true", help="Print reports as JSON")
+    args = parser.parse_args()
+
+    reports = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
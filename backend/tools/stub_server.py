@@ -0,0 +1,374 @@
+"""Run the real FastAPI app against in-memory Mongo and synthetic collectors.
+
+Used by tools/loadgen.py so load tests can run on a laptop without Docker,
+a modem or MongoDB:
+
+    cd backend
+    python -m tools.stub_server --port 8013 --containers 25 --sms 40
+"""
+import argparse
+import asyncio
+import atexit
+import copy
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+
+import server
+from routes import docker_api, dongle, unavailable, usb
+from utils import collectors, plugins, snapshot
+from utils.auth import get_password_hash, hash_pool
+from utils.cache_store import cache_store
+from utils.collectors import (
+    KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_DISK, KEY_NETWORK, KEY_NETWORK_ADDRS, KEY_SUMMARY,
+    KEY_HISTORY, KEY_STATS, KEY_PROCESSES, KEY_USB, KEY_DOCKER, KEY_DOCKER_HISTORY, KEY_DONGLE, KEY_HEALTH, KEY_SMS_FORWARDER,
+    KEY_LOOP, KEY_THERMAL_HISTORY
+)
+from utils.database import Database
+from utils.history_archive import history_archive
+from utils.loop_monitor import loop_monitor
+from utils.process_metrics import ProcessTracker
+from utils.ratelimit import login_limiter
+from utils.sms_store import SMS_PAGE_SIZE, sms_store, sync_inbox
+from tools.loadgen import _read_rss
+
+LAG_PROBE_INTERVAL = 0.05
+
+
+def _matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    return all(doc.get(k) == v for k, v in (query or {}).items())
+
+
+class _FakeCursor:
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self._docs = docs
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self._docs[:length] if length else list(self._docs)
+
+
+class _FakeCollection:
+    """Just enough of the motor collection API for the routes in this app."""
+
+    def __init__(self):
+        self._docs: List[Dict[str, Any]] = []
+
+    async def find_one(self, query: Optional[Dict[str, Any]] = None):
+        for doc in self._docs:
+            if _matches(doc, query):
+                return copy.deepcopy(doc)
+        return None
+
+    def find(self, query: Optional[Dict[str, Any]] = None) -> _FakeCursor:
+        return _FakeCursor([copy.deepcopy(d) for d in self._docs if _matches(d, query)])
+
+    async def insert_one(self, doc: Dict[str, Any]):
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", f"stub-{len(self._docs) + 1}")
+        self._docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        for doc in self._docs:
+            if _matches(doc, query):
+                doc.update(copy.deepcopy(update.get("$set", {})))
+                return SimpleNamespace(matched_count=1, modified_count=1)
+        if upsert:
+            await self.insert_one({**(query or {}), **update.get("$set", {})})
+        return SimpleNamespace(matched_count=0, modified_count=0)
+
+
+class _FakeDatabase:
+    def __init__(self):
+        self.users = _FakeCollection()
+        self.settings = _FakeCollection()
+
+
+async def _connect_stub_db():
+    Database.db = _FakeDatabase()
+    print("Using in-memory stub database")
+
+
+async def _close_stub_db():
+    Database.db = None
+
+
+def _fake_cpu(t: float) -> Dict[str, Any]:
+    base = 35 + 25 * math.sin(t / 30)
+    cores = [round(max(0.0, min(100.0, base + random.uniform(-15, 15))), 1) for _ in range(4)]
+    return {
+        "overall_usage": round(sum(cores) / len(cores), 1),
+        "per_core_usage": cores,
+        "current_frequency": 1800.0,
+        "load_average": {"1_min": 1.2, "5_min": 0.9, "15_min": 0.7},
+    }
+
+
+def _fake_memory() -> Dict[str, Any]:
+    total = 4 * 1024 ** 3
+    used = int(total * random.uniform(0.4, 0.6))
+    return {
+        "total": total, "used": used, "available": total - used, "percent": round(used / total * 100, 1),
+        "swap_total": 1024 ** 3, "swap_used": 0, "swap_percent": 0.0,
+    }
+
+
+_INTERFACES = ["lo", "eth0", "wlan0", "docker0", "usb0"]
+
+
+def _fake_interfaces() -> Dict[str, Any]:
+    interfaces = [{
+        "name": name,
+        "addresses": [
+            {"type": "IPv4", "address": f"192.168.{i}.10", "netmask": "255.255.255.0"},
+            {"type": "IPv6", "address": f"fe80::{i}:1ff:fe23:4567"},
+        ],
+    } for i, name in enumerate(_INTERFACES)]
+    return {"interfaces": interfaces}
+
+
+def _fake_network(t: float) -> Dict[str, Any]:
+    stats = {name: {
+        "bytes_sent": int(t * 1000 * (i + 1)), "bytes_recv": int(t * 4000 * (i + 1)),
+        "packets_sent": int(t * 10), "packets_recv": int(t * 30),
+    } for i, name in enumerate(_INTERFACES)}
+    return {"stats": stats}
+
+
+def _fake_disk() -> Dict[str, Any]:
+    return {
+        "filesystems": [
+            {"device": "/dev/mmcblk0p2", "mountpoint": "/", "fstype": "ext4",
+             "total": 64 * 1024 ** 3, "used": 20 * 1024 ** 3, "free": 44 * 1024 ** 3, "percent": 31.2},
+            {"device": "/dev/sda1", "mountpoint": "/mnt/media", "fstype": "ext4",
+             "total": 2 * 1024 ** 4, "used": 1024 ** 4, "free": 1024 ** 4, "percent": 50.0},
+            {"device": "/dev/mmcblk0p1", "mountpoint": "/boot/firmware", "fstype": "vfat",
+             "total": 512 * 1024 ** 2, "used": 64 * 1024 ** 2, "free": 448 * 1024 ** 2, "percent": 12.5},
+        ],
+        "io_stats": {"read_bytes": 1, "write_bytes": 1, "read_count": 1, "write_count": 1},
+    }
+
+
+def _fake_containers(count: int) -> Dict[str, Any]:
+    containers = []
+    for i in range(count):
+        running = i % 7 != 0
+        containers.append({
+            "id": f"{i:010x}",
+            "name": f"service-{i}",
+            "image": f"example/service-{i}:latest",
+            "image_size": (80 + 15 * i) * 1024 ** 2,
+            "image_created": "2023-12-01T00:00:00Z",
+            "status": "running" if running else "exited",
+            "state": {
+                "Status": "running" if running else "exited", "Running": running, "Paused": False,
+                "Restarting": False, "OOMKilled": False, "Dead": False, "Pid": 1000 + i,
+                "ExitCode": 0, "Error": "", "StartedAt": "2024-01-01T00:00:00Z",
+                "FinishedAt": "0001-01-01T00:00:00Z",
+            },
+            "ports": {"8080/tcp": [{"HostIp": "0.0.0.0", "HostPort": str(8000 + i)}]},
+            "created": "2024-01-01T00:00:00Z",
+            "stats": {
+                "cpu_percent": round(random.uniform(0, 20), 2), "memory_usage": 50 * 1024 ** 2,
+                "memory_limit": 4 * 1024 ** 3, "memory_percent": 1.2,
+                "network_rx_bytes": int(time.time() * 2000 * (i + 1)), "network_tx_bytes": int(time.time() * 500),
+            } if running else {},
+        })
+    return {"containers": containers}
+
+
+def _fake_inbox(sms_count: int) -> List[Dict[str, Any]]:
+    """Newest first, as the modem lists it."""
+    return [{
+        "index": 40000 + i, "phone": f"+6140000{i:04d}", "content": "Your verification code is 123456. " * 3,
+        "raw_date": f"2024-01-01 10:{59 - i % 60:02d}:00", "timestamp": collectors._now_iso_mel(),
+        "unread": i < 2,
+    } for i in range(sms_count)]
+
+
+def _fake_dongle(sms_counts: Dict[str, Any]) -> Dict[str, Any]:
+    now = collectors._now_iso_mel()
+    return {
+        "signal": {"status": {"rsrp": "-92dBm", "rsrq": "-11dB", "sinr": "8dB"}, "strength": 3, "color": "yellow"},
+        "device": {"DeviceName": "E3372", "Imei": "000000000000000"},
+        "network": {"FullName": "Stub Mobile"},
+        "traffic": {"CurrentDownload": "123456", "CurrentUpload": "65432"},
+        "sms": sms_counts,
+        "connected": True,
+        "timestamp": now,
+    }
+
+
+async def stub_fast(interval: float = 2.0):
+    while True:
+        t = time.time()
+        cpu = _fake_cpu(t)
+        memory = _fake_memory()
+        cpu_temp = round(52.0 + random.uniform(-2, 2), 1)
+        temp = {
+            "cpu_temp": cpu_temp,
+            "unit": "C",
+            "sensors": [
+                {"id": "cpu-thermal", "label": "cpu-thermal", "source": "thermal_zone", "value": cpu_temp},
+                {"id": "rp1_adc/temp1", "label": "rp1_adc temp1", "source": "hwmon", "value": round(cpu_temp - 6, 1)},
+            ],
+            "throttled": {"under_voltage": False, "freq_capped": False, "throttled": False, "soft_temp_limit": False,
+                          "raw": "0x0"},
+        }
+        network = _fake_network(t)
+        disk = cache_store.snapshot(KEY_DISK)["data"] or _fake_disk()
+        summary = collectors._build_summary(cpu, memory, temp, disk, network)
+        collectors._ensure_history_point(summary)
+        collectors._stats.observe(summary)
+        collectors._thermal_history.append(temp, t)
+        collectors._dispatch_alerts(collectors._alerts.observe(summary))
+        cache_store.set_many({
+            KEY_CPU: (cpu, interval * 1.5),
+            KEY_MEMORY: (memory, interval * 1.5),
+            KEY_TEMP: (temp, interval * 2),
+            KEY_NETWORK: (network, interval * 2),
+            KEY_SUMMARY: (summary, interval * 1.5),
+            KEY_HISTORY: (collectors._history.rows(), interval * 2, interval * 8),
+            KEY_STATS: (collectors._stats.snapshot(), interval * 2, interval * 8),
+            KEY_THERMAL_HISTORY: (collectors._thermal_history.columns(), interval * 2, interval * 8),
+            KEY_HEALTH: (collectors._health_payload(), interval * 2),
+            KEY_LOOP: (loop_monitor.snapshot(), interval * 2, interval * 8),
+        })
+        await asyncio.sleep(interval)
+
+
+async def stub_slow(containers: int, sms: int, interval: float = 5.0):
+    usb = {"devices": [{"bus": "001", "device": f"{i:03d}", "vendor_id": "12d1", "product_id": "14dc",
+                        "description": f"Stub USB device {i}"} for i in range(6)]}
+    cache_store.set(KEY_NETWORK_ADDRS, _fake_interfaces(), ttl=600, stale_ttl=1200)
+    # Real process data: it is cheap and keeps the payload size realistic.
+    tracker = ProcessTracker()
+    inbox = _fake_inbox(sms)
+    inbox_counts = {"total": len(inbox), "unread": sum(m["unread"] for m in inbox)}
+
+    def inbox_page(page: int) -> List[Dict[str, Any]]:
+        return inbox[(page - 1) * SMS_PAGE_SIZE:page * SMS_PAGE_SIZE]
+
+    while True:
+        cache_store.set(KEY_PROCESSES, await asyncio.to_thread(tracker.sample), ttl=interval * 1.5, stale_ttl=interval * 4)
+        cache_store.set(KEY_DISK, _fake_disk(), ttl=15, stale_ttl=60)
+        cache_store.set(KEY_USB, usb, ttl=22.5, stale_ttl=90)
+        docker = _fake_containers(containers)
+        history = collectors._container_history
+        for container in docker["containers"]:
+            if container["stats"]:
+                history.record(container["id"], container["name"], container["stats"], time.time())
+        items = {KEY_DOCKER: (docker, interval * 1.5, interval * 4)}
+        if history.commit_due(time.time()):
+            items[KEY_DOCKER_HISTORY] = (history.export(), history.step * 2, history.step * 6)
+        cache_store.set_many(items)
+        await asyncio.to_thread(sync_inbox, sms_store, inbox_page, inbox_counts)
+        cache_store.set(KEY_DONGLE, _fake_dongle(await asyncio.to_thread(sms_store.counts)), ttl=interval * 1.5, stale_ttl=interval * 4)
+        cache_store.set(KEY_SMS_FORWARDER, {"active": False, "configured": False, "last_error": None,
+                                            "last_sent_at": None, "last_forwarded_sms": None}, ttl=interval * 2)
+        await asyncio.sleep(interval)
+
+
+class LagProbe:
+    """Measures how late the event loop wakes up from a short sleep."""
+
+    def __init__(self, interval: float = LAG_PROBE_INTERVAL, keep: int = 4096):
+        self.interval = interval
+        self.keep = keep
+        self.samples: List[float] = []
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - started - self.interval
+            self.samples.append(max(lag, 0.0))
+            if len(self.samples) > self.keep:
+                del self.samples[:len(self.samples) - self.keep]
+
+    def reset(self) -> None:
+        self.samples = []
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"samples": 0, "p50_ms": None, "p99_ms": None, "max_ms": None}
+
+        def pct(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2)
+
+        return {"samples": len(ordered), "p50_ms": pct(0.50), "p99_ms": pct(0.99), "max_ms": round(ordered[-1] * 1000, 2)}
+
+
+def install(containers: int, sms: int) -> LagProbe:
+    """Swap the app's Mongo connection and collectors for in-process stubs."""
+    probe = LagProbe()
+
+    async def start_stub_collectors():
+        return [
+            asyncio.create_task(stub_fast()),
+            asyncio.create_task(stub_slow(containers, sms)),
+            asyncio.create_task(probe.run()),
+        ]
+
+    sms_store.path = ":memory:"
+    # Keep the fake cache and history out of the real data directory.
+    state_dir = tempfile.mkdtemp(prefix="statlog-stub-")
+    atexit.register(shutil.rmtree, state_dir, ignore_errors=True)
+    snapshot.SNAPSHOT_PATH = os.path.join(state_dir, "statlog-snapshot.json.gz")
+    history_archive.close()
+    history_archive.directory = os.path.join(state_dir, "history-archive")
+    # Every synthetic tab logs in from the same address in one burst.
+    login_limiter.attempts.limit = max(login_limiter.attempts.limit, 10000)
+    hash_pool.queue_limit = max(hash_pool.queue_limit, 10000)
+
+    # The stub fakes every integration, so swap any "not available" stand-ins for the real routes.
+    server.app.router.routes[:] = [
+        route for route in server.app.router.routes
+        if getattr(route, "endpoint", None) is None or route.endpoint.__module__ != unavailable.__name__
+    ]
+    mounted = {plugin.router for plugin in plugins.active()}
+    for module_name, module in (("routes.usb", usb), ("routes.docker_api", docker_api), ("routes.dongle", dongle)):
+        if module_name not in mounted:
+            server.app.include_router(module.router)
+
+    server.connect_to_mongo = _connect_stub_db
+    server.close_mongo_connection = _close_stub_db
+    server.start_collectors = start_stub_collectors
+
+    async def loadtest_stats(reset: bool = False):
+        stats = {"pid": os.getpid(), "rss": _read_rss(os.getpid()), "loop_lag": probe.summary()}
+        if reset:
+            probe.reset()
+        return stats
+
+    server.app.add_api_route("/api/loadtest/stats", loadtest_stats, methods=["GET"], tags=["loadtest"])
+    return probe
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the backend with stubbed collectors and database")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8013)
+    parser.add_argument("--containers", type=int, default=20, help="Synthetic Docker containers")
+    parser.add_argument("--sms", type=int, default=30, help="Synthetic SMS messages in the dongle inbox")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DEFAULT_ADMIN_USERNAME", "admin")
+    os.environ.setdefault("DEFAULT_ADMIN_PASSWORD", "changeme")
+    # Hash once up front so the first login is not skewed by lazy backend init.
+    get_password_hash("warmup")
+    install(args.containers, args.sms)
+    uvicorn.run(server.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
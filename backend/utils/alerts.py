@@ -0,0 +1,203 @@
+"""Streaming alert rules evaluated on every metrics summary.
+
+Each rule costs O(1) amortised per sample: instantaneous rules compare the
+sample directly, windowed rules push it into a SlidingWindow and compare the
+window's avg/min/max. An alert fires when the value reaches the threshold and
+only clears once it is ``hysteresis`` back on the other side, so a value
+hovering around the threshold does not flap.
+"""
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+from models.settings import AlertRule, AppSettings
+from utils.rolling import SlidingWindow
+
+logger = logging.getLogger(__name__)
+
+MEL_TZ = ZoneInfo("Australia/Melbourne")
+
+METRIC_PATHS = {
+    "cpu": ("cpu", "overall_usage"),
+    "memory": ("memory", "percent"),
+    "temp": ("temperature", "cpu_temp"),
+}
+SEVERITY_RANK = {"warning": 1, "critical": 2}
+RECENT_TRANSITIONS = 20
+
+
+def default_rules(settings: Dict[str, Any]) -> List[AlertRule]:
+    """The four threshold fields from AppSettings expressed as rules.
+
+    They email, so they compare averages: a single busy sample (a build, a
+    backup starting) should not page anyone.
+    """
+    defaults = AppSettings()
+
+    def threshold(field: str) -> float:
+        return settings.get(field) or getattr(defaults, field)
+
+    return [
+        AlertRule(id="default-temp-critical", name="CPU temperature critical", metric="temp",
+                  threshold=threshold("temperature_critical_threshold"), window=30, severity="critical"),
+        AlertRule(id="default-temp-warning", name="CPU temperature high", metric="temp",
+                  threshold=threshold("temperature_warning_threshold"), window=30),
+        AlertRule(id="default-cpu-critical", name="CPU usage critical", metric="cpu",
+                  threshold=threshold("cpu_critical_threshold"), window=120, severity="critical"),
+        AlertRule(id="default-cpu-warning", name="CPU usage high", metric="cpu",
+                  threshold=threshold("cpu_warning_threshold"), window=120),
+    ]
+
+
+def load_rules(settings: Optional[Dict[str, Any]]) -> List[AlertRule]:
+    settings = settings or {}
+    raw_rules = settings.get("alert_rules")
+    if not raw_rules:
+        return default_rules(settings)
+    rules = []
+    for raw in raw_rules:
+        try:
+            rules.append(AlertRule(**raw))
+        except Exception as e:
+            logger.warning(f"ignoring invalid alert rule {raw!r}: {e}")
+    return rules
+
+
+def _metric_value(summary: Dict[str, Any], metric: str) -> Optional[float]:
+    value: Any = summary
+    for part in METRIC_PATHS.get(metric) or metric.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value if isinstance(value, (int, float)) else None
+
+
+class _RuleState:
+    __slots__ = ("rule", "window", "firing", "since", "value", "last_notified", "notified_firing")
+
+    def __init__(self, rule: AlertRule):
+        self.rule = rule
+        self.window = SlidingWindow(rule.window) if rule.window > 0 else None
+        self.firing = False
+        self.since: Optional[str] = None
+        self.value: Optional[float] = None
+        self.last_notified = float("-inf")
+        self.notified_firing = False
+
+    def aggregate(self, ts: float, value: float) -> Optional[float]:
+        if self.window is None:
+            return value
+        self.window.push(ts, value)
+        if not self.window.saturated:
+            # "for 2 min" needs 2 minutes of samples before it can fire.
+            return None
+        return {"avg": self.window.mean, "min": self.window.min, "max": self.window.max}[self.rule.aggregate]
+
+    def crosses(self, value: float) -> bool:
+        rule = self.rule
+        if rule.condition == "above":
+            return value >= rule.threshold if not self.firing else value > rule.threshold - rule.hysteresis
+        return value <= rule.threshold if not self.firing else value < rule.threshold + rule.hysteresis
+
+
+class AlertEngine:
+    def __init__(self, rules: Optional[Iterable[AlertRule]] = None):
+        self._states: Dict[str, _RuleState] = {}
+        self.recent: deque = deque(maxlen=RECENT_TRANSITIONS)
+        self.configure(rules if rules is not None else default_rules({}))
+
+    def configure(self, rules: Iterable[AlertRule]) -> None:
+        """Swap in a new rule set, keeping window and firing state of unchanged rules."""
+        states = {}
+        for rule in rules:
+            if not rule.enabled:
+                continue
+            current = self._states.get(rule.id)
+            states[rule.id] = current if current and current.rule == rule else _RuleState(rule)
+        self._states = states
+
+    def observe(self, summary: Dict[str, Any], ts: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Feed one summary sample; returns the state transitions it caused."""
+        ts = ts if ts is not None else time.time()
+        transitions = []
+        for state in self._states.values():
+            value = _metric_value(summary, state.rule.metric)
+            if value is None:
+                continue
+            value = state.aggregate(ts, value)
+            if value is None:
+                continue
+            state.value = value
+            firing = state.crosses(value)
+            if firing == state.firing:
+                continue
+            state.firing = firing
+            at = datetime.fromtimestamp(ts, MEL_TZ).isoformat()
+            state.since = at if firing else None
+            transition = {
+                "rule_id": state.rule.id,
+                "name": state.rule.name,
+                "severity": state.rule.severity,
+                "state": "firing" if firing else "resolved",
+                "value": round(value, 2),
+                "threshold": state.rule.threshold,
+                "at": at,
+            }
+            transitions.append(transition)
+            self.recent.append(transition)
+        return transitions
+
+    def status(self) -> str:
+        rank = max((SEVERITY_RANK[s.rule.severity] for s in self._states.values() if s.firing), default=0)
+        return {0: "healthy", 1: "warning", 2: "critical"}[rank]
+
+    def active(self) -> List[Dict[str, Any]]:
+        return [{
+            "rule_id": s.rule.id,
+            "name": s.rule.name,
+            "severity": s.rule.severity,
+            "metric": s.rule.metric,
+            "value": round(s.value, 2) if s.value is not None else None,
+            "threshold": s.rule.threshold,
+            "since": s.since,
+        } for s in self._states.values() if s.firing]
+
+    def to_notify(self, transitions: List[Dict[str, Any]], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Transitions that should be emailed, honouring each rule's silence period.
+
+        A resolve is only sent if the matching firing notification was.
+        """
+        now = now if now is not None else time.time()
+        selected = []
+        for transition in transitions:
+            state = self._states.get(transition["rule_id"])
+            if not state or not state.rule.notify:
+                continue
+            if transition["state"] == "firing":
+                if now - state.last_notified < state.rule.silence:
+                    continue
+                state.last_notified = now
+                state.notified_firing = True
+            elif not state.notified_firing:
+                continue
+            else:
+                state.notified_firing = False
+            selected.append(transition)
+        return selected
+
+
+def format_notification(transitions: List[Dict[str, Any]]) -> Dict[str, str]:
+    first = transitions[0]
+    if len(transitions) == 1:
+        verb = "FIRING" if first["state"] == "firing" else "resolved"
+        subject = f"[{first['severity'].upper()}] {first['name']} {verb}"
+    else:
+        subject = f"{len(transitions)} alert changes"
+    lines = [
+        f"{t['at']}  {t['state'].upper():8}  {t['name']}: {t['value']} (threshold {t['threshold']})"
+        for t in transitions
+    ]
+    return {"subject": subject, "body": "\n".join(lines)}
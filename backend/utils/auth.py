@@ -1,13 +1,30 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
+import asyncio
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Changing the cost rehashes each stored password (up or down) at its next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt releases the GIL, so each worker is one core's worth of hashing.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "1"))
+# Hashes waiting for a worker beyond this are refused instead of piling up.
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "8"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-this")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
@@ -19,6 +36,87 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+
+class PasswordHashPool:
+    """Runs bcrypt on a small dedicated thread pool so it never stalls the event loop."""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_limit: int = PASSWORD_HASH_QUEUE):
+        self.workers = max(1, workers)
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    def _call(self, submitted: float, fn, args):
+        started = time.monotonic()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            wait = started - submitted
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._run_total += time.monotonic() - started
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._queued >= self.queue_limit:
+                self._rejected += 1
+                raise PasswordPoolBusy("Password hashing queue is full")
+            self._queued += 1
+        future = self._executor.submit(self._call, time.monotonic(), fn, args)
+        future.add_done_callback(self._forget_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _forget_cancelled(self, future) -> None:
+        # A caller that went away before a worker picked the job up never reaches _call.
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "rounds": BCRYPT_ROUNDS,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_total / completed * 1000, 2) if completed else None,
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+                "avg_hash_ms": round(self._run_total / completed * 1000, 2) if completed else None,
+            }
+
+
+hash_pool = PasswordHashPool()
+
+
+async def hash_password(password: str) -> str:
+    return await hash_pool.run(pwd_context.hash, password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify off the event loop; the second item is a replacement hash when the cost changed."""
+    return await hash_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -1,13 +1,24 @@
+import os
 import time
 import threading
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 class CacheEntry:
-    def __init__(self, data: Any, ttl: float, stale_ttl: Optional[float] = None):
+    __slots__ = ("data", "ttl", "stale_ttl", "updated_at", "generation")
+
+    def __init__(
+        self,
+        data: Any,
+        ttl: float,
+        stale_ttl: Optional[float] = None,
+        updated_at: Optional[float] = None,
+        generation: int = 0,
+    ):
         self.data = data
         self.ttl = ttl
         self.stale_ttl = stale_ttl if stale_ttl is not None else ttl * 3
-        self.updated_at = time.time()
+        self.updated_at = updated_at if updated_at is not None else time.time()
+        self.generation = generation
 
     def meta(self) -> Dict[str, Any]:
         age = time.time() - self.updated_at
@@ -20,25 +31,84 @@ class CacheEntry:
             "updated_at": self.updated_at,
             "ttl": self.ttl,
             "stale_ttl": self.stale_ttl,
+            "generation": self.generation,
         }
 
+# (data, ttl), (data, ttl, stale_ttl) or (data, ttl, stale_ttl, updated_at),
+# as accepted by CacheStore.set_many
+CacheItem = Tuple[Any, ...]
+
+def _empty_snapshot() -> Dict[str, Any]:
+    return {"data": None, "meta": {"stale": True, "expired": True, "age": None}}
+
 class CacheStore:
+    """Copy-on-write key/value cache shared by collectors and routes.
+
+    Writers build a new dict and swap the reference, so ``_data`` is never
+    mutated once published. Readers just load the current reference: no lock,
+    and every key read from one reference belongs to the same generation.
+    """
+
     def __init__(self):
         self._data: Dict[str, CacheEntry] = {}
-        self._lock = threading.Lock()
+        self._generation = 0
+        self._write_lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
 
     def set(self, key: str, data: Any, ttl: float, stale_ttl: Optional[float] = None) -> None:
-        with self._lock:
-            self._data[key] = CacheEntry(data, ttl=ttl, stale_ttl=stale_ttl)
+        self.set_many({key: (data, ttl, stale_ttl)})
+
+    def set_many(self, items: Dict[str, CacheItem]) -> int:
+        """Publish several keys at once; readers see all of them or none."""
+        now = time.time()
+        with self._write_lock:
+            generation = self._generation + 1
+            data = dict(self._data)
+            for key, item in items.items():
+                value, ttl = item[0], item[1]
+                stale_ttl = item[2] if len(item) > 2 else None
+                updated_at = item[3] if len(item) > 3 and item[3] is not None else now
+                data[key] = CacheEntry(value, ttl=ttl, stale_ttl=stale_ttl, updated_at=updated_at, generation=generation)
+            self._data = data
+            self._generation = generation
+        return generation
 
     def get(self, key: str) -> Optional[CacheEntry]:
-        with self._lock:
-            return self._data.get(key)
+        return self._data.get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[CacheEntry]]:
+        data = self._data
+        return {key: data.get(key) for key in keys}
+
+    def entries(self) -> Dict[str, CacheEntry]:
+        """Every locally published entry, as of one generation."""
+        return self._data
 
     def snapshot(self, key: str) -> Dict[str, Any]:
         entry = self.get(key)
         if not entry:
-            return {"data": None, "meta": {"stale": True, "expired": True, "age": None}}
+            return _empty_snapshot()
         return {"data": entry.data, "meta": entry.meta()}
 
-cache_store = CacheStore()
+    def snapshot_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for key, entry in self.get_many(keys).items():
+            result[key] = {"data": entry.data, "meta": entry.meta()} if entry else _empty_snapshot()
+        return result
+
+# Set by collector.py ("writer") and by uvicorn workers started alongside it
+# ("reader"); unset means collectors run inside the API process as before.
+SHM_ROLE = os.getenv("CACHE_SHM_ROLE", "").lower()
+
+
+def _create_store() -> CacheStore:
+    if SHM_ROLE in ("writer", "reader"):
+        from utils.shm_cache import SharedCacheStore
+        return SharedCacheStore(role=SHM_ROLE)
+    return CacheStore()
+
+
+cache_store = _create_store()
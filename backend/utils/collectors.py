@@ -1,51 +1,62 @@
 import asyncio
 import time
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional
 from zoneinfo import ZoneInfo
 from datetime import datetime
 
-from utils.cache_store import cache_store
+from utils.alerts import METRIC_PATHS, AlertEngine, format_notification, load_rules
+from utils.cache_store import SHM_ROLE, cache_store
+from utils.container_history import ContainerHistory
+from utils.history import HISTORY_SERIES, MetricHistory
+from utils.history_archive import history_archive
+from utils.image_cache import ImageCache
+from utils.loop_monitor import loop_monitor
 from utils import system_metrics
+from utils.netlink import AddressWatcher
+from utils.process_metrics import ProcessTracker
+from utils.shm_cache import send_to_writer, serve_writer_requests
+from utils.thermal import ThermalHistory
 from utils.usb_metrics import parse_lsusb
+from utils.window_stats import WindowStats
 from utils.database import get_database
 from utils.smtp_mailer import smtp_is_configured, send_email_sync
+from utils.sms_store import SMS_PAGE_SIZE, sms_store, sync_inbox
 
 import os
 import logging
 
-try:
-    import docker
-    DOCKER_AVAILABLE = True
-except Exception:
-    DOCKER_AVAILABLE = False
-
-try:
-    from huawei_lte_api.Client import Client
-    from huawei_lte_api.Connection import Connection
-    from huawei_lte_api.enums.sms import BoxTypeEnum
-    HUAWEI_API_AVAILABLE = True
-except Exception:
-    HUAWEI_API_AVAILABLE = False
-
 logger = logging.getLogger(__name__)
 
 # Cache keys
 KEY_CPU = "metrics.cpu"
 KEY_MEMORY = "metrics.memory"
 KEY_TEMP = "metrics.temperature"
+KEY_THERMAL_HISTORY = "metrics.temperature.history"
 KEY_DISK = "metrics.disk"
 KEY_NETWORK = "metrics.network"
+KEY_NETWORK_ADDRS = "metrics.network.interfaces"
 KEY_SUMMARY = "metrics.summary"
+KEY_PROCESSES = "metrics.processes"
 KEY_HISTORY = "metrics.history"
+KEY_STATS = "metrics.stats"
 KEY_USB = "usb.devices"
 KEY_DOCKER = "docker.containers"
+KEY_DOCKER_HISTORY = "docker.history"
 KEY_DONGLE = "dongle.status"
 KEY_HEALTH = "health.status"
 KEY_SMS_FORWARDER = "dongle.sms_forwarder"
+KEY_LOOP = "runtime.loop"
 
 MEL_TZ = ZoneInfo("Australia/Melbourne")
 
-_history: List[Dict[str, Any]] = []
+_history = MetricHistory()
+_alerts = AlertEngine()
+_stats = WindowStats()
+_thermal_history = ThermalHistory()
+_container_history = ContainerHistory()
+_image_cache = ImageCache()
+# Fire-and-forget notification tasks, referenced so they are not collected early.
+_background_tasks = set()
 
 
 def _now_iso_mel() -> str:
@@ -64,25 +75,14 @@ def _build_summary(cpu, memory, temp, disk, network) -> Dict[str, Any]:
 
 
 def _ensure_history_point(summary: Dict[str, Any]) -> None:
-    global _history
-    ts = datetime.now(MEL_TZ)
-    point = {
-        "ts": ts.isoformat(),
-        "time": ts.strftime("%H:%M:%S"),
-        "cpu": summary["cpu"].get("overall_usage", 0),
-        "memory": summary["memory"].get("percent", 0),
-        "temp": summary["temperature"].get("cpu_temp", 0),
-    }
-    _history.append(point)
-    # Keep last 15 minutes at ~2s cadence (450 points)
-    if len(_history) > 450:
-        _history = _history[-450:]
+    point = _history.append_summary(summary)
+    history_archive.append(time.time(), {name: point[name] for name in HISTORY_SERIES})
 
 
 def _get_docker_client():
-    if not DOCKER_AVAILABLE:
-        return None
+    # Imported here so hosts without the docker plugin never load the SDK.
     try:
+        import docker
         return docker.from_env()
     except Exception:
         return None
@@ -101,11 +101,15 @@ def _container_stats(container) -> Dict[str, Any]:
         mem_limit = stats['memory_stats'].get('limit', 1)
         mem_percent = (mem_usage / mem_limit) * 100 if mem_limit > 0 else 0
 
+        networks = (stats.get('networks') or {}).values()
+
         return {
             "cpu_percent": round(cpu_percent, 2),
             "memory_usage": mem_usage,
             "memory_limit": mem_limit,
-            "memory_percent": round(mem_percent, 2)
+            "memory_percent": round(mem_percent, 2),
+            "network_rx_bytes": sum(n.get('rx_bytes', 0) for n in networks),
+            "network_tx_bytes": sum(n.get('tx_bytes', 0) for n in networks),
         }
     except Exception as e:
         return {"error": str(e)}
@@ -166,22 +170,62 @@ async def collect_fast(interval: float = 2.0):
             cpu = system_metrics.get_cpu_metrics()
             memory = system_metrics.get_memory_metrics()
             temp = system_metrics.get_temperature()
-            network = system_metrics.get_network_metrics()
+            network = system_metrics.get_network_counters()
             disk = cache_store.snapshot(KEY_DISK)["data"] or {"filesystems": [], "io_stats": {}}
 
-            cache_store.set(KEY_CPU, cpu, ttl=interval * 1.5)
-            cache_store.set(KEY_MEMORY, memory, ttl=interval * 1.5)
-            cache_store.set(KEY_TEMP, temp, ttl=interval * 2)
-            cache_store.set(KEY_NETWORK, network, ttl=interval * 2)
-            cache_store.set(KEY_SUMMARY, _build_summary(cpu, memory, temp, disk, network), ttl=interval * 1.5)
-
-            _ensure_history_point(cache_store.snapshot(KEY_SUMMARY)["data"])
-            cache_store.set(KEY_HISTORY, list(_history), ttl=interval * 2, stale_ttl=interval * 8)
+            summary = _build_summary(cpu, memory, temp, disk, network)
+            _ensure_history_point(summary)
+            _stats.observe(summary)
+            _thermal_history.append(temp, time.time())
+            _dispatch_alerts(_alerts.observe(summary))
+
+            # One generation, so the summary always matches the individual keys.
+            cache_store.set_many({
+                KEY_CPU: (cpu, interval * 1.5),
+                KEY_MEMORY: (memory, interval * 1.5),
+                KEY_TEMP: (temp, interval * 2),
+                KEY_NETWORK: (network, interval * 2),
+                KEY_SUMMARY: (summary, interval * 1.5),
+                KEY_HISTORY: (_history.rows(), interval * 2, interval * 8),
+                KEY_STATS: (_stats.snapshot(), interval * 2, interval * 8),
+                KEY_THERMAL_HISTORY: (_thermal_history.columns(), interval * 2, interval * 8),
+                KEY_HEALTH: (_health_payload(), interval * 2),
+                KEY_LOOP: (loop_monitor.snapshot(), interval * 2, interval * 8),
+            })
         except Exception as e:
             logger.error(f"fast collector error: {e}")
         await asyncio.sleep(interval)
 
 
+async def collect_interfaces(poll_interval: float = 300.0, settle: float = 0.5):
+    """Interface addresses, re-read only on rtnetlink changes or a slow poll."""
+    await asyncio.sleep(0.15)
+    watcher = AddressWatcher()
+    watcher.start()
+    try:
+        while True:
+            try:
+                interfaces = await asyncio.to_thread(system_metrics.get_network_interfaces)
+                cache_store.set(KEY_NETWORK_ADDRS, interfaces, ttl=poll_interval * 2, stale_ttl=poll_interval * 4)
+            except Exception as e:
+                logger.error(f"interfaces collector error: {e}")
+            await watcher.wait(poll_interval, settle)
+    finally:
+        watcher.stop()
+
+
+async def collect_processes(interval: float = 5.0):
+    await asyncio.sleep(0.25)
+    tracker = ProcessTracker()
+    while True:
+        try:
+            processes = await asyncio.to_thread(tracker.sample)
+            cache_store.set(KEY_PROCESSES, processes, ttl=interval * 1.5, stale_ttl=interval * 4)
+        except Exception as e:
+            logger.error(f"processes collector error: {e}")
+        await asyncio.sleep(interval)
+
+
 async def collect_disk(interval: float = 10.0):
     await asyncio.sleep(0.2)
     while True:
@@ -204,6 +248,67 @@ async def collect_usb(interval: float = 15.0):
         await asyncio.sleep(interval)
 
 
+def _container_info(container, image: Dict[str, Any]) -> Dict[str, Any]:
+    # container.image would inspect the image on every access; ``image`` comes from _image_cache.
+    return {
+        "id": container.short_id,
+        "name": container.name,
+        "image": image["tags"][0] if image["tags"] else image["short_id"],
+        "image_size": image["size"],
+        "image_created": image["created"],
+        "status": container.status,
+        "state": container.attrs['State'],
+        "ports": container.ports,
+        "created": container.attrs['Created'],
+    }
+
+
+def inspect_container(container_id: str) -> Dict[str, Any]:
+    """Fresh list entry for one container, stats included; blocking, run it in a thread."""
+    client = _get_docker_client()
+    if client is None:
+        raise RuntimeError("Docker not available")
+    container = client.containers.get(container_id)
+    info = _container_info(container, _image_cache.lookup(client, container.attrs['Image']))
+    info['stats'] = _container_stats(container) if container.status == 'running' else {}
+    return info
+
+
+def publish_container(info: Dict[str, Any]) -> None:
+    """Replace one container's entry in KEY_DOCKER without waiting for the next full scan."""
+    if SHM_ROLE == "reader":
+        # Only the collector process can write the shared cache; use refresh_container.
+        return
+    entry = cache_store.get(KEY_DOCKER)
+    if entry is None or not isinstance(entry.data, dict):
+        return
+    containers = list(entry.data.get("containers", []))
+    index = next((i for i, c in enumerate(containers) if c["id"] == info["id"]), None)
+    if index is None:
+        containers.append(info)
+    else:
+        containers[index] = info
+    # Keep the list's own timestamp: the other entries are no fresher than before.
+    cache_store.set_many({KEY_DOCKER: ({**entry.data, "containers": containers}, entry.ttl, entry.stale_ttl, entry.updated_at)})
+
+
+async def refresh_container(container_id: str) -> None:
+    """Re-inspect one container and publish it now, from whichever process owns the cache."""
+    if SHM_ROLE == "reader":
+        send_to_writer({"refresh": "container", "id": container_id})
+        return
+    publish_container(await asyncio.to_thread(inspect_container, container_id))
+
+
+async def handle_writer_request(message: Dict[str, Any]) -> None:
+    """Requests API workers forward to the collector process (see send_to_writer)."""
+    if message.get("refresh") == "container" and isinstance(message.get("id"), str):
+        try:
+            await refresh_container(message["id"])
+        except Exception as e:
+            logger.warning(f"requested refresh of container {message['id']} failed: {e}")
+
+
 async def collect_docker(interval: float = 5.0):
     await asyncio.sleep(0.4)
     while True:
@@ -213,54 +318,116 @@ async def collect_docker(interval: float = 5.0):
                 cache_store.set(KEY_DOCKER, {"containers": [], "error": "Docker not available"}, ttl=interval * 2)
             else:
                 containers = await asyncio.to_thread(client.containers.list, all=True)
+                _image_cache.watch(client)
                 container_list = []
                 for container in containers:
-                    container_info = {
-                        "id": container.short_id,
-                        "name": container.name,
-                        "image": container.image.tags[0] if container.image.tags else container.image.short_id,
-                        "status": container.status,
-                        "state": container.attrs['State'],
-                        "ports": container.ports,
-                        "created": container.attrs['Created'],
-                    }
+                    image_id = container.attrs['Image']
+                    image = _image_cache.get(image_id) or await asyncio.to_thread(_image_cache.lookup, client, image_id)
+                    container_info = _container_info(container, image)
                     if container.status == 'running':
                         container_info['stats'] = await asyncio.to_thread(_container_stats, container)
+                        _container_history.record(container.short_id, container.name, container_info['stats'], time.time())
                     else:
                         container_info['stats'] = {}
                     container_list.append(container_info)
 
-                cache_store.set(KEY_DOCKER, {"containers": container_list}, ttl=interval * 1.5, stale_ttl=interval * 4)
+                items = {KEY_DOCKER: ({"containers": container_list}, interval * 1.5, interval * 4)}
+                pruned = _container_history.prune(c["id"] for c in container_list)
+                _image_cache.prune(c.attrs['Image'] for c in containers)
+                if _container_history.commit_due(time.time()) or pruned:
+                    step = _container_history.step
+                    items[KEY_DOCKER_HISTORY] = (_container_history.export(), step * 2, step * 6)
+                cache_store.set_many(items)
         except Exception as e:
             logger.error(f"docker collector error: {e}")
         await asyncio.sleep(interval)
 
 
-async def collect_health(interval: float = 5.0):
-    await asyncio.sleep(0.5)
+def _health_payload() -> Dict[str, Any]:
+    return {
+        "status": _alerts.status(),
+        "timestamp": _now_iso_mel(),
+        "alerts": _alerts.active(),
+        "recent": list(_alerts.recent),
+    }
+
+
+def _dispatch_alerts(transitions: List[Dict[str, Any]]) -> None:
+    for transition in transitions:
+        logger.warning(f"alert {transition['state']}: {transition['name']} ({transition['value']})")
+    selected = _alerts.to_notify(transitions)
+    if selected:
+        task = asyncio.create_task(_send_alert_email(selected))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+async def _send_alert_email(transitions: List[Dict[str, Any]]) -> None:
+    db = get_database()
+    if db is None:
+        return
+    try:
+        settings = await db.settings.find_one() or {}
+        smtp = settings.get("smtp_settings") or {}
+        configured, reason = smtp_is_configured(smtp)
+        if not configured:
+            logger.info(f"alert email skipped: {reason}")
+            return
+        message = format_notification(transitions)
+        await asyncio.to_thread(send_email_sync, smtp, message["subject"], message["body"])
+    except Exception as e:
+        logger.error(f"alert email failed: {e}")
+
+
+async def collect_health(interval: float = 30.0):
+    """Reload alert rules from settings; they are evaluated per sample in collect_fast."""
     while True:
         try:
-            # Basic health summary based on temperature and cpu
-            summary = cache_store.snapshot(KEY_SUMMARY)["data"]
-            status = "healthy"
-            if summary:
-                temp = summary.get("temperature", {}).get("cpu_temp", 0)
-                cpu = summary.get("cpu", {}).get("overall_usage", 0)
-                if temp >= 80 or cpu >= 95:
-                    status = "critical"
-                elif temp >= 70 or cpu >= 85:
-                    status = "warning"
-            cache_store.set(KEY_HEALTH, {"status": status, "timestamp": _now_iso_mel()}, ttl=interval * 2)
+            db = get_database()
+            settings = await db.settings.find_one() if db is not None else None
+            _alerts.configure(load_rules(settings))
         except Exception as e:
             logger.error(f"health collector error: {e}")
         await asyncio.sleep(interval)
 
 
+def _sms_page(client, box_type, page: int) -> List[Dict[str, Any]]:
+    listing = client.sms.get_sms_list(page=page, box_type=box_type, read_count=SMS_PAGE_SIZE)
+    raw_messages = (listing.get('Messages') or {}).get('Message') or []
+    if not isinstance(raw_messages, list):
+        raw_messages = [raw_messages]
+    return [{
+        "index": int(message.get('Index')),
+        "phone": message.get('Phone'),
+        "content": message.get('Content'),
+        "raw_date": message.get('Date'),
+        "timestamp": _parse_timestamp_local(message.get('Date')),
+        "unread": message.get('Smstat') == '0',
+    } for message in raw_messages]
+
+
+def _sync_sms(client, box_type) -> Dict[str, Any]:
+    """Sync the modem inbox into the local SMS store (blocking)."""
+    try:
+        count = client.sms.sms_count()
+        modem_counts = {"total": int(count.get('LocalInbox', 0)), "unread": int(count.get('LocalUnread', 0))}
+    except Exception:
+        modem_counts = None
+    return sync_inbox(sms_store, lambda page: _sms_page(client, box_type, page), modem_counts)
+
+
 async def collect_dongle(interval: float = 5.0):
     await asyncio.sleep(0.6)
+    try:
+        from huawei_lte_api.Client import Client
+        from huawei_lte_api.Connection import Connection
+        from huawei_lte_api.enums.sms import BoxTypeEnum
+        huawei_api_available = True
+    except Exception:
+        huawei_api_available = False
     while True:
         try:
-            if not HUAWEI_API_AVAILABLE:
+            if not huawei_api_available:
                 cache_store.set(KEY_DONGLE, {"error": "Huawei LTE API not available", "connected": False}, ttl=interval * 2)
                 cache_store.set(KEY_SMS_FORWARDER, {
                     "active": False,
@@ -291,7 +458,6 @@ async def collect_dongle(interval: float = 5.0):
                 except Exception:
                     traffic = {}
 
-                messages = []
                 sent_count = 0
                 prev_status = cache_store.snapshot(KEY_SMS_FORWARDER).get("data") or {}
                 forward_status = {
@@ -309,71 +475,60 @@ async def collect_dongle(interval: float = 5.0):
                 if not configured:
                     forward_status["last_error"] = cfg_reason
                 try:
-                    sms_list = client.sms.get_sms_list(box_type=BoxTypeEnum.LOCAL_INBOX)
-                    if 'Messages' in sms_list and 'Message' in sms_list['Messages']:
-                        raw_messages = sms_list['Messages']['Message']
-                        if not isinstance(raw_messages, list):
-                            raw_messages = [raw_messages]
-                        for message in raw_messages:
-                            is_unread = message.get('Smstat') == '0'
-                            raw_ts = message.get('Date')
-                            local_ts = _parse_timestamp_local(raw_ts)
-                            messages.append({
-                                "index": message.get('Index'),
-                                "timestamp": local_ts or raw_ts,
-                                "raw_timestamp": raw_ts,
-                                "from": message.get('Phone'),
-                                "message": message.get('Content'),
-                                "unread": is_unread
-                            })
-                            if is_unread and configured:
-                                subject = f"New SMS from {message.get('Phone', 'Unknown')}"
-                                body = (
-                                    f"From: {message.get('Phone', '')}\n"
-                                    f"Time: {local_ts or raw_ts}\n\n"
-                                    f"{message.get('Content', '')}"
-                                )
-                                try:
-                                    await asyncio.to_thread(send_email_sync, smtp, subject, body)
-                                    sent_count += 1
-                                    forward_status["active"] = True
-                                    forward_status["last_sent_at"] = _now_iso_mel()
-                                    content = (message.get('Content') or '').strip()
-                                    preview = content[:80] + ("..." if len(content) > 80 else "")
-                                    forward_status["last_forwarded_sms"] = {
-                                        "from": message.get('Phone'),
-                                        "timestamp": local_ts or raw_ts,
-                                        "preview": preview
-                                    }
-                                    # Mark forwarded message as read to avoid duplicate forwards.
-                                    try:
-                                        client.sms.set_read(message.get('Index'))
-                                    except Exception:
-                                        pass
-                                except Exception as e:
-                                    forward_status["last_error"] = str(e)
+                    await asyncio.to_thread(_sync_sms, client, BoxTypeEnum.LOCAL_INBOX)
+                    # Each message is forwarded once, then marked read on the modem.
+                    pending = await asyncio.to_thread(sms_store.pending_forward) if configured else []
+                    for message in pending:
+                        subject = f"New SMS from {message['from'] or 'Unknown'}"
+                        body = (
+                            f"From: {message['from'] or ''}\n"
+                            f"Time: {message['timestamp']}\n\n"
+                            f"{message['message'] or ''}"
+                        )
+                        try:
+                            await asyncio.to_thread(send_email_sync, smtp, subject, body)
+                        except Exception as e:
+                            forward_status["last_error"] = str(e)
+                            continue
+                        sent_count += 1
+                        forward_status["active"] = True
+                        forward_status["last_sent_at"] = _now_iso_mel()
+                        content = (message['message'] or '').strip()
+                        preview = content[:80] + ("..." if len(content) > 80 else "")
+                        forward_status["last_forwarded_sms"] = {
+                            "from": message['from'],
+                            "timestamp": message['timestamp'],
+                            "preview": preview
+                        }
+                        try:
+                            client.sms.set_read(int(message['index']))
+                            marked_read = True
+                        except Exception:
+                            marked_read = False
+                        await asyncio.to_thread(sms_store.mark_forwarded, int(message['index']), marked_read)
                 except Exception as e:
                     logger.error(f"Error fetching SMS: {e}")
                     forward_status["last_error"] = str(e)
 
-                messages.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
                 if configured and sent_count == 0 and not forward_status["last_error"]:
                     forward_status["active"] = True
 
-                cache_store.set(KEY_DONGLE, {
-                    "signal": {
-                        "status": status,
-                        "strength": strength,
-                        "color": color
-                    },
-                    "device": device_info,
-                    "network": network_info,
-                    "traffic": traffic,
-                    "sms_messages": messages,
-                    "connected": True,
-                    "timestamp": _now_iso_mel()
-                }, ttl=interval * 1.5, stale_ttl=interval * 4)
-                cache_store.set(KEY_SMS_FORWARDER, forward_status, ttl=interval * 2, stale_ttl=interval * 6)
+                cache_store.set_many({
+                    KEY_DONGLE: ({
+                        "signal": {
+                            "status": status,
+                            "strength": strength,
+                            "color": color
+                        },
+                        "device": device_info,
+                        "network": network_info,
+                        "traffic": traffic,
+                        "sms": await asyncio.to_thread(sms_store.counts),
+                        "connected": True,
+                        "timestamp": _now_iso_mel()
+                    }, interval * 1.5, interval * 4),
+                    KEY_SMS_FORWARDER: (forward_status, interval * 2, interval * 6),
+                })
         except Exception as e:
             logger.error(f"dongle collector error: {e}")
             cache_store.set(KEY_DONGLE, {"error": str(e), "connected": False}, ttl=interval * 2)
@@ -387,15 +542,38 @@ async def collect_dongle(interval: float = 5.0):
         await asyncio.sleep(interval)
 
 
-async def start_collectors():
-    tasks = [
-        asyncio.create_task(collect_fast()),
-        asyncio.create_task(collect_disk()),
-        asyncio.create_task(collect_usb()),
-        asyncio.create_task(collect_docker()),
-        asyncio.create_task(collect_dongle()),
-        asyncio.create_task(collect_health()),
-    ]
+def restore_state(data: Dict[str, Any]) -> None:
+    """Refill the in-memory buffers from restored cache data before collectors start.
+
+    ``data`` maps cache keys to their restored values; the chart and thermal
+    history, rolling stats and per-container rings are rebuilt from their own
+    published keys, so a snapshot never needs to carry them twice.
+    """
+    rows = data.get(KEY_HISTORY) or []
+    _history.extend(rows)
+    for row in rows:
+        summary: Dict[str, Dict[str, Any]] = {}
+        for series in HISTORY_SERIES:
+            group, field = METRIC_PATHS[series]
+            summary.setdefault(group, {})[field] = row.get(series)
+        try:
+            _stats.observe(summary, datetime.fromisoformat(row["ts"]).timestamp())
+        except (KeyError, ValueError):
+            continue
+    if data.get(KEY_THERMAL_HISTORY):
+        _thermal_history.load(data[KEY_THERMAL_HISTORY])
+    if data.get(KEY_DOCKER_HISTORY):
+        _container_history.load(data[KEY_DOCKER_HISTORY])
+
+
+async def start_collectors(names: Optional[Iterable[str]] = None):
+    """Start the configured collector plugins, or exactly ``names`` if given."""
+    from utils import plugins
+    selected = plugins.active() if names is None else plugins.resolve(names)
+    # Task names let the loop monitor attribute stalls to a collector.
+    tasks = [asyncio.create_task(plugin.start(), name=f"collector:{plugin.name}") for plugin in selected]
+    if SHM_ROLE == "writer":
+        tasks.append(asyncio.create_task(serve_writer_requests(handle_writer_request), name="writer-requests"))
     return tasks
 
 
@@ -0,0 +1,168 @@
+"""Per-container CPU, memory and network history in fixed-size ring buffers.
+
+Samples from the docker collector are folded into one point per
+``CONTAINER_HISTORY_STEP`` seconds (peak CPU, last memory, average network
+rates), so the default 720 points cover 12 hours. Each container costs
+720 * 24 bytes in float32/float64 arrays no matter how long it runs, and its
+buffers are dropped as soon as the container is removed.
+
+The published cache entry carries the raw arrays base64-encoded, which keeps
+it compact in the shared-memory cache too; ``unpack`` turns one container's
+entry back into lists for the API.
+"""
+import base64
+import os
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+CONTAINER_HISTORY_POINTS = int(os.getenv("CONTAINER_HISTORY_POINTS", "720"))
+CONTAINER_HISTORY_STEP = float(os.getenv("CONTAINER_HISTORY_STEP", "60"))
+CONTAINER_SERIES = ("cpu_percent", "memory_usage", "net_rx_per_sec", "net_tx_per_sec")
+
+
+class _Ring:
+    __slots__ = (
+        "name", "ts", "series", "head", "count",
+        "cpu_peak", "memory", "net_start", "net_last",
+    )
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.ts = array("d", bytes(8 * capacity))
+        self.series = {name: array("f", bytes(4 * capacity)) for name in CONTAINER_SERIES}
+        self.head = 0
+        self.count = 0
+        self._reset_step()
+
+    def _reset_step(self) -> None:
+        self.cpu_peak: Optional[float] = None
+        self.memory = 0.0
+        # (time, rx bytes, tx bytes) at the first and latest sample of this step
+        self.net_start = None
+        self.net_last = None
+
+    def sample(self, now: float, stats: Dict[str, Any]) -> None:
+        cpu = stats.get("cpu_percent")
+        if cpu is None:
+            return
+        self.cpu_peak = cpu if self.cpu_peak is None else max(self.cpu_peak, cpu)
+        self.memory = stats.get("memory_usage", 0)
+        net = (now, stats.get("network_rx_bytes", 0), stats.get("network_tx_bytes", 0))
+        if self.net_start is None:
+            self.net_start = net
+        self.net_last = net
+
+    def commit(self, ts: float) -> None:
+        if self.cpu_peak is None:
+            return
+        rx_rate = tx_rate = 0.0
+        start, last = self.net_start, self.net_last
+        if last[0] > start[0]:
+            elapsed = last[0] - start[0]
+            # Counters restart with the container; a negative delta means "unknown", not traffic.
+            rx_rate = max(0, last[1] - start[1]) / elapsed
+            tx_rate = max(0, last[2] - start[2]) / elapsed
+        i = self.head
+        self.ts[i] = ts
+        self.series["cpu_percent"][i] = self.cpu_peak
+        self.series["memory_usage"][i] = self.memory
+        self.series["net_rx_per_sec"][i] = rx_rate
+        self.series["net_tx_per_sec"][i] = tx_rate
+        self.head = (i + 1) % len(self.ts)
+        self.count = min(self.count + 1, len(self.ts))
+        # The next step's rates start where this one ended.
+        self.cpu_peak = None
+        self.net_start = self.net_last
+
+    def _ordered(self, values: array) -> array:
+        if self.count < len(values):
+            return values[:self.count]
+        return values[self.head:] + values[:self.head]
+
+    def load(self, entry: Dict[str, Any]) -> None:
+        """Refill from an exported entry (the newest points if it holds more than fit)."""
+        capacity = len(self.ts)
+        ts = _unpack_array("d", entry["ts"])[-capacity:]
+        for i, value in enumerate(ts):
+            self.ts[i] = value
+        for name in CONTAINER_SERIES:
+            for i, value in enumerate(_unpack_array("f", entry[name])[-capacity:]):
+                self.series[name][i] = value
+        self.count = len(ts)
+        self.head = self.count % capacity
+
+    def export(self) -> Dict[str, Any]:
+        entry = {"name": self.name, "count": self.count}
+        entry["ts"] = base64.b64encode(self._ordered(self.ts).tobytes()).decode("ascii")
+        for name, values in self.series.items():
+            entry[name] = base64.b64encode(self._ordered(values).tobytes()).decode("ascii")
+        return entry
+
+
+class ContainerHistory:
+    def __init__(self, capacity: int = CONTAINER_HISTORY_POINTS, step: float = CONTAINER_HISTORY_STEP):
+        self.capacity = capacity
+        self.step = step
+        self._rings: Dict[str, _Ring] = {}
+        self._step_started: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def record(self, container_id: str, name: str, stats: Dict[str, Any], now: float) -> None:
+        ring = self._rings.get(container_id)
+        if ring is None:
+            ring = self._rings[container_id] = _Ring(name, self.capacity)
+        ring.name = name
+        ring.sample(now, stats)
+
+    def commit_due(self, now: float) -> bool:
+        """Close the current step if it is over; returns True when points were added."""
+        if self._step_started is None:
+            self._step_started = now
+            return False
+        if now - self._step_started < self.step:
+            return False
+        for ring in self._rings.values():
+            ring.commit(now)
+        self._step_started = now
+        return True
+
+    def prune(self, live_ids: Iterable[str]) -> bool:
+        """Forget removed containers; returns True if any were dropped."""
+        gone = set(self._rings) - set(live_ids)
+        for container_id in gone:
+            del self._rings[container_id]
+        return bool(gone)
+
+    def load(self, exported: Dict[str, Any]) -> None:
+        """Restore rings from ``export()`` output, e.g. a warm-restart snapshot."""
+        for container_id, entry in exported.get("containers", {}).items():
+            ring = self._rings[container_id] = _Ring(entry["name"], self.capacity)
+            if entry["count"]:
+                ring.load(entry)
+
+    def export(self) -> Dict[str, Any]:
+        return {
+            "step": self.step,
+            "capacity": self.capacity,
+            "series": list(CONTAINER_SERIES),
+            "containers": {cid: ring.export() for cid, ring in self._rings.items()},
+        }
+
+
+def _unpack_array(typecode: str, encoded: str) -> List[float]:
+    values = array(typecode)
+    values.frombytes(base64.b64decode(encoded))
+    return values.tolist()
+
+
+def unpack(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """One container's exported entry as ``{"ts": [...], "series": {...}}``."""
+    return {
+        "ts": _unpack_array("d", entry["ts"]),
+        "series": {
+            name: [round(v, 2) for v in _unpack_array("f", entry[name])]
+            for name in CONTAINER_SERIES
+        },
+    }
@@ -1,24 +1,37 @@
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from dotenv import load_dotenv
 
+from utils.sqlite_store import SQLiteDatabase, sqlite_path
+
 load_dotenv()
 
+# mongodb://... for MongoDB, or sqlite:///path/to/statlog.db for the embedded store.
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/pi_monitor")
 
 class Database:
-    client: AsyncIOMotorClient = None
+    client = None
     db = None
 
 def get_database():
     return Database.db
 
 async def connect_to_mongo():
+    path = sqlite_path(MONGO_URL)
+    if path:
+        Database.db = SQLiteDatabase(path)
+        await Database.db.open()
+        print(f"Using SQLite database: {path}")
+        return
+    # Imported lazily so SQLite installs do not need motor/pymongo loaded.
+    from motor.motor_asyncio import AsyncIOMotorClient
     Database.client = AsyncIOMotorClient(MONGO_URL)
     Database.db = Database.client.get_default_database()
     print(f"Connected to MongoDB: {MONGO_URL}")
 
 async def close_mongo_connection():
+    if isinstance(Database.db, SQLiteDatabase):
+        await Database.db.close()
+        print("Closed SQLite database")
     if Database.client:
         Database.client.close()
         print("Closed MongoDB connection")
@@ -0,0 +1,160 @@
+"""Agent -> aggregator federation: delta encoding and the per-host registry.
+
+Agents (``agent.py``) push cache keys over a websocket. The first message
+after ``hello`` carries full values; after that each key is sent only when
+its cache generation changes, as a patch against the value the aggregator
+already holds:
+
+    {"$v": value}                           replace
+    {"$d": {key: patch}, "$r": [key, ...]}  merge into a dict, removing $r keys
+    {"$l": {index: patch}}                  patch list items in place (same length)
+
+Ages rather than timestamps travel on the wire so agent clock skew does not
+make fresh data look stale.
+"""
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.cache_store import CacheStore
+from utils.collectors import (
+    KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_DISK, KEY_NETWORK, KEY_NETWORK_ADDRS, KEY_SUMMARY, KEY_HISTORY,
+    KEY_STATS, KEY_PROCESSES, KEY_USB, KEY_DOCKER, KEY_DONGLE, KEY_HEALTH,
+    KEY_LOOP, KEY_THERMAL_HISTORY
+)
+from utils.history import MetricHistory
+from utils.thermal import ThermalHistory
+from utils.window_stats import WindowStats
+
+FEDERATION_TOKEN = os.getenv("FEDERATION_TOKEN", "")
+LOCAL_HOST = "local"
+
+# History, window stats and thermal history are rebuilt on the aggregator from the
+# summaries and temperatures it receives.
+FEDERATED_KEYS = [
+    KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_DISK, KEY_NETWORK, KEY_NETWORK_ADDRS, KEY_SUMMARY, KEY_PROCESSES,
+    KEY_USB, KEY_DOCKER, KEY_DONGLE, KEY_HEALTH, KEY_LOOP,
+]
+
+_MISSING = object()
+
+
+def diff(old: Any, new: Any) -> Optional[Dict[str, Any]]:
+    """Return a patch turning ``old`` into ``new``, or None if they are equal."""
+    if old is _MISSING:
+        return {"$v": new}
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed = {}
+        for key, value in new.items():
+            patch = diff(old.get(key, _MISSING), value)
+            if patch is not None:
+                changed[key] = patch
+        removed = [key for key in old if key not in new]
+        if not changed and not removed:
+            return None
+        patch = {"$d": changed}
+        if removed:
+            patch["$r"] = removed
+        return patch
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        changed = {}
+        for index, (before, after) in enumerate(zip(old, new)):
+            patch = diff(before, after)
+            if patch is not None:
+                changed[str(index)] = patch
+        return {"$l": changed} if changed else None
+    if type(old) is type(new) and old == new:
+        return None
+    return {"$v": new}
+
+
+def apply_patch(old: Any, patch: Dict[str, Any]) -> Any:
+    if "$v" in patch:
+        return patch["$v"]
+    if "$d" in patch:
+        result = dict(old) if isinstance(old, dict) else {}
+        for key in patch.get("$r", []):
+            result.pop(key, None)
+        for key, sub in patch["$d"].items():
+            result[key] = apply_patch(result.get(key), sub)
+        return result
+    if "$l" in patch:
+        result = list(old) if isinstance(old, list) else []
+        for index, sub in patch["$l"].items():
+            i = int(index)
+            if i < len(result):
+                result[i] = apply_patch(result[i], sub)
+        return result
+    return old
+
+
+class HostState:
+    def __init__(self, host_id: str):
+        self.host_id = host_id
+        self.store = CacheStore()
+        self.history = MetricHistory()
+        self.stats = WindowStats()
+        self.thermal = ThermalHistory()
+        self.connected = False
+        self.remote = None
+        self.connected_at: Optional[float] = None
+        self.last_seen: Optional[float] = None
+        self.messages = 0
+        self.bytes = 0
+
+    def apply(self, keys: Dict[str, Dict[str, Any]]) -> None:
+        now = time.time()
+        items = {}
+        for key, item in keys.items():
+            if key not in FEDERATED_KEYS:
+                continue
+            current = self.store.get(key)
+            data = apply_patch(current.data if current else None, item["patch"])
+            # Keep the agent's view of freshness instead of "just received".
+            items[key] = (data, item["ttl"], item.get("stale_ttl"), now - item.get("age", 0))
+        if not items:
+            return
+        summary = items.get(KEY_SUMMARY)
+        if summary and summary[0]:
+            self.history.append_summary(summary[0])
+            self.stats.observe(summary[0], summary[3])
+            items[KEY_HISTORY] = (self.history.rows(), summary[1], summary[1] * 4, summary[3])
+            items[KEY_STATS] = (self.stats.snapshot(), summary[1], summary[1] * 4, summary[3])
+        temp = items.get(KEY_TEMP)
+        if temp and isinstance(temp[0], dict):
+            self.thermal.append(temp[0], temp[3])
+            items[KEY_THERMAL_HISTORY] = (self.thermal.columns(), temp[1], temp[1] * 4, temp[3])
+        self.store.set_many(items)
+
+    def info(self) -> Dict[str, Any]:
+        health = self.store.snapshot(KEY_HEALTH)
+        return {
+            "host": self.host_id,
+            "connected": self.connected,
+            "remote": self.remote,
+            "connected_at": self.connected_at,
+            "last_seen": self.last_seen,
+            "messages": self.messages,
+            "bytes": self.bytes,
+            "health": (health["data"] or {}).get("status"),
+        }
+
+
+class FleetRegistry:
+    def __init__(self):
+        self.hosts: Dict[str, HostState] = {}
+
+    def host(self, host_id: str) -> HostState:
+        state = self.hosts.get(host_id)
+        if state is None:
+            state = self.hosts[host_id] = HostState(host_id)
+        return state
+
+    def get(self, host_id: str) -> Optional[HostState]:
+        return self.hosts.get(host_id)
+
+    def host_ids(self) -> List[str]:
+        return sorted(self.hosts)
+
+
+fleet = FleetRegistry()
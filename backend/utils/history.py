@@ -0,0 +1,71 @@
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+MEL_TZ = ZoneInfo("Australia/Melbourne")
+
+# Keep last 15 minutes at ~2s cadence
+HISTORY_POINTS = 450
+HISTORY_SERIES = ("cpu", "memory", "temp")
+_COLUMNAR_MEMO_SIZE = 16
+
+_columnar_memo: "OrderedDict[int, tuple]" = OrderedDict()
+
+
+def history_point(summary: Dict[str, Any], ts: Optional[datetime] = None) -> Dict[str, Any]:
+    ts = ts or datetime.now(MEL_TZ)
+    return {
+        "ts": ts.isoformat(),
+        "time": ts.strftime("%H:%M:%S"),
+        "cpu": summary["cpu"].get("overall_usage", 0),
+        "memory": summary["memory"].get("percent", 0),
+        "temp": summary["temperature"].get("cpu_temp", 0),
+    }
+
+
+class MetricHistory:
+    """Fixed-size rolling window of dashboard chart points."""
+
+    def __init__(self, maxlen: int = HISTORY_POINTS):
+        self._points: deque = deque(maxlen=maxlen)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def append_summary(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        point = history_point(summary)
+        self._points.append(point)
+        return point
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return list(self._points)
+
+    def extend(self, rows: List[Dict[str, Any]]) -> None:
+        """Append saved rows, e.g. restored from a snapshot before collection resumes."""
+        self._points.extend(rows)
+
+
+def history_columns(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Columnar layout: one epoch-seconds array plus one value array per series."""
+    return {
+        "ts": [datetime.fromisoformat(row["ts"]).timestamp() for row in rows],
+        "series": {name: [row.get(name, 0) for row in rows] for name in HISTORY_SERIES},
+    }
+
+
+def columnar(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """history_columns() memoised per published history list.
+
+    Cache entries are replaced, never mutated, so the rows list identity is a
+    safe key while the memo holds a reference to it.
+    """
+    key = id(rows)
+    hit = _columnar_memo.get(key)
+    if hit is not None and hit[0] is rows:
+        return hit[1]
+    columns = history_columns(rows)
+    _columnar_memo[key] = (rows, columns)
+    while len(_columnar_memo) > _COLUMNAR_MEMO_SIZE:
+        _columnar_memo.popitem(last=False)
+    return columns
@@ -0,0 +1,274 @@
+"""On-disk archive of chart history points and streaming export.
+
+The in-memory chart history covers 15 minutes. Every point is also appended
+to one NDJSON file per UTC day under ``HISTORY_ARCHIVE_DIR`` (in
+``STATLOG_DATA_DIR`` by default), kept for ``HISTORY_ARCHIVE_DAYS`` days.
+
+An export reads the day files a line at a time. Points are averaged into
+``resolution``-second buckets when asked, and output goes out in
+``EXPORT_CHUNK_BYTES`` chunks, so memory stays flat however long the range
+is. The work runs on its own thread: it is niced (per-thread on Linux), it
+yields the GIL after every chunk, and it blocks on a small queue when the
+client reads slowly. A long export therefore cannot hold up the collectors
+on the event loop.
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+# Empty disables the archive.
+HISTORY_ARCHIVE_DIR = os.getenv("HISTORY_ARCHIVE_DIR", data_path("history-archive"))
+HISTORY_ARCHIVE_DAYS = int(os.getenv("HISTORY_ARCHIVE_DAYS", "30"))
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+EXPORT_NICE = int(os.getenv("EXPORT_NICE", "10"))
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_QUEUE_CHUNKS = 4
+
+_active_exports = 0
+
+Point = Tuple[float, Dict[str, Any]]
+
+
+def _day(ts: float) -> date:
+    return datetime.fromtimestamp(ts, timezone.utc).date()
+
+
+class HistoryArchive:
+    def __init__(self, directory: str = HISTORY_ARCHIVE_DIR, days: int = HISTORY_ARCHIVE_DAYS):
+        self.directory = directory
+        self.days = days
+        self._file = None
+        self._file_day: Optional[date] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def _path(self, day: date) -> str:
+        return os.path.join(self.directory, f"{day.isoformat()}.ndjson")
+
+    def append(self, ts: float, values: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        try:
+            day = _day(ts)
+            if day != self._file_day:
+                self.close()
+                os.makedirs(self.directory, exist_ok=True)
+                # Line buffered: each point is one write(), and a crash loses nothing already appended.
+                self._file = open(self._path(day), "a", buffering=1)
+                self._file_day = day
+                self.prune(day)
+            self._file.write(json.dumps({"ts": round(ts, 3), **values}, separators=(",", ":")) + "\n")
+        except OSError as e:
+            logger.warning(f"history archive write failed: {e}")
+            self.close()
+
+    def prune(self, today: date) -> None:
+        cutoff = today - timedelta(days=self.days)
+        for day, path in self._day_files():
+            if day < cutoff:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._file_day = None
+
+    def _day_files(self) -> List[Tuple[date, str]]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        files = []
+        for name in names:
+            try:
+                files.append((date.fromisoformat(name[:-len(".ndjson")]), os.path.join(self.directory, name)))
+            except ValueError:
+                continue
+        return sorted(files)
+
+    def files_between(self, start: float, end: float) -> List[str]:
+        first, last = _day(start), _day(end)
+        return [path for day, path in self._day_files() if first <= day <= last]
+
+    def points(self, start: float, end: float) -> Iterator[Point]:
+        for path in self.files_between(start, end):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        point = json.loads(line)
+                    except ValueError:
+                        # A line still being written, or a torn one from a crash.
+                        continue
+                    ts = point.pop("ts", None)
+                    if isinstance(ts, (int, float)) and start <= ts <= end:
+                        yield ts, point
+
+
+def bucketed(points: Iterable[Point], series: List[str], resolution: float) -> Iterator[Point]:
+    """Mean of each series per ``resolution``-second bucket (stamped with its start); 0 passes points through."""
+    if resolution <= 0:
+        for ts, values in points:
+            yield ts, {name: values.get(name) for name in series}
+        return
+    bucket = None
+    sums: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    for ts, values in points:
+        key = ts - ts % resolution
+        if key != bucket:
+            if bucket is not None:
+                yield bucket, {name: sums[name] / counts[name] if counts[name] else None for name in series}
+            bucket = key
+            sums = dict.fromkeys(series, 0.0)
+            counts = dict.fromkeys(series, 0)
+        for name in series:
+            value = values.get(name)
+            if isinstance(value, (int, float)):
+                sums[name] += value
+                counts[name] += 1
+    if bucket is not None:
+        yield bucket, {name: sums[name] / counts[name] if counts[name] else None for name in series}
+
+
+def _value(value: Any) -> Any:
+    return round(value, 2) if isinstance(value, float) else value
+
+
+def encode_rows(points: Iterable[Point], series: List[str], fmt: str) -> Iterator[bytes]:
+    """CSV (with header) or NDJSON, joined into chunks of about EXPORT_CHUNK_BYTES."""
+    lines: List[str] = []
+    size = 0
+    if fmt == "csv":
+        lines.append(",".join(["ts", "time", *series]) + "\n")
+    for ts, values in points:
+        when = datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds")
+        if fmt == "csv":
+            cells = ["" if values[name] is None else str(_value(values[name])) for name in series]
+            line = ",".join([str(round(ts, 3)), when, *cells]) + "\n"
+        else:
+            row = {"ts": round(ts, 3), "time": when, **{name: _value(values[name]) for name in series}}
+            line = json.dumps(row, separators=(",", ":")) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(lines).encode()
+            lines, size = [], 0
+    if lines:
+        yield "".join(lines).encode()
+
+
+def byte_range(chunks: Iterable[bytes], first: int, last: int) -> Iterator[bytes]:
+    """Bytes ``first``..``last`` (inclusive) of the concatenated chunks."""
+    offset = 0
+    for chunk in chunks:
+        end = offset + len(chunk)
+        if end > first and offset <= last:
+            yield chunk[max(0, first - offset):last - offset + 1]
+        if end > last:
+            return
+        offset = end
+
+
+def parse_range(header: Optional[str]) -> Optional[Tuple[int, Optional[int]]]:
+    """``bytes=N-`` or ``bytes=N-M`` as (N, M or None); anything else is ignored."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    if not first.isdigit() or (last and not last.isdigit()):
+        return None
+    if last and int(last) < int(first):
+        return None
+    return int(first), int(last) if last else None
+
+
+def export_slot() -> bool:
+    """Reserve an export slot; False when EXPORT_MAX_CONCURRENT are running."""
+    global _active_exports
+    if _active_exports >= EXPORT_MAX_CONCURRENT:
+        return False
+    _active_exports += 1
+    return True
+
+
+def release_export_slot() -> None:
+    global _active_exports
+    _active_exports = max(0, _active_exports - 1)
+
+
+_DONE = object()
+
+
+class BackgroundIterator:
+    """Run ``factory()`` on a low-priority thread and iterate its items from the event loop."""
+
+    def __init__(self, factory: Callable[[], Iterable[Any]], maxsize: int = EXPORT_QUEUE_CHUNKS):
+        self._factory = factory
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._ready = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.Thread(target=self._produce, name="history-export", daemon=True)
+
+    def _put(self, item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+            except queue.Full:
+                continue
+            self._loop.call_soon_threadsafe(self._ready.set)
+            return True
+        return False
+
+    def _produce(self) -> None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), EXPORT_NICE)
+        except (AttributeError, OSError):
+            pass
+        try:
+            for item in self._factory():
+                if not self._put(item):
+                    return
+                # Let the event loop thread take the GIL between chunks.
+                time.sleep(0)
+        except Exception as e:
+            logger.warning(f"history export failed: {e}")
+            self._put(e)
+            return
+        self._put(_DONE)
+
+    async def items(self) -> AsyncIterator[Any]:
+        self._thread.start()
+        try:
+            while True:
+                self._ready.clear()
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    await self._ready.wait()
+                    continue
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self._stop.set()
+
+
+history_archive = HistoryArchive()
@@ -10,3 +10,8 @@ def build_cache_headers(meta: Dict[str, Any]) -> Dict[str, str]:
     return {
         "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={swr}",
     }
+
+
+def entry_etag(entry) -> str:
+    # Generation alone restarts at 1 with the process; the write time keeps it unique.
+    return f"{entry.generation}-{int(entry.updated_at * 1000)}"
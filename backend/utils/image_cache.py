@@ -0,0 +1,115 @@
+"""Image metadata for the Docker collector, keyed by image ID.
+
+``container.image`` in the Docker SDK inspects the image on every access,
+i.e. one extra API call per container per collector cycle for data that only
+changes when images are pulled, tagged or removed. This cache inspects each
+image once; a thread following Docker's image events drops entries when they
+change, and an image ID the cache has not seen is simply looked up. A failed
+inspect is only remembered for ``IMAGE_RETRY_AFTER`` seconds, so a Docker
+hiccup does not leave containers without image details until restart.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+IMAGE_RETRY_AFTER = float(os.getenv("IMAGE_RETRY_AFTER", "60"))
+
+
+def _short_id(image_id: str) -> str:
+    return image_id.split(":", 1)[-1][:12]
+
+
+class ImageCache:
+    def __init__(self):
+        self._images: Dict[str, Dict[str, Any]] = {}
+        # image ID -> monotonic time after which a failed inspect is retried
+        self._failed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._events = None
+
+    def get(self, image_id: str) -> Optional[Dict[str, Any]]:
+        return self._images.get(image_id)
+
+    def lookup(self, client, image_id: str) -> Dict[str, Any]:
+        """Cached metadata, inspecting the image on a miss; blocking, run it in a thread."""
+        meta = self._images.get(image_id)
+        if meta is not None:
+            return meta
+        unknown = {"tags": [], "short_id": _short_id(image_id), "size": None, "created": None}
+        if time.monotonic() < self._failed.get(image_id, 0.0):
+            return unknown
+        try:
+            attrs = client.images.get(image_id).attrs
+        except Exception as e:
+            # Removed image, or Docker briefly unavailable: not cached, retried after a while.
+            logger.debug(f"image {image_id} inspect failed: {e}")
+            with self._lock:
+                self._failed[image_id] = time.monotonic() + IMAGE_RETRY_AFTER
+            return unknown
+        meta = {
+            "tags": attrs.get("RepoTags") or [],
+            "short_id": _short_id(image_id),
+            "size": attrs.get("Size"),
+            "created": attrs.get("Created"),
+        }
+        with self._lock:
+            self._images[image_id] = meta
+            self._failed.pop(image_id, None)
+        return meta
+
+    def invalidate(self, image_id: Optional[str] = None) -> None:
+        with self._lock:
+            if image_id is None:
+                self._images.clear()
+                self._failed.clear()
+            else:
+                self._images.pop(image_id, None)
+                self._failed.pop(image_id, None)
+
+    def prune(self, live_ids: Iterable[str]) -> None:
+        """Forget images no container uses any more."""
+        live = set(live_ids)
+        with self._lock:
+            for image_id in [i for i in self._images if i not in live]:
+                del self._images[image_id]
+            for image_id in [i for i in self._failed if i not in live]:
+                del self._failed[image_id]
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def watch(self, client) -> None:
+        """Follow image events in the background (restarted if the stream ended)."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._watcher = threading.Thread(target=self._follow, args=(client,), name="image-events", daemon=True)
+        self._watcher.start()
+
+    def _follow(self, client) -> None:
+        # Opening the stream is a blocking API call, so it happens here rather than on the caller's event loop.
+        try:
+            self._events = client.events(decode=True, filters={"type": "image"})
+        except Exception as e:
+            logger.warning(f"image events unavailable: {e}")
+            return
+        try:
+            for event in self._events:
+                image_id = event.get("id") or ""
+                # pull/tag events may carry a reference rather than an ID; drop everything then.
+                self.invalidate(image_id if image_id.startswith("sha256:") else None)
+        except Exception as e:
+            logger.debug(f"image event stream ended: {e}")
+        # Events may have been missed while the stream was down.
+        self.invalidate()
+
+    def close(self) -> None:
+        if self._events is not None:
+            try:
+                self._events.close()
+            except Exception:
+                pass
@@ -0,0 +1,216 @@
+"""Background jobs for slow, blocking operations started from the API.
+
+A job runs a synchronous function on a worker thread and is tracked by id so
+the client can poll for the outcome instead of holding a request (and, for
+blocking SDK calls, the event loop) open. Finished jobs are kept for
+``JOB_RETENTION`` seconds.
+
+A job runs in the process that accepted it, but with ``uvicorn --workers N``
+the client's next poll may land on another worker. Behind
+``CACHE_SHM_ROLE=reader`` every record is therefore also written to
+``JOB_DIR`` (next to the shared cache segment by default), where any worker
+can read it. A lock file per target, holding the owner's pid, keeps one job
+per target across all workers. A job whose worker died is reported as failed.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils.cache_store import SHM_ROLE
+from utils.shm_cache import SHM_PATH
+
+logger = logging.getLogger(__name__)
+
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", "900"))
+JOB_KEEP = int(os.getenv("JOB_KEEP", "200"))
+# Empty keeps jobs in this process only, which is enough when one process serves the API.
+JOB_DIR = os.getenv("JOB_DIR", f"{SHM_PATH}.jobs" if SHM_ROLE == "reader" else "")
+
+_JOB_ID = re.compile(r"^[0-9a-f]{12}$")
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobConflict(Exception):
+    """Raised when the target already has a job in progress."""
+
+    def __init__(self, job: Dict[str, Any]):
+        super().__init__(f"{job['target']} is busy with job {job['id']}")
+        self.job = job
+
+
+class JobManager:
+    def __init__(self, directory: str = JOB_DIR):
+        self.directory = directory
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _prune(self) -> None:
+        cutoff = time.time() - JOB_RETENTION
+        finished = [j for j in self._jobs.values() if j["finished_at"] is not None]
+        finished.sort(key=lambda j: j["finished_at"])
+        excess = len(self._jobs) - JOB_KEEP
+        for job in finished:
+            if job["finished_at"] < cutoff or excess > 0:
+                del self._jobs[job["id"]]
+                excess -= 1
+        if self.directory:
+            for entry in os.scandir(self.directory):
+                try:
+                    if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except OSError:
+                    continue
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _lock_path(self, target: str) -> str:
+        return os.path.join(self.directory, f"target-{hashlib.sha1(target.encode()).hexdigest()[:16]}.lock")
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        if not self.directory:
+            return
+        path = self._job_path(job["id"])
+        try:
+            with open(f"{path}.tmp", "w") as f:
+                json.dump({**job, "pid": os.getpid()}, f, default=str)
+            os.replace(f"{path}.tmp", path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"job {job['id']} record not shared: {e}")
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not self.directory or not _JOB_ID.match(job_id):
+            return None
+        try:
+            with open(self._job_path(job_id)) as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return None
+        pid = job.pop("pid", None)
+        if job["finished_at"] is None and isinstance(pid, int) and not _alive(pid):
+            job.update(state="failed", error="worker exited before the job finished", finished_at=time.time())
+        return job
+
+    def _claim(self, target: str, job_id: str) -> None:
+        """Take the cross-worker lock for ``target``, or raise JobConflict."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._lock_path(target)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                try:
+                    with open(path) as f:
+                        pid, _, owner = f.read().partition(" ")
+                except OSError:
+                    continue
+                if pid.isdigit() and _alive(int(pid)):
+                    raise JobConflict(self.get(owner) or {"id": owner, "target": target})
+                # Left behind by a worker that died mid-job.
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(f"{os.getpid()} {job_id}")
+            return
+        raise JobConflict({"id": "unknown", "target": target})
+
+    def _release(self, target: str) -> None:
+        if self.directory:
+            try:
+                os.remove(self._lock_path(target))
+            except OSError:
+                pass
+
+    def active_for(self, target: str) -> Optional[Dict[str, Any]]:
+        return next(
+            (j for j in self._jobs.values() if j["target"] == target and j["finished_at"] is None),
+            None,
+        )
+
+    def submit(
+        self,
+        kind: str,
+        target: str,
+        fn: Callable[[], Any],
+        on_success: Optional[Callable[[Any], Awaitable[None]]] = None,
+        executor: Optional[Executor] = None,
+    ) -> Dict[str, Any]:
+        """Start ``fn`` in a thread (of ``executor`` if given); one job per target at a time."""
+        busy = self.active_for(target)
+        if busy is not None:
+            raise JobConflict(busy)
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "target": target,
+            "state": "running",
+            "created_at": time.time(),
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        if self.directory:
+            self._claim(target, job["id"])
+        self._prune()
+        self._jobs[job["id"]] = job
+        self._save(job)
+        task = asyncio.create_task(self._run(job, fn, on_success, executor), name=f"job:{kind}")
+        self._tasks[job["id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job["id"], None))
+        return dict(job)
+
+    async def _run(self, job: Dict[str, Any], fn, on_success, executor: Optional[Executor] = None) -> None:
+        try:
+            if executor is None:
+                result = await asyncio.to_thread(fn)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(executor, fn)
+            job["result"] = result
+            if on_success is not None:
+                await on_success(result)
+            job["state"] = "succeeded"
+        except Exception as e:
+            logger.warning(f"job {job['id']} ({job['kind']} {job['target']}) failed: {e}")
+            job["state"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = time.time()
+            self._save(job)
+            self._release(job["target"])
+
+    async def wait(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Wait for a job to finish; cancelling the waiter does not cancel the job."""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job from this process, or from another worker's shared record."""
+        job = self._jobs.get(job_id)
+        return dict(job) if job else self._load(job_id)
+
+    def recent(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [dict(j) for j in self._jobs.values() if kind is None or j["kind"] == kind]
+
+
+jobs = JobManager()
@@ -0,0 +1,102 @@
+"""Follow a container's log stream without letting a slow client pile it up.
+
+The Docker SDK's log stream is a blocking iterator, so each follower reads
+it on its own thread (not the shared default executor, which long follows
+would starve) into a buffer of at most ``LOG_BUFFER_LINES`` lines. When the
+client falls behind, the oldest buffered lines are dropped and replaced by a
+single "lines dropped" marker, so memory stays bounded however noisy the
+container is. ``LOG_MAX_FOLLOWERS`` caps concurrent follows, each of which
+holds a connection to the Docker socket.
+"""
+import asyncio
+import os
+import threading
+from collections import deque
+from typing import AsyncIterator, Optional
+
+LOG_BUFFER_LINES = int(os.getenv("LOG_BUFFER_LINES", "1000"))
+LOG_MAX_FOLLOWERS = int(os.getenv("LOG_MAX_FOLLOWERS", "4"))
+LOG_LINE_MAX = 16 * 1024
+LOG_TAIL_MAX = 5000
+
+_active_followers = 0
+
+
+def follower_slot() -> bool:
+    """Reserve a follower slot; False when the cap is reached."""
+    global _active_followers
+    if _active_followers >= LOG_MAX_FOLLOWERS:
+        return False
+    _active_followers += 1
+    return True
+
+
+def release_follower_slot() -> None:
+    global _active_followers
+    _active_followers = max(0, _active_followers - 1)
+
+
+def active_followers() -> int:
+    return _active_followers
+
+
+class LogFollower:
+    def __init__(self, stream, limit: int = LOG_BUFFER_LINES):
+        self._stream = stream
+        self._lines: deque = deque()
+        self._limit = limit
+        self._dropped = 0
+        self._finished = False
+        self._notified = False
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.Thread(target=self._pump, name="log-follower", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _notify(self) -> None:
+        # Called with the lock held; one pending wake-up is enough.
+        if not self._notified:
+            self._notified = True
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _pump(self) -> None:
+        try:
+            for chunk in self._stream:
+                with self._lock:
+                    if len(self._lines) >= self._limit:
+                        self._lines.popleft()
+                        self._dropped += 1
+                    self._lines.append(chunk[:LOG_LINE_MAX])
+                    self._notify()
+        except Exception:
+            # close() from the event loop tears the connection down under us.
+            pass
+        finally:
+            with self._lock:
+                self._finished = True
+                self._notify()
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        while True:
+            await self._wakeup.wait()
+            with self._lock:
+                lines, self._lines = self._lines, deque()
+                dropped, self._dropped = self._dropped, 0
+                finished = self._finished
+                self._notified = False
+                self._wakeup.clear()
+            if dropped:
+                yield f"[statlog: {dropped} log lines dropped, client too slow]\n".encode()
+            if lines:
+                yield b"".join(lines)
+            if finished:
+                return
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        except Exception:
+            pass
@@ -0,0 +1,224 @@
+"""Event-loop lag histogram and blocking-call detector.
+
+A probe task sleeps ``LOOP_LAG_INTERVAL`` seconds and records how late it
+wakes up. A watchdog thread watches the probe's heartbeat; when the loop has
+not come back for ``LOOP_STALL_THRESHOLD`` seconds it grabs the loop thread's
+stack, so the report names the code that was running (a collector, a route,
+or whatever frame was innermost) rather than just the fact that it was slow.
+
+The collector publishes its own report in the cache. API workers that read
+the shared segment cannot write to it, so each one writes its report to a
+small file next to the segment (``<CACHE_SHM_PATH>.loop-<pid>``) instead;
+``worker_reports`` collects them so a route stalling one worker shows up.
+"""
+import asyncio
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+LOOP_STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", "0.25"))
+# Upper bounds in ms; the last bucket catches everything above.
+LAG_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf"))
+STALL_KEEP = 20
+STACK_DEPTH = 25
+# Beside the shared cache segment (utils.shm_cache.SHM_PATH); not imported from there, as that pulls in the cache.
+WORKER_REPORT_PREFIX = os.getenv("CACHE_SHM_PATH", "/dev/shm/statlog-cache") + ".loop-"
+WORKER_REPORT_INTERVAL = 2.0
+# A report this old belongs to a worker that exited without cleaning up; it is removed.
+WORKER_REPORT_MAX_AGE = 10.0
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def attribute(stack: traceback.StackSummary, task_name: Optional[str] = None) -> str:
+    """Name the collector or route responsible for a captured stack."""
+    source = None
+    for frame in stack:
+        path = os.path.relpath(frame.filename, _BACKEND_DIR)
+        if path.startswith("routes" + os.sep):
+            source = f"route:{os.path.splitext(os.path.basename(path))[0]}.{frame.name}"
+        elif path == os.path.join("utils", "collectors.py") and frame.name.startswith("collect_"):
+            source = f"collector:{frame.name[len('collect_'):]}"
+    if source:
+        return source
+    if task_name and ":" in task_name:
+        return task_name
+    last = stack[-1] if stack else None
+    return f"{os.path.basename(last.filename)}:{last.name}" if last else "unknown"
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = LOOP_STALL_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.buckets = [0] * len(LAG_BUCKETS_MS)
+        self.samples = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.stalls = deque(maxlen=STALL_KEEP)
+        self.by_source: Counter = Counter()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._beat: Optional[float] = None
+        self._captured: Optional[float] = None
+        self._open_stall: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._probe(), name="loop-monitor")
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._thread:
+            await asyncio.to_thread(self._thread.join, 1.0)
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - started - self.interval))
+
+    def record(self, lag: float) -> None:
+        lag_ms = lag * 1000
+        with self._lock:
+            self.samples += 1
+            self.total += lag_ms
+            self.max = max(self.max, lag_ms)
+            for i, bound in enumerate(LAG_BUCKETS_MS):
+                if lag_ms <= bound:
+                    self.buckets[i] += 1
+                    break
+            if self._open_stall is not None:
+                # The stall the watchdog caught has ended; now its full length is known.
+                self._open_stall["lag_ms"] = round(lag_ms, 1)
+                self._open_stall = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.threshold / 4):
+            beat = self._beat
+            if beat is None or beat == self._captured:
+                continue
+            if time.monotonic() - beat < self.interval + self.threshold:
+                continue
+            self._captured = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame, limit=STACK_DEPTH)
+            task = asyncio.current_task(self._loop) if self._loop else None
+            source = attribute(stack, task.get_name() if task else None)
+            stall = {
+                "at": time.time(),
+                "source": source,
+                "lag_ms": None,
+                "stack": [f"{f.filename}:{f.lineno} in {f.name}" for f in stack],
+            }
+            with self._lock:
+                self.stalls.append(stall)
+                self.by_source[source] += 1
+                self._open_stall = stall
+            logger.warning(f"event loop blocked for over {self.threshold * 1000:.0f} ms in {source}")
+
+    def _quantile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        rank = q * self.samples
+        seen = 0
+        for bound, count in zip(LAG_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound if bound != float("inf") else round(self.max, 1)
+        return round(self.max, 1)
+
+    def snapshot(self, stacks: bool = False) -> Dict[str, Any]:
+        """Histogram and stall counts; ``stacks`` adds the captured stacks (admin view)."""
+        with self._lock:
+            recent: List[Dict[str, Any]] = [
+                stall if stacks else {k: v for k, v in stall.items() if k != "stack"}
+                for stall in self.stalls
+            ]
+            return {
+                "interval_ms": self.interval * 1000,
+                "threshold_ms": self.threshold * 1000,
+                "samples": self.samples,
+                "mean_ms": round(self.total / self.samples, 2) if self.samples else None,
+                "p50_ms": self._quantile(0.50),
+                "p99_ms": self._quantile(0.99),
+                "max_ms": round(self.max, 1),
+                "histogram": [
+                    {"le_ms": bound if bound != float("inf") else None, "count": count}
+                    for bound, count in zip(LAG_BUCKETS_MS, self.buckets)
+                ],
+                "stalls": sum(self.by_source.values()),
+                "stalls_by_source": dict(self.by_source),
+                "recent_stalls": [dict(stall) for stall in recent],
+            }
+
+
+loop_monitor = LoopMonitor()
+
+
+def _write_report(path: str, report: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(report, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+async def publish_worker_report(interval: float = WORKER_REPORT_INTERVAL) -> None:
+    """Keep this worker's report on disk for ``worker_reports``; runs until cancelled."""
+    path = f"{WORKER_REPORT_PREFIX}{os.getpid()}"
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(_write_report, path, loop_monitor.snapshot())
+            except OSError as e:
+                logger.warning(f"loop report write to {path} failed: {e}")
+            await asyncio.sleep(interval)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def worker_reports(max_age: float = WORKER_REPORT_MAX_AGE) -> Dict[str, Any]:
+    """pid -> loop report for every API worker that published one recently."""
+    reports = {}
+    now = time.time()
+    for path in glob.glob(f"{glob.escape(WORKER_REPORT_PREFIX)}*"):
+        pid = path[len(WORKER_REPORT_PREFIX):]
+        if not pid.isdigit():
+            continue
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                os.remove(path)
+                continue
+            with open(path) as f:
+                reports[pid] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return reports
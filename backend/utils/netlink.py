@@ -0,0 +1,80 @@
+"""Wake up on kernel link/address changes via an rtnetlink multicast socket.
+
+Only the fact that *something* changed is used; the interface list itself is
+re-read with psutil, so no netlink message parsing is needed. Where netlink
+is unavailable (non-Linux, restricted sandboxes) ``wait`` degrades to a plain
+timeout, i.e. a slow poll.
+"""
+import asyncio
+import logging
+import socket
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+_GROUPS = RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR
+_RECV_SIZE = 65536
+
+
+class AddressWatcher:
+    """Async edge trigger for rtnetlink link and address events."""
+
+    def __init__(self):
+        self._sock: Optional[socket.socket] = None
+        self._event = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def active(self) -> bool:
+        return self._sock is not None
+
+    def start(self) -> bool:
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            sock.setblocking(False)
+            sock.bind((0, _GROUPS))
+        except (AttributeError, OSError) as e:
+            logger.info(f"rtnetlink unavailable, polling interfaces instead: {e}")
+            return False
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._drain)
+        self._sock = sock
+        return True
+
+    def stop(self) -> None:
+        if self._sock is None:
+            return
+        self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                if not self._sock.recv(_RECV_SIZE):
+                    break
+            except BlockingIOError:
+                break
+            except OSError as e:
+                # ENOBUFS: events were dropped, which still means "changed".
+                logger.debug(f"rtnetlink recv: {e}")
+                break
+        self._event.set()
+
+    async def wait(self, timeout: float, settle: float = 0.0) -> bool:
+        """Wait for a change; returns False when ``timeout`` passed without one.
+
+        Bringing a link up emits a burst of events, so after the first one
+        ``settle`` seconds are allowed for the rest to arrive.
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        if settle:
+            await asyncio.sleep(settle)
+        self._event.clear()
+        return True
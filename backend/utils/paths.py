@@ -0,0 +1,17 @@
+"""Where the backend keeps state that must survive restarts and redeploys.
+
+Everything (warm-restart snapshot, history archive, SMS store) lives under
+``STATLOG_DATA_DIR``; the default is per user (``$XDG_STATE_HOME/statlog``,
+i.e. ``~/.local/state/statlog``) so nothing lands in the working directory or,
+with Docker, in the image. Mount a volume there in containers.
+"""
+import os
+
+STATLOG_DATA_DIR = os.path.abspath(os.path.expanduser(
+    os.getenv("STATLOG_DATA_DIR")
+    or os.path.join(os.getenv("XDG_STATE_HOME") or "~/.local/state", "statlog")
+))
+
+
+def data_path(name: str) -> str:
+    return os.path.join(STATLOG_DATA_DIR, name)
@@ -0,0 +1,224 @@
+"""Collector plugins: what each one publishes, needs and mounts.
+
+Every collector is declared here with its cache keys, default interval,
+optional Python dependencies and host probe, and the router that serves it.
+Nothing heavy is imported to build the registry; a plugin's dependencies,
+collector and routes are imported only once it is enabled, so a host without
+Docker or a dongle never pays for ``docker`` or ``huawei_lte_api``.
+
+Selection is configured in the environment:
+
+    PLUGINS=auto                 enable every plugin whose dependencies and probe pass (default)
+    PLUGINS=fast,disk,docker     enable exactly these
+    PLUGINS_DISABLED=dongle,usb  never enable these
+    PLUGIN_INTERVALS=docker=10,usb=60
+"""
+import glob
+import importlib
+import importlib.util
+import logging
+import os
+import shutil
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.collectors import (
+    KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_NETWORK, KEY_NETWORK_ADDRS, KEY_SUMMARY, KEY_HISTORY,
+    KEY_STATS, KEY_THERMAL_HISTORY, KEY_HEALTH, KEY_PROCESSES, KEY_DISK, KEY_USB, KEY_DOCKER, KEY_DOCKER_HISTORY,
+    KEY_DONGLE, KEY_SMS_FORWARDER
+)
+
+logger = logging.getLogger(__name__)
+
+PLUGINS = os.getenv("PLUGINS", "auto")
+PLUGINS_DISABLED = {p.strip() for p in os.getenv("PLUGINS_DISABLED", "").split(",") if p.strip()}
+
+
+def _parse_intervals(raw: str) -> Dict[str, float]:
+    intervals = {}
+    for item in raw.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            intervals[name.strip()] = float(value)
+    return intervals
+
+
+PLUGIN_INTERVALS = _parse_intervals(os.getenv("PLUGIN_INTERVALS", ""))
+
+
+def _docker_socket() -> Optional[str]:
+    if os.getenv("DOCKER_HOST") or os.path.exists("/var/run/docker.sock"):
+        return None
+    return "no Docker socket (set DOCKER_HOST or mount /var/run/docker.sock)"
+
+
+def _lsusb() -> Optional[str]:
+    return None if shutil.which("lsusb") else "lsusb not installed"
+
+
+HUAWEI_USB_VENDOR = "12d1"
+
+
+def _huawei_modem() -> Optional[str]:
+    # A modem reached over the network (or a router in HiLink mode) is opted in with MODEM_IP.
+    if os.getenv("MODEM_IP"):
+        return None
+    for path in glob.glob("/sys/bus/usb/devices/*/idVendor"):
+        try:
+            with open(path) as f:
+                if f.read().strip().lower() == HUAWEI_USB_VENDOR:
+                    return None
+        except OSError:
+            continue
+    return "no Huawei USB modem found (set MODEM_IP to use one on the network)"
+
+
+class Plugin:
+    def __init__(
+        self,
+        name: str,
+        collector: str,
+        interval: float,
+        keys: Tuple[str, ...],
+        router: Optional[str] = None,
+        requires: Tuple[str, ...] = (),
+        probe: Optional[Callable[[], Optional[str]]] = None,
+    ):
+        self.name = name
+        self.collector = collector  # "module:function"
+        self.interval = PLUGIN_INTERVALS.get(name, interval)
+        self.keys = keys
+        self.router = router
+        self.requires = requires
+        self.probe = probe
+        self.enabled = False
+        self.reason: Optional[str] = None
+        self.import_ms: Optional[float] = None
+        self._collector_fn = None
+        self._router = None
+
+    def unavailable(self, probe: bool = True) -> Optional[str]:
+        """Why this plugin cannot run here, checked without importing anything."""
+        for module in self.requires:
+            if importlib.util.find_spec(module.split(".")[0]) is None:
+                return f"{module} not installed"
+        return self.probe() if probe and self.probe else None
+
+    def load(self) -> None:
+        """Import dependencies, collector and router, timing the imports."""
+        if self._collector_fn is not None:
+            return
+        started = time.perf_counter()
+        for module in self.requires:
+            importlib.import_module(module)
+        module_name, _, attr = self.collector.partition(":")
+        self._collector_fn = getattr(importlib.import_module(module_name), attr)
+        if self.router:
+            self._router = importlib.import_module(self.router).router
+        self.import_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def start(self):
+        return self._collector_fn(self.interval)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "enabled": self.enabled,
+            "reason": self.reason,
+            "interval": self.interval,
+            "keys": list(self.keys),
+            "requires": list(self.requires),
+            "router": self.router,
+            "import_ms": self.import_ms,
+        }
+
+
+REGISTRY: Dict[str, Plugin] = {
+    plugin.name: plugin for plugin in (
+        Plugin(
+            "fast", "utils.collectors:collect_fast", 2.0,
+            (
+                KEY_CPU, KEY_MEMORY, KEY_TEMP, KEY_NETWORK, KEY_SUMMARY, KEY_HISTORY, KEY_STATS,
+                KEY_THERMAL_HISTORY, KEY_HEALTH,
+            ),
+        ),
+        Plugin("interfaces", "utils.collectors:collect_interfaces", 300.0, (KEY_NETWORK_ADDRS,)),
+        Plugin("processes", "utils.collectors:collect_processes", 5.0, (KEY_PROCESSES,)),
+        Plugin("disk", "utils.collectors:collect_disk", 10.0, (KEY_DISK,)),
+        Plugin("health", "utils.collectors:collect_health", 30.0, ()),
+        Plugin("usb", "utils.collectors:collect_usb", 15.0, (KEY_USB,), router="routes.usb", probe=_lsusb),
+        Plugin(
+            "docker", "utils.collectors:collect_docker", 5.0, (KEY_DOCKER, KEY_DOCKER_HISTORY),
+            router="routes.docker_api", requires=("docker",), probe=_docker_socket,
+        ),
+        Plugin(
+            "dongle", "utils.collectors:collect_dongle", 5.0, (KEY_DONGLE, KEY_SMS_FORWARDER),
+            router="routes.dongle", requires=("huawei_lte_api.Client",), probe=_huawei_modem,
+        ),
+    )
+}
+
+
+def resolve(names: Optional[Iterable[str]] = None) -> List[Plugin]:
+    """Decide which plugins run, load them and return the enabled ones.
+
+    ``names`` (or PLUGINS when it is not ``auto``) lists plugins explicitly;
+    explicitly named plugins skip the host probe but still need their
+    dependencies installed.
+    """
+    if names is None and PLUGINS.strip() != "auto":
+        names = [n.strip() for n in PLUGINS.split(",") if n.strip()]
+    explicit = set(names) if names is not None else None
+    if explicit is not None:
+        for name in explicit - set(REGISTRY):
+            logger.warning(f"unknown plugin {name!r} ignored")
+
+    enabled = []
+    for plugin in REGISTRY.values():
+        plugin.enabled, plugin.reason = False, None
+        if plugin.name in PLUGINS_DISABLED:
+            plugin.reason = "disabled by PLUGINS_DISABLED"
+        elif explicit is not None and plugin.name not in explicit:
+            plugin.reason = "not listed"
+        else:
+            plugin.reason = plugin.unavailable(probe=explicit is None)
+        if plugin.reason:
+            continue
+        try:
+            plugin.load()
+        except Exception as e:
+            plugin.reason = f"import failed: {e}"
+            logger.error(f"plugin {plugin.name} failed to load: {e}")
+            continue
+        plugin.enabled = True
+        enabled.append(plugin)
+    return enabled
+
+
+_active: Optional[List[Plugin]] = None
+
+
+def active() -> List[Plugin]:
+    """The plugins enabled by configuration, resolved once per process."""
+    global _active
+    if _active is None:
+        _active = resolve()
+    return _active
+
+
+def routers(plugins: Iterable[Plugin]) -> List[Any]:
+    return [plugin._router for plugin in plugins if plugin._router is not None]
+
+
+def report() -> List[Dict[str, Any]]:
+    return [plugin.describe() for plugin in REGISTRY.values()]
+
+
+def report_lines() -> List[str]:
+    lines = []
+    for plugin in REGISTRY.values():
+        if plugin.enabled:
+            lines.append(f"plugin {plugin.name}: every {plugin.interval:g}s, imported in {plugin.import_ms} ms")
+        else:
+            lines.append(f"plugin {plugin.name}: off ({plugin.reason})")
+    return lines
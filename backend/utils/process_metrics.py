@@ -0,0 +1,165 @@
+"""Incremental per-process sampler for the top-N process lists.
+
+Each tick reads one ``/proc/<pid>/stat`` per process; RSS comes from the same
+line, so ``statm`` is not needed. Name, cmdline and start time are read once
+per process and reused until the pid disappears or is recycled (different
+start time). ``/proc/<pid>/io`` is only read for processes whose CPU time
+moved since the previous tick, and never again once it was denied.
+"""
+import heapq
+import os
+import time
+from typing import Any, Dict, Optional
+
+from utils.system_metrics import HOST_ROOT
+
+# Inside the container /proc only shows our own pid namespace; the host's
+# procfs is reachable through the read-only host root mount.
+_HOST_PROC = os.path.join(HOST_ROOT, "proc")
+PROC_ROOT = os.getenv("PROC_ROOT") or (_HOST_PROC if os.path.isdir(os.path.join(_HOST_PROC, "1")) else "/proc")
+
+TOP_N = int(os.getenv("PROCESS_TOP_N", "10"))
+CMDLINE_MAX = 200
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _read(path: str, size: int = 4096) -> Optional[bytes]:
+    """One read() of a small procfs file; cheaper than open() for hundreds of files."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, size)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def _mem_total() -> int:
+    data = _read(os.path.join(PROC_ROOT, "meminfo"), 65536) or b""
+    for line in data.splitlines():
+        if line.startswith(b"MemTotal:"):
+            return int(line.split()[1]) * 1024
+    return 0
+
+
+class _Proc:
+    __slots__ = (
+        "pid", "start", "name", "cmdline", "state", "ticks", "rss",
+        "cpu_percent", "io_read", "io_write", "read_rate", "write_rate", "io_denied",
+    )
+
+    def __init__(self, pid: int, start: int, name: str):
+        self.pid = pid
+        self.start = start
+        self.name = name
+        self.cmdline = None
+        self.state = ""
+        self.ticks = None
+        self.rss = 0
+        self.cpu_percent = 0.0
+        self.io_read = None
+        self.io_write = None
+        self.read_rate = 0.0
+        self.write_rate = 0.0
+        self.io_denied = False
+
+
+class ProcessTracker:
+    def __init__(self, proc_root: str = PROC_ROOT, top_n: int = TOP_N):
+        self.proc_root = proc_root
+        self.top_n = top_n
+        self._procs: Dict[int, _Proc] = {}
+        self._last: Optional[float] = None
+        self._mem_total = _mem_total()
+
+    def _cmdline(self, proc: _Proc) -> str:
+        raw = _read(f"{self.proc_root}/{proc.pid}/cmdline") or b""
+        cmdline = raw.replace(b"\0", b" ").strip().decode("utf-8", "replace")
+        # Kernel threads have no cmdline; show them the way ps does.
+        return cmdline[:CMDLINE_MAX] if cmdline else f"[{proc.name}]"
+
+    def _read_io(self, proc: _Proc, elapsed: Optional[float]) -> None:
+        raw = _read(f"{self.proc_root}/{proc.pid}/io")
+        if raw is None:
+            proc.io_denied = True
+            proc.read_rate = proc.write_rate = 0.0
+            return
+        read_bytes = write_bytes = 0
+        for line in raw.splitlines():
+            if line.startswith(b"read_bytes:"):
+                read_bytes = int(line[11:])
+            elif line.startswith(b"write_bytes:"):
+                write_bytes = int(line[12:])
+        if elapsed and proc.io_read is not None:
+            proc.read_rate = max(0, read_bytes - proc.io_read) / elapsed
+            proc.write_rate = max(0, write_bytes - proc.io_write) / elapsed
+        proc.io_read, proc.io_write = read_bytes, write_bytes
+
+    def sample(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        elapsed = now - self._last if self._last is not None else None
+        self._last = now
+        seen: Dict[int, _Proc] = {}
+
+        for entry in os.scandir(self.proc_root):
+            if not entry.name.isdigit():
+                continue
+            pid = int(entry.name)
+            raw = _read(f"{entry.path}/stat")
+            if not raw:
+                continue
+            # comm may contain spaces and parentheses; it ends at the last ')'.
+            head, _, tail = raw.rpartition(b")")
+            fields = tail.split()
+            try:
+                ticks = int(fields[11]) + int(fields[12])
+                start = int(fields[19])
+                rss = int(fields[21]) * _PAGE_SIZE
+            except (IndexError, ValueError):
+                continue
+
+            proc = self._procs.get(pid)
+            if proc is None or proc.start != start:
+                proc = _Proc(pid, start, head.partition(b"(")[2].decode("utf-8", "replace"))
+                proc.cmdline = self._cmdline(proc)
+            moved = proc.ticks is None or ticks != proc.ticks
+            if elapsed and proc.ticks is not None:
+                proc.cpu_percent = (ticks - proc.ticks) / _CLK_TCK / elapsed * 100
+            proc.ticks = ticks
+            proc.rss = rss
+            proc.state = fields[0].decode()
+            if moved and not proc.io_denied:
+                self._read_io(proc, elapsed)
+            else:
+                # Did not run since the last tick, so it issued no I/O either.
+                proc.read_rate = proc.write_rate = 0.0
+            seen[pid] = proc
+
+        self._procs = seen
+        procs = seen.values()
+        return {
+            "count": len(seen),
+            "top_cpu": [self._describe(p) for p in heapq.nlargest(self.top_n, procs, key=lambda p: p.cpu_percent)],
+            "top_memory": [self._describe(p) for p in heapq.nlargest(self.top_n, procs, key=lambda p: p.rss)],
+            "top_io": [self._describe(p) for p in heapq.nlargest(
+                self.top_n, procs, key=lambda p: p.read_rate + p.write_rate
+            )],
+        }
+
+    def _describe(self, proc: _Proc) -> Dict[str, Any]:
+        return {
+            "pid": proc.pid,
+            "name": proc.name,
+            "cmdline": proc.cmdline,
+            "state": proc.state,
+            "cpu_percent": round(proc.cpu_percent, 1),
+            "rss": proc.rss,
+            "memory_percent": round(proc.rss / self._mem_total * 100, 1) if self._mem_total else 0.0,
+            "io_read_per_sec": round(proc.read_rate),
+            "io_write_per_sec": round(proc.write_rate),
+        }
@@ -0,0 +1,105 @@
+"""Sparse fieldsets for cache-backed responses.
+
+``fields=cpu.overall_usage,memory.percent,network.stats.*.bytes_recv`` keeps
+only those dotted paths. Lists are projected element-wise, so
+``containers.name,containers.state.Status`` works on the Docker list, and
+``*`` matches every key of a dict (e.g. interface names).
+"""
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Union
+
+from fastapi import HTTPException
+
+# A compiled projection is a nested dict of path segments; True marks a kept leaf.
+Projection = Union[bool, Dict[str, Any]]
+
+WILDCARD = "*"
+
+
+def _split(fields: str) -> Tuple[str, ...]:
+    return tuple(sorted({part.strip() for part in fields.split(",") if part.strip()}))
+
+
+@lru_cache(maxsize=256)
+def _compile(paths: Tuple[str, ...]) -> Projection:
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        segments = path.split(".")
+        if any(not segment for segment in segments):
+            raise ValueError(f"Invalid field path: {path!r}")
+        node = tree
+        for segment in segments[:-1]:
+            child = node.get(segment)
+            if child is True:
+                break
+            if child is None:
+                child = node[segment] = {}
+            node = child
+        else:
+            node[segments[-1]] = True
+    _spread_wildcards(tree)
+    return tree
+
+
+def _merge(a: Projection, b: Projection) -> Projection:
+    if a is True or b is True:
+        return True
+    merged = {key: _merge(value, {}) for key, value in a.items()}
+    for key, value in b.items():
+        merged[key] = _merge(merged[key], value) if key in merged else _merge(value, {})
+    return merged
+
+
+def _spread_wildcards(node: Projection) -> None:
+    # A named key next to ``*`` must keep what the wildcard selects as well:
+    # ``*.x,a.y`` keeps both ``a.x`` and ``a.y``.
+    if node is True:
+        return
+    wildcard = node.get(WILDCARD)
+    for key in node:
+        if wildcard is not None and key != WILDCARD:
+            node[key] = _merge(node[key], wildcard)
+        _spread_wildcards(node[key])
+
+
+@lru_cache(maxsize=256)
+def compile_fields(fields: Optional[str]) -> Optional[Projection]:
+    """Parse a ``fields=`` value; equal field sets share one cached projection."""
+    if not fields:
+        return None
+    paths = _split(fields)
+    if not paths:
+        return None
+    return _compile(paths)
+
+
+def project(data: Any, tree: Optional[Projection]) -> Any:
+    if tree is None or tree is True:
+        return data
+    if isinstance(data, list):
+        return [project(item, tree) for item in data]
+    if not isinstance(data, dict):
+        return data
+    result = {}
+    wildcard = tree.get(WILDCARD)
+    if wildcard is not None:
+        for key, value in data.items():
+            result[key] = project(value, wildcard)
+    for key, sub in tree.items():
+        if key != WILDCARD and key in data:
+            result[key] = project(data[key], sub)
+    return result
+
+
+def project_snapshot(snapshot: Dict[str, Any], tree: Optional[Projection]) -> Dict[str, Any]:
+    if tree is None:
+        return snapshot
+    return {**snapshot, "data": project(snapshot.get("data"), tree)}
+
+
+def fields_param(fields: str = "") -> Optional[Projection]:
+    """FastAPI dependency turning ``?fields=`` into a compiled projection."""
+    try:
+        return compile_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
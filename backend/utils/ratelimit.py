@@ -0,0 +1,130 @@
+"""Login throttling, checked before any password hashing is done.
+
+Each client IP gets a budget of attempts, and each (username, IP) pair a small
+budget of failures per window, so a password-guessing loop is refused cheaply
+instead of queueing bcrypt work. Guessing one account from many addresses runs
+into a higher per-username ceiling instead. Addresses that logged in to that
+account recently are exempt from the ceiling, so someone else's failures
+cannot lock the owner out from where they normally log in.
+"""
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+LOGIN_WINDOW = float(os.getenv("LOGIN_WINDOW", "300"))
+LOGIN_MAX_PER_IP = int(os.getenv("LOGIN_MAX_PER_IP", "20"))
+LOGIN_MAX_FAILURES_PER_USER_IP = int(os.getenv("LOGIN_MAX_FAILURES_PER_USER_IP", "5"))
+LOGIN_MAX_FAILURES_PER_USER = int(os.getenv("LOGIN_MAX_FAILURES_PER_USER", "50"))
+LOGIN_TRUSTED_FOR = float(os.getenv("LOGIN_TRUSTED_FOR", str(7 * 24 * 3600)))
+# Upper bound on tracked keys so a spray of usernames or addresses cannot grow memory.
+_MAX_KEYS = 10000
+
+
+class SlidingCounter:
+    """Event timestamps per key within the last ``window`` seconds."""
+
+    def __init__(self, window: float, limit: int):
+        self.window = window
+        self.limit = limit
+        self._events: "OrderedDict[str, deque]" = OrderedDict()
+
+    def _live(self, key: str, now: float) -> Optional[deque]:
+        events = self._events.get(key)
+        if events is None:
+            return None
+        while events and events[0] <= now - self.window:
+            events.popleft()
+        if not events:
+            del self._events[key]
+            return None
+        return events
+
+    def retry_after(self, key: str, now: Optional[float] = None) -> float:
+        """Seconds until ``key`` is under its limit again (0 when it already is)."""
+        now = now if now is not None else time.monotonic()
+        events = self._live(key, now)
+        if events is None or len(events) < self.limit:
+            return 0.0
+        return events[-self.limit] + self.window - now
+
+    def add(self, key: str, now: Optional[float] = None) -> None:
+        now = now if now is not None else time.monotonic()
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque(maxlen=self.limit)
+        events.append(now)
+        self._events.move_to_end(key)
+        while len(self._events) > _MAX_KEYS:
+            self._events.popitem(last=False)
+
+    def clear(self, key: str) -> None:
+        self._events.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+class LoginLimiter:
+    def __init__(
+        self,
+        window: float = LOGIN_WINDOW,
+        per_ip: int = LOGIN_MAX_PER_IP,
+        per_user_ip: int = LOGIN_MAX_FAILURES_PER_USER_IP,
+        per_user: int = LOGIN_MAX_FAILURES_PER_USER,
+        trusted_for: float = LOGIN_TRUSTED_FOR,
+    ):
+        self.attempts = SlidingCounter(window, per_ip)
+        self.failures = SlidingCounter(window, per_user_ip)
+        self.user_failures = SlidingCounter(window, per_user)
+        self.trusted_for = trusted_for
+        # (username, ip) -> monotonic time of the last successful login from there.
+        self._trusted: "OrderedDict[tuple, float]" = OrderedDict()
+        self.refused = 0
+
+    def _is_trusted(self, ip: str, username: str, now: float) -> bool:
+        since = self._trusted.get((username, ip))
+        if since is None:
+            return False
+        if now - since > self.trusted_for:
+            del self._trusted[(username, ip)]
+            return False
+        return True
+
+    def check(self, ip: str, username: str) -> float:
+        """Record an attempt; returns a Retry-After in seconds if it must be refused."""
+        now = time.monotonic()
+        wait = max(self.attempts.retry_after(ip, now), self.failures.retry_after(f"{username}\0{ip}", now))
+        if not self._is_trusted(ip, username, now):
+            wait = max(wait, self.user_failures.retry_after(username, now))
+        if wait > 0:
+            self.refused += 1
+            return wait
+        self.attempts.add(ip, now)
+        return 0.0
+
+    def failed(self, ip: str, username: str) -> None:
+        now = time.monotonic()
+        self.failures.add(f"{username}\0{ip}", now)
+        self.user_failures.add(username, now)
+
+    def succeeded(self, ip: str, username: str) -> None:
+        # The per-username ceiling is left alone: a login by the owner does not
+        # reset the budget of someone guessing from elsewhere.
+        self.failures.clear(f"{username}\0{ip}")
+        self._trusted[(username, ip)] = time.monotonic()
+        self._trusted.move_to_end((username, ip))
+        while len(self._trusted) > _MAX_KEYS:
+            self._trusted.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "tracked_ips": len(self.attempts),
+            "tracked_users": len(self.user_failures),
+            "tracked_user_ips": len(self.failures),
+            "trusted": len(self._trusted),
+            "refused": self.refused,
+        }
+
+
+login_limiter = LoginLimiter()
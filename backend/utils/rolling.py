@@ -0,0 +1,117 @@
+"""Time-based sliding windows with O(1) amortised updates.
+
+Mean comes from a running sum; min and max from monotonic deques, so each
+sample is appended and evicted at most once per structure. Quantiles use an
+optional fixed-bin histogram, which (unlike most streaming sketches) also
+supports removing the samples that age out of the window.
+"""
+import math
+from collections import deque
+from typing import Optional
+
+# Re-add the window from scratch now and then so float error in the running
+# sum cannot accumulate over weeks of uptime.
+_RESUM_EVERY = 4096
+
+
+class BinnedHistogram:
+    """Counts per fixed-width bin over [lo, hi]; values outside are clamped."""
+
+    def __init__(self, lo: float, hi: float, width: float):
+        self.lo = lo
+        self.width = width
+        self._counts = [0] * (int(math.ceil((hi - lo) / width)) + 1)
+        self.total = 0
+
+    def _bin(self, value: float) -> int:
+        return min(max(int((value - self.lo) / self.width), 0), len(self._counts) - 1)
+
+    def add(self, value: float) -> None:
+        self._counts[self._bin(value)] += 1
+        self.total += 1
+
+    def remove(self, value: float) -> None:
+        self._counts[self._bin(value)] -= 1
+        self.total -= 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper edge of the bin holding the q-quantile (error below one bin width)."""
+        if not self.total:
+            return None
+        # High quantiles are what is asked for, so walk down from the top bin.
+        above = self.total - max(1, math.ceil(q * self.total))
+        seen = 0
+        for index in range(len(self._counts) - 1, -1, -1):
+            seen += self._counts[index]
+            if seen > above:
+                return self.lo + (index + 1) * self.width
+        return self.lo
+
+
+class SlidingWindow:
+    def __init__(self, seconds: float, histogram: Optional[BinnedHistogram] = None):
+        self.seconds = seconds
+        self.histogram = histogram
+        self._values: deque = deque()
+        self._min: deque = deque()
+        self._max: deque = deque()
+        self._sum = 0.0
+        self._evicted = 0
+        # True once a sample has aged out, i.e. the window spans its full length.
+        self.saturated = False
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def push(self, ts: float, value: float) -> None:
+        self._values.append((ts, value))
+        self._sum += value
+        if self.histogram is not None:
+            self.histogram.add(value)
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((ts, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((ts, value))
+        self.evict(ts)
+
+    def evict(self, now: float) -> None:
+        cutoff = now - self.seconds
+        values = self._values
+        while values and values[0][0] <= cutoff:
+            old = values.popleft()[1]
+            self._sum -= old
+            if self.histogram is not None:
+                self.histogram.remove(old)
+            self._evicted += 1
+            self.saturated = True
+        while self._min and self._min[0][0] <= cutoff:
+            self._min.popleft()
+        while self._max and self._max[0][0] <= cutoff:
+            self._max.popleft()
+        if self._evicted >= _RESUM_EVERY:
+            self._sum = math.fsum(value for _, value in values)
+            self._evicted = 0
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._sum / len(self._values) if self._values else None
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    @property
+    def last(self) -> Optional[float]:
+        return self._values[-1][1] if self._values else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.histogram is None or not self._values:
+            return None
+        # The exact extremes bound the binned estimate.
+        return min(max(self.histogram.quantile(q), self.min), self.max)
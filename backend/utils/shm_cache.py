@@ -0,0 +1,364 @@
+"""Cross-process cache backed by a memory-mapped file.
+
+One collector process (``collector.py``) owns the segment and publishes every
+``cache_store.set`` into it; uvicorn workers map the same file read-only and
+serve from it, so ``uvicorn --workers N`` does not start N copies of every
+collector.
+
+Layout (little endian)::
+
+    header  64 bytes   magic, slot count, data size, batch seq (u64 at 32)
+    slots   SLOT_COUNT x 128 bytes
+            key (96 bytes, utf-8, NUL padded) | seq u64 | offset u64 | length u32 | capacity u32
+    data    payload regions handed out by a bump allocator
+
+Each slot is a seqlock: the writer bumps ``seq`` to an odd value, rewrites the
+payload and then offset/length, and only then bumps ``seq`` to the next even
+value. Readers load ``seq``, then the location, copy the payload and retry if
+``seq`` was odd or changed underneath them. ``set_many`` additionally wraps its slot writes in
+the header batch seqlock so ``get_many`` can read several keys from one
+generation. There is a single writer, so no cross-process lock is needed.
+
+Readers cannot write the segment. When a worker needs the writer to publish
+something now (e.g. a container it just restarted), ``send_to_writer`` drops a
+JSON datagram on the Unix socket ``<CACHE_SHM_PATH>.sock``, where
+``serve_writer_requests`` in the collector process picks it up.
+"""
+import asyncio
+import json
+import logging
+import mmap
+import os
+import socket
+import struct
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from utils.cache_store import CacheEntry, CacheItem, CacheStore
+
+logger = logging.getLogger(__name__)
+
+SHM_PATH = os.getenv("CACHE_SHM_PATH", "/dev/shm/statlog-cache")
+SHM_SIZE = int(os.getenv("CACHE_SHM_SIZE", str(16 * 1024 * 1024)))
+
+MAGIC = b"STLGSHM1"
+HEADER = struct.Struct("<8sIIQ")
+HEADER_SIZE = 64
+BATCH_SEQ_OFFSET = 32
+SLOT_COUNT = 128
+SLOT_SIZE = 128
+KEY_SIZE = 96
+SLOT_META = struct.Struct("<QQII")  # seq, offset, length, capacity
+SEQ = struct.Struct("<Q")
+LOCATION = struct.Struct("<QII")
+MIN_REGION = 1024
+READ_RETRIES = 64
+REMAP_CHECK_INTERVAL = 1.0
+CONTROL_PATH = f"{SHM_PATH}.sock"
+
+
+def _slot_offset(index: int) -> int:
+    return HEADER_SIZE + index * SLOT_SIZE
+
+
+class SharedSegment:
+    def __init__(self, path: str = SHM_PATH, size: int = SHM_SIZE, create: bool = False):
+        self.path = path
+        self.size = size
+        self.mm: Optional[mmap.mmap] = None
+        self.inode: Optional[int] = None
+        self.mapping_id = 0
+        self._slots: Dict[str, int] = {}
+        self._bump = HEADER_SIZE + SLOT_COUNT * SLOT_SIZE
+        self._next_remap_check = 0.0
+        if create:
+            self._create()
+
+    def _create(self) -> None:
+        # Build the new segment beside the old one and rename it into place so
+        # readers still mapping a previous collector's file never see a
+        # truncated mapping; they notice the inode change and remap.
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, self.size)
+            self.mm = mmap.mmap(fd, self.size)
+            HEADER.pack_into(self.mm, 0, MAGIC, SLOT_COUNT, SLOT_SIZE, self.size)
+            os.replace(tmp_path, self.path)
+            self.inode = os.fstat(fd).st_ino
+        finally:
+            os.close(fd)
+
+    def _attach(self) -> bool:
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        try:
+            size = os.fstat(fd).st_size
+            if size < HEADER_SIZE + SLOT_COUNT * SLOT_SIZE:
+                return False
+            mm = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+            if HEADER.unpack_from(mm, 0)[0] != MAGIC:
+                mm.close()
+                return False
+            if self.mm is not None:
+                self.mm.close()
+            self.mm = mm
+            self.size = size
+            self.inode = os.fstat(fd).st_ino
+            self.mapping_id += 1
+            self._slots = {}
+            return True
+        finally:
+            os.close(fd)
+
+    def _ensure_attached(self) -> bool:
+        now = time.monotonic()
+        if self.mm is not None and now < self._next_remap_check:
+            return True
+        self._next_remap_check = now + REMAP_CHECK_INTERVAL
+        try:
+            current_inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return self.mm is not None
+        if self.mm is None or current_inode != self.inode:
+            return self._attach()
+        return True
+
+    def _find_slot(self, key: str) -> Optional[int]:
+        index = self._slots.get(key)
+        if index is not None:
+            return index
+        raw_key = key.encode("utf-8")
+        for i in range(SLOT_COUNT):
+            off = _slot_offset(i)
+            stored = self.mm[off:off + KEY_SIZE].rstrip(b"\0")
+            if not stored:
+                break
+            if stored == raw_key:
+                self._slots[key] = i
+                return i
+        return None
+
+    def publish(self, key: str, payload: bytes) -> None:
+        raw_key = key.encode("utf-8")
+        if len(raw_key) > KEY_SIZE:
+            raise ValueError(f"cache key too long for shared segment: {key}")
+        index = self._find_slot(key)
+        if index is None:
+            index = len(self._slots)
+            if index >= SLOT_COUNT:
+                raise RuntimeError("shared cache segment has no free slots")
+            self.mm[_slot_offset(index):_slot_offset(index) + KEY_SIZE] = raw_key.ljust(KEY_SIZE, b"\0")
+            self._slots[key] = index
+
+        meta_off = _slot_offset(index) + KEY_SIZE
+        seq, offset, _length, capacity = SLOT_META.unpack_from(self.mm, meta_off)
+        if len(payload) > capacity:
+            # Old regions are abandoned rather than reused; doubling keeps the
+            # total waste below the size of the live data.
+            new_capacity = max(MIN_REGION, len(payload) * 2)
+            if self._bump + new_capacity > self.size:
+                raise RuntimeError(f"shared cache segment full; raise CACHE_SHM_SIZE (key {key})")
+            offset, capacity = self._bump, new_capacity
+            self._bump += new_capacity
+        SEQ.pack_into(self.mm, meta_off, seq + 1)
+        self.mm[offset:offset + len(payload)] = payload
+        LOCATION.pack_into(self.mm, meta_off + SEQ.size, offset, len(payload), capacity)
+        SEQ.pack_into(self.mm, meta_off, seq + 2)
+
+    def _bump_batch_seq(self) -> None:
+        SEQ.pack_into(self.mm, BATCH_SEQ_OFFSET, SEQ.unpack_from(self.mm, BATCH_SEQ_OFFSET)[0] + 1)
+
+    def begin_batch(self) -> None:
+        self._bump_batch_seq()
+
+    def end_batch(self) -> None:
+        self._bump_batch_seq()
+
+    def batch_seq(self) -> Optional[int]:
+        if not self._ensure_attached():
+            return None
+        return SEQ.unpack_from(self.mm, BATCH_SEQ_OFFSET)[0]
+
+    def read(self, key: str) -> Optional[Tuple[int, bytes]]:
+        if not self._ensure_attached():
+            return None
+        index = self._find_slot(key)
+        if index is None:
+            return None
+        meta_off = _slot_offset(index) + KEY_SIZE
+        for _ in range(READ_RETRIES):
+            seq = SEQ.unpack_from(self.mm, meta_off)[0]
+            if seq == 0:
+                return None
+            if seq & 1:
+                continue
+            offset, length, _capacity = LOCATION.unpack_from(self.mm, meta_off + SEQ.size)
+            payload = self.mm[offset:offset + length]
+            if SEQ.unpack_from(self.mm, meta_off)[0] == seq:
+                return seq, payload
+        return None
+
+    def seq(self, key: str) -> Optional[int]:
+        if not self._ensure_attached():
+            return None
+        index = self._find_slot(key)
+        if index is None:
+            return None
+        return SEQ.unpack_from(self.mm, _slot_offset(index) + KEY_SIZE)[0]
+
+
+def _encode(entry: CacheEntry) -> bytes:
+    return json.dumps({
+        "data": entry.data,
+        "ttl": entry.ttl,
+        "stale_ttl": entry.stale_ttl,
+        "updated_at": entry.updated_at,
+        "generation": entry.generation,
+    }, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _decode(payload: bytes) -> CacheEntry:
+    raw = json.loads(payload)
+    return CacheEntry(
+        raw["data"],
+        ttl=raw["ttl"],
+        stale_ttl=raw["stale_ttl"],
+        updated_at=raw["updated_at"],
+        generation=raw.get("generation", 0),
+    )
+
+
+def _newest(local: Optional[CacheEntry], shared: Optional[CacheEntry]) -> Optional[CacheEntry]:
+    if local is None:
+        return shared
+    if shared is None or local.updated_at >= shared.updated_at:
+        return local
+    return shared
+
+
+class SharedCacheStore(CacheStore):
+    """CacheStore that mirrors writes into, or serves reads from, a SharedSegment.
+
+    ``role="writer"`` is used by the collector process: it behaves like the
+    in-process store and additionally publishes every write. ``role="reader"``
+    is used by HTTP workers: reads come from the segment, decoded once per
+    published version, while local writes (e.g. the SMTP test route) stay
+    in-process and win while they are newer than the shared copy.
+    """
+
+    def __init__(self, role: str, path: str = SHM_PATH, size: int = SHM_SIZE):
+        super().__init__()
+        self.role = role
+        self.segment = SharedSegment(path, size, create=(role == "writer"))
+        self._decoded: Dict[str, Tuple[Tuple[int, int], CacheEntry]] = {}
+
+    def set_many(self, items: Dict[str, CacheItem]) -> int:
+        generation = super().set_many(items)
+        if self.role != "writer":
+            return generation
+        published = super().get_many(items.keys())
+        self.segment.begin_batch()
+        try:
+            for key, entry in published.items():
+                self.segment.publish(key, _encode(entry))
+        except (RuntimeError, ValueError, TypeError) as e:
+            logger.error(f"shared cache publish failed: {e}")
+        finally:
+            self.segment.end_batch()
+        return generation
+
+    def _shared_entry(self, key: str) -> Optional[CacheEntry]:
+        seq = self.segment.seq(key)
+        if seq is None:
+            return None
+        cached = self._decoded.get(key)
+        if cached and cached[0] == (self.segment.mapping_id, seq):
+            return cached[1]
+        result = self.segment.read(key)
+        if result is None:
+            return cached[1] if cached else None
+        seq, payload = result
+        try:
+            entry = _decode(payload)
+        except ValueError:
+            return cached[1] if cached else None
+        self._decoded[key] = ((self.segment.mapping_id, seq), entry)
+        return entry
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        local = super().get(key)
+        if self.role == "writer":
+            return local
+        return _newest(local, self._shared_entry(key))
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[CacheEntry]]:
+        keys = list(keys)
+        local = super().get_many(keys)
+        if self.role == "writer":
+            return local
+        # Retry until no set_many batch overlapped the reads, so keys written
+        # together by a collector are seen together.
+        shared: Dict[str, Optional[CacheEntry]] = {}
+        for _ in range(READ_RETRIES):
+            before = self.segment.batch_seq()
+            if before is not None and before & 1:
+                time.sleep(0)
+                continue
+            shared = {key: self._shared_entry(key) for key in keys}
+            if before is None or self.segment.batch_seq() == before:
+                break
+        else:
+            logger.warning("shared cache get_many gave up waiting for a consistent batch")
+        return {key: _newest(local[key], shared.get(key)) for key in keys}
+
+
+def send_to_writer(message: Dict[str, Any], path: str = CONTROL_PATH) -> bool:
+    """Queue a request for the writer process without waiting; False if it could not be sent."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            # A full queue or a missing writer drops the request; the writer's next regular pass catches up.
+            sock.setblocking(False)
+            sock.sendto(json.dumps(message).encode(), path)
+        return True
+    except OSError as e:
+        logger.warning(f"request to cache writer at {path} dropped: {e}")
+        return False
+
+
+class _WriterRequests(asyncio.DatagramProtocol):
+    def __init__(self, handler: Callable[[Dict[str, Any]], Awaitable[None]]):
+        self.handler = handler
+        self.tasks = set()
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if isinstance(message, dict):
+            task = asyncio.create_task(self.handler(message), name="writer-request")
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+
+async def serve_writer_requests(handler: Callable[[Dict[str, Any]], Awaitable[None]], path: str = CONTROL_PATH):
+    """Run ``handler`` for every ``send_to_writer`` message until cancelled."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _WriterRequests(handler), local_addr=path, family=socket.AF_UNIX,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        transport.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,210 @@
+"""Local copy of the dongle's SMS inbox, synced incrementally.
+
+Messages live in a small SQLite database keyed by modem index, with a hash of
+sender, date and text to notice when the modem reuses an index for a new
+message. ``sync_inbox`` first compares the modem's counters with the store
+and does nothing when they match. Otherwise it pages through the inbox newest
+first and stops at the first message it already has unchanged. A full pass
+that also drops deleted messages runs when the counters still disagree
+afterwards, and every ``SMS_FULL_SYNC_INTERVAL`` seconds.
+
+The API pages and searches the store instead of shipping the whole inbox with
+every status poll.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.paths import data_path
+
+# Kept across redeploys: it records which messages were already forwarded by email.
+SMS_DB_PATH = os.getenv("SMS_DB_PATH", data_path("statlog-sms.db"))
+SMS_PAGE_SIZE = int(os.getenv("SMS_PAGE_SIZE", "20"))
+SMS_FULL_SYNC_INTERVAL = float(os.getenv("SMS_FULL_SYNC_INTERVAL", "600"))
+# The modem inbox holds a few hundred messages at most; this only guards against a modem that never ends a listing.
+SMS_MAX_PAGES = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sms (
+    idx INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL,
+    phone TEXT,
+    content TEXT,
+    raw_date TEXT,
+    timestamp TEXT,
+    unread INTEGER NOT NULL DEFAULT 0,
+    forwarded INTEGER NOT NULL DEFAULT 0,
+    seen_at REAL
+);
+CREATE INDEX IF NOT EXISTS sms_by_date ON sms (raw_date DESC, idx DESC);
+CREATE INDEX IF NOT EXISTS sms_pending ON sms (unread, forwarded);
+"""
+
+_COLUMNS = "idx, phone, content, raw_date, timestamp, unread"
+
+
+def message_hash(message: Dict[str, Any]) -> str:
+    key = "\x1f".join(str(message.get(k) or "") for k in ("phone", "raw_date", "content"))
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _item(row) -> Dict[str, Any]:
+    # Same shape the status payload used to carry per message.
+    return {
+        "index": str(row[0]),
+        "from": row[1],
+        "message": row[2],
+        "raw_timestamp": row[3],
+        "timestamp": row[4] or row[3],
+        "unread": bool(row[5]),
+    }
+
+
+class SmsStore:
+    def __init__(self, path: str = SMS_DB_PATH):
+        self.path = path
+        self.last_full_sync = 0.0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use, so installs without a dongle never create the file.
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def known(self) -> Dict[int, tuple]:
+        """index -> (hash, unread) for every stored message."""
+        with self._lock:
+            return {idx: (h, bool(unread)) for idx, h, unread in self._db().execute("SELECT idx, hash, unread FROM sms")}
+
+    def apply(self, upserts: List[Dict[str, Any]], read_changes: Dict[int, bool], removed: List[int]) -> None:
+        """Write one sync's changes in a single transaction."""
+        now = time.time()
+        with self._lock, self._db() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO sms (idx, hash, phone, content, raw_date, timestamp, unread, forwarded, seen_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)",
+                [
+                    (m["index"], message_hash(m), m["phone"], m["content"], m["raw_date"], m["timestamp"], int(m["unread"]), now)
+                    for m in upserts
+                ],
+            )
+            db.executemany("UPDATE sms SET unread = ? WHERE idx = ?", [(int(u), idx) for idx, u in read_changes.items()])
+            db.executemany("DELETE FROM sms WHERE idx = ?", [(idx,) for idx in removed])
+
+    def mark_forwarded(self, index: int, read: bool) -> None:
+        with self._lock, self._db() as db:
+            if read:
+                db.execute("UPDATE sms SET forwarded = 1, unread = 0 WHERE idx = ?", (index,))
+            else:
+                db.execute("UPDATE sms SET forwarded = 1 WHERE idx = ?", (index,))
+
+    def delete(self, index: int) -> None:
+        with self._lock, self._db() as db:
+            db.execute("DELETE FROM sms WHERE idx = ?", (index,))
+
+    def pending_forward(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT {_COLUMNS} FROM sms WHERE unread = 1 AND forwarded = 0 ORDER BY raw_date, idx"
+            ).fetchall()
+        return [_item(row) for row in rows]
+
+    def counts(self) -> Dict[str, Any]:
+        with self._lock:
+            total, unread, latest = self._db().execute(
+                "SELECT COUNT(*), COALESCE(SUM(unread), 0), MAX(raw_date) FROM sms"
+            ).fetchone()
+        return {"total": total, "unread": unread, "latest_raw_timestamp": latest}
+
+    def page(self, offset: int = 0, limit: int = 20, query: str = "", unread_only: bool = False) -> Dict[str, Any]:
+        """Newest first; ``query`` matches sender or text (case-insensitive for ASCII)."""
+        where, params = [], []
+        if query:
+            pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where.append("(phone LIKE ? ESCAPE '\\' OR content LIKE ? ESCAPE '\\')")
+            params += [pattern, pattern]
+        if unread_only:
+            where.append("unread = 1")
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        with self._lock:
+            db = self._db()
+            total = db.execute(f"SELECT COUNT(*) FROM sms{clause}", params).fetchone()[0]
+            rows = db.execute(
+                f"SELECT {_COLUMNS} FROM sms{clause} ORDER BY raw_date DESC, idx DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return {"total": total, "offset": offset, "limit": limit, "items": [_item(row) for row in rows]}
+
+
+def sync_inbox(
+    store: SmsStore,
+    fetch_page: Callable[[int], List[Dict[str, Any]]],
+    modem_counts: Optional[Dict[str, int]] = None,
+    full: bool = False,
+) -> Dict[str, Any]:
+    """Bring ``store`` in line with the modem inbox; blocking, run it in a thread.
+
+    ``fetch_page(n)`` returns page ``n`` (1-based) of the inbox, newest first,
+    as dicts with index/phone/content/raw_date/timestamp/unread.
+    ``modem_counts`` holds ``total``/``unread`` from the modem's counters.
+    """
+    due = time.time() - store.last_full_sync >= SMS_FULL_SYNC_INTERVAL
+    full = full or due
+    if not full and modem_counts is not None:
+        local = store.counts()
+        if local["total"] == modem_counts["total"] and local["unread"] == modem_counts["unread"]:
+            return {"pages": 0, "new": 0, "read_changes": 0, "removed": 0, "full": False}
+
+    known = store.known()
+    seen = set()
+    upserts: List[Dict[str, Any]] = []
+    read_changes: Dict[int, bool] = {}
+    pages = 0
+    complete = False
+    for page in range(1, SMS_MAX_PAGES + 1):
+        batch = fetch_page(page)
+        pages += 1
+        reached_known = False
+        for message in batch:
+            index = message["index"]
+            seen.add(index)
+            previous = known.get(index)
+            if previous is None or previous[0] != message_hash(message):
+                upserts.append(message)
+            elif previous[1] != message["unread"]:
+                read_changes[index] = message["unread"]
+            else:
+                reached_known = True
+        if len(batch) < SMS_PAGE_SIZE:
+            complete = True
+            break
+        if reached_known and not full:
+            break
+
+    removed = [index for index in known if index not in seen] if complete else []
+    store.apply(upserts, read_changes, removed)
+    if complete:
+        store.last_full_sync = time.time()
+    result = {"pages": pages, "new": len(upserts), "read_changes": len(read_changes), "removed": len(removed), "full": complete}
+    if not full and modem_counts is not None:
+        local = store.counts()
+        if local["total"] != modem_counts["total"] or local["unread"] != modem_counts["unread"]:
+            # Deletions or read-state changes further down the inbox: reconcile everything.
+            full_result = sync_inbox(store, fetch_page, modem_counts, full=True)
+            for key in ("pages", "new", "read_changes"):
+                full_result[key] += result[key]
+            return full_result
+    return result
+
+
+sms_store = SmsStore()
@@ -0,0 +1,117 @@
+"""Warm restart: persist the cache across restarts of the collecting process.
+
+On shutdown (and every ``SNAPSHOT_INTERVAL`` seconds, so a crash loses at
+most that much) the published cache entries are written to ``SNAPSHOT_PATH``
+(in ``STATLOG_DATA_DIR`` by default) as gzipped JSON. On startup, before
+collectors run, they are loaded back with their original timestamps, pushed
+past their TTL if need be, so the API serves the last known values marked
+stale instead of empty payloads. The in-memory buffers behind the history keys
+are rebuilt from the same entries.
+
+Writes go to a temporary file in the same directory that is fsynced and then
+renamed over the old snapshot, so a crash mid-write leaves the previous one
+intact. Serialisation runs in a thread, and a checkpoint is skipped when
+nothing was published since the last one.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+from utils.cache_store import cache_store
+from utils.collectors import KEY_LOOP, restore_state
+from utils.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+# Empty disables snapshots.
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", data_path("statlog-snapshot.json.gz"))
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", "60"))
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", "3600"))
+SNAPSHOT_VERSION = 1
+
+# Describes this process rather than the host, so it is not carried over.
+_SKIP_KEYS = {KEY_LOOP}
+_saved_generation: Optional[int] = None
+
+
+def _write(path: str, payload: Dict[str, Any]) -> int:
+    body = gzip.compress(json.dumps(payload, separators=(",", ":"), default=str).encode(), compresslevel=1)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(body)
+
+
+def _read(path: str) -> Dict[str, Any]:
+    with gzip.open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+async def save_snapshot(path: Optional[str] = None) -> Optional[int]:
+    """Write the cache to ``path`` (default ``SNAPSHOT_PATH``); returns the bytes written, None if skipped."""
+    path = SNAPSHOT_PATH if path is None else path
+    global _saved_generation
+    if not path:
+        return None
+    generation = cache_store.generation
+    if generation == _saved_generation:
+        return None
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "entries": {
+            key: [entry.data, entry.ttl, entry.stale_ttl, entry.updated_at]
+            for key, entry in cache_store.entries().items()
+            if key not in _SKIP_KEYS
+        },
+    }
+    try:
+        size = await asyncio.to_thread(_write, path, payload)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"snapshot write to {path} failed: {e}")
+        return None
+    _saved_generation = generation
+    return size
+
+
+def load_snapshot(path: Optional[str] = None) -> int:
+    """Publish a saved snapshot as stale cache entries; returns the number restored."""
+    path = SNAPSHOT_PATH if path is None else path
+    if not path or not os.path.exists(path):
+        return 0
+    try:
+        payload = _read(path)
+    except (OSError, EOFError, ValueError) as e:
+        logger.warning(f"ignoring unreadable snapshot {path}: {e}")
+        return 0
+    now = time.time()
+    if payload.get("version") != SNAPSHOT_VERSION or now - payload.get("saved_at", 0) > SNAPSHOT_MAX_AGE:
+        logger.info(f"ignoring outdated snapshot {path}")
+        return 0
+    items = {}
+    for key, (data, ttl, stale_ttl, updated_at) in payload["entries"].items():
+        # Nothing has been collected since; make sure it reads as stale.
+        items[key] = (data, ttl, stale_ttl, min(updated_at, now - ttl - 0.001))
+    restore_state({key: item[0] for key, item in items.items()})
+    cache_store.set_many(items)
+    return len(items)
+
+
+async def checkpoint_forever(interval: float = SNAPSHOT_INTERVAL, path: Optional[str] = None):
+    while True:
+        await asyncio.sleep(interval)
+        await save_snapshot(path)
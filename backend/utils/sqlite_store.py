@@ -0,0 +1,170 @@
+"""Embedded SQLite storage with the slice of the motor API this app uses.
+
+Selected with ``MONGO_URL=sqlite:///path/to/statlog.db`` (four slashes for an
+absolute path). Each collection is a table of JSON documents; queries are
+top-level equality matches, which hit an expression index for the fields
+listed in ``INDEXES``. All SQLite calls run on one dedicated thread that owns
+the connection, so the event loop never blocks on disk I/O and no locking is
+needed between requests. WAL mode lets API workers in other processes read
+while one of them writes.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PREFIX = "sqlite:///"
+COLLECTIONS = ("users", "settings")
+# Unique expression indexes per collection.
+INDEXES = {"users": ("username",)}
+
+
+def sqlite_path(url: str) -> Optional[str]:
+    """The database path if ``url`` selects SQLite, else None."""
+    if not url.startswith(SQLITE_PREFIX):
+        return None
+    return url[len(SQLITE_PREFIX):] or "statlog.db"
+
+
+def _where(query: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+    if not query:
+        return "", []
+    clauses, params = [], []
+    for field, value in query.items():
+        if field == "_id":
+            clauses.append("id = ?")
+            params.append(int(value))
+            continue
+        if not field.replace("_", "").isalnum():
+            raise ValueError(f"Unsupported query field: {field!r}")
+        clauses.append(f"json_extract(doc, '$.{field}') = ?")
+        # JSON booleans come back from json_extract as 0/1.
+        params.append(int(value) if isinstance(value, bool) else value)
+    return " WHERE " + " AND ".join(clauses), params
+
+
+def _load(row: Tuple[int, str]) -> Dict[str, Any]:
+    doc = json.loads(row[1])
+    doc["_id"] = row[0]
+    return doc
+
+
+def _dump(doc: Dict[str, Any]) -> str:
+    return json.dumps({k: v for k, v in doc.items() if k != "_id"}, default=str)
+
+
+class _Cursor:
+    def __init__(self, collection: "SQLiteCollection", query: Optional[Dict[str, Any]]):
+        self._collection = collection
+        self._query = query
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        return await self._collection._run(self._collection._find, self._query, length)
+
+
+class SQLiteCollection:
+    def __init__(self, database: "SQLiteDatabase", name: str):
+        self._database = database
+        self.name = name
+
+    def _run(self, fn, *args):
+        return self._database._run(fn, *args)
+
+    # The methods below run on the database thread.
+
+    def _find(self, query: Optional[Dict[str, Any]], limit: Optional[int]) -> List[Dict[str, Any]]:
+        where, params = _where(query)
+        sql = f"SELECT id, doc FROM {self.name}{where} ORDER BY id"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [_load(row) for row in self._database._conn.execute(sql, params)]
+
+    def _insert(self, doc: Dict[str, Any]) -> int:
+        conn = self._database._conn
+        with conn:
+            return conn.execute(f"INSERT INTO {self.name} (doc) VALUES (?)", (_dump(doc),)).lastrowid
+
+    def _update(self, query: Optional[Dict[str, Any]], update: Dict[str, Any], upsert: bool):
+        unsupported = set(update) - {"$set"}
+        if unsupported:
+            raise ValueError(f"Unsupported update operators: {', '.join(sorted(unsupported))}")
+        changes = update.get("$set", {})
+        conn = self._database._conn
+        where, params = _where(query)
+        with conn:
+            row = conn.execute(f"SELECT id, doc FROM {self.name}{where} ORDER BY id LIMIT 1", params).fetchone()
+            if row is None:
+                if not upsert:
+                    return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+                doc = {k: v for k, v in (query or {}).items() if k != "_id"}
+                doc.update(changes)
+                new_id = conn.execute(f"INSERT INTO {self.name} (doc) VALUES (?)", (_dump(doc),)).lastrowid
+                return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=new_id)
+            doc = _load(row)
+            doc.update(changes)
+            conn.execute(f"UPDATE {self.name} SET doc = ? WHERE id = ?", (_dump(doc), row[0]))
+            return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+
+    # motor-compatible coroutine API
+
+    async def find_one(self, query: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        docs = await self._run(self._find, query, 1)
+        return docs[0] if docs else None
+
+    def find(self, query: Optional[Dict[str, Any]] = None) -> _Cursor:
+        return _Cursor(self, query)
+
+    async def insert_one(self, doc: Dict[str, Any]):
+        inserted_id = await self._run(self._insert, doc)
+        return SimpleNamespace(inserted_id=inserted_id)
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        return await self._run(self._update, query, update, upsert)
+
+
+class SQLiteDatabase:
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+        for name in COLLECTIONS:
+            setattr(self, name, SQLiteCollection(self, name))
+
+    def _run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            for name in COLLECTIONS:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {name} (id INTEGER PRIMARY KEY, doc TEXT NOT NULL)")
+                for field in INDEXES.get(name, ()):
+                    conn.execute(
+                        f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_{field} "
+                        f"ON {name} (json_extract(doc, '$.{field}'))"
+                    )
+        self._conn = conn
+        logger.info("SQLite store ready at %s (sqlite %s)", self.path, sqlite3.sqlite_version)
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def open(self) -> None:
+        await self._run(self._open)
+
+    async def close(self) -> None:
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
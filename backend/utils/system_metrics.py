@@ -2,6 +2,8 @@ import psutil
 import os
 from typing import Dict, List
 
+from utils.thermal import thermal_sensors
+
 PSEUDO_FS = {
     "proc", "sysfs", "tmpfs", "devtmpfs", "cgroup", "cgroup2", "overlay",
     "squashfs", "nsfs", "mqueue", "autofs", "securityfs", "pstore",
@@ -53,16 +55,14 @@ def get_memory_metrics() -> Dict:
     }
 
 def get_temperature() -> Dict:
-    """Get CPU temperature."""
+    """CPU temperature plus every discovered sensor and the Pi throttle flags."""
     try:
-        # Try reading from Raspberry Pi thermal zone
-        if os.path.exists('/sys/class/thermal/thermal_zone0/temp'):
-            with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                temp = float(f.read().strip()) / 1000.0
-                return {"cpu_temp": temp, "unit": "C"}
-        
-        # Fallback to psutil sensors_temperatures
-        temps = psutil.sensors_temperatures()
+        reading = thermal_sensors.read()
+        if reading["sensors"] or "throttled" in reading:
+            return reading
+
+        # psutil reads the same sysfs files on Linux; elsewhere it may know other sensors.
+        temps = psutil.sensors_temperatures() if not psutil.LINUX and hasattr(psutil, "sensors_temperatures") else None
         if temps:
             for name, entries in temps.items():
                 for entry in entries:
@@ -192,8 +192,8 @@ def get_disk_metrics() -> Dict:
         "io_stats": io_stats
     }
 
-def get_network_metrics() -> Dict:
-    """Get network interfaces and statistics."""
+def get_network_interfaces() -> Dict:
+    """Get network interfaces and their addresses (changes rarely)."""
     interfaces = []
     
     for interface_name, addrs in psutil.net_if_addrs().items():
@@ -214,7 +214,11 @@ def get_network_metrics() -> Dict:
         
         interfaces.append(interface_info)
     
-    # Network IO stats
+    return {"interfaces": interfaces}
+
+
+def get_network_counters() -> Dict:
+    """Get per-interface network IO counters."""
     try:
         io_counters = psutil.net_io_counters(pernic=True)
         net_stats = {}
@@ -228,7 +232,9 @@ def get_network_metrics() -> Dict:
     except:
         net_stats = {}
     
-    return {
-        "interfaces": interfaces,
-        "stats": net_stats
-    }
+    return {"stats": net_stats}
+
+
+def get_network_metrics() -> Dict:
+    """Get network interfaces and statistics."""
+    return {**get_network_interfaces(), **get_network_counters()}
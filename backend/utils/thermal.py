@@ -0,0 +1,215 @@
+"""Temperature sensors and Raspberry Pi throttling state, discovered once.
+
+``discover`` walks sysfs for every thermal zone, every hwmon ``temp*_input``
+and the Pi firmware's throttle flags, and opens each attribute. A reading
+then costs one ``os.pread`` per sensor on descriptors that stay open, with
+no path lookups or directory scans on the two-second collector tick. Sysfs
+regenerates an attribute's value whenever it is read from offset 0.
+
+Hwmon devices that merely mirror a thermal zone are skipped so a sensor is
+not reported twice.
+"""
+import glob
+import logging
+import os
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from utils.history import HISTORY_POINTS
+
+logger = logging.getLogger(__name__)
+
+SYSFS_ROOT = os.getenv("THERMAL_SYSFS_ROOT", "/sys")
+READ_SIZE = 32
+
+# bit -> flag name; bits 16-19 repeat 0-3 as "has occurred since boot".
+THROTTLE_BITS = {
+    0: "under_voltage",
+    1: "freq_capped",
+    2: "throttled",
+    3: "soft_temp_limit",
+    16: "under_voltage_occurred",
+    17: "freq_capped_occurred",
+    18: "throttled_occurred",
+    19: "soft_temp_limit_occurred",
+}
+_CPU_HINTS = ("cpu", "soc", "x86_pkg", "coretemp", "k10temp", "tctl", "package")
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class _Attr:
+    __slots__ = ("id", "label", "source", "path", "fd", "failed")
+
+    def __init__(self, id: str, label: str, source: str, path: str, fd: int):
+        self.id = id
+        self.label = label
+        self.source = source
+        self.path = path
+        self.fd = fd
+        self.failed = False
+
+    def read(self) -> Optional[str]:
+        try:
+            raw = os.pread(self.fd, READ_SIZE, 0)
+        except OSError as e:
+            if not self.failed:
+                logger.warning(f"thermal sensor {self.id} unreadable: {e}")
+                self.failed = True
+            return None
+        self.failed = False
+        return raw.decode("ascii", "replace").strip()
+
+
+def _open(id: str, label: str, source: str, path: str) -> Optional[_Attr]:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    attr = _Attr(id, label, source, path, fd)
+    # Some attributes exist but fail on read (e.g. a zone with no driver behind it).
+    if attr.read() in (None, ""):
+        os.close(fd)
+        return None
+    return attr
+
+
+class ThermalSensors:
+    def __init__(self, root: str = SYSFS_ROOT):
+        self.root = root
+        self.sensors: List[_Attr] = []
+        self.throttle: Optional[_Attr] = None
+        self.under_voltage: Optional[_Attr] = None
+        self.cpu_sensor: Optional[str] = None
+        self.discovered = False
+
+    def discover(self) -> None:
+        self.close()
+        seen_ids = set()
+        zone_devices = set()
+
+        def unique(base: str) -> str:
+            candidate, n = base, 1
+            while candidate in seen_ids:
+                n += 1
+                candidate = f"{base}_{n}"
+            seen_ids.add(candidate)
+            return candidate
+
+        for zone in sorted(glob.glob(os.path.join(self.root, "class/thermal/thermal_zone*"))):
+            kind = _read_text(os.path.join(zone, "type")) or os.path.basename(zone)
+            attr = _open(unique(kind), kind, "thermal_zone", os.path.join(zone, "temp"))
+            if attr:
+                self.sensors.append(attr)
+                zone_devices.add(os.path.realpath(zone))
+
+        for hwmon in sorted(glob.glob(os.path.join(self.root, "class/hwmon/hwmon*"))):
+            name = _read_text(os.path.join(hwmon, "name")) or os.path.basename(hwmon)
+            if os.path.realpath(os.path.join(hwmon, "device")) in zone_devices:
+                continue
+            if name == "rpi_volt":
+                # Firmware under-voltage alarm; used when get_throttled is not exposed.
+                self.under_voltage = _open("rpi_volt", name, "hwmon", os.path.join(hwmon, "in0_lcrit_alarm"))
+                continue
+            for path in sorted(glob.glob(os.path.join(hwmon, "temp*_input"))):
+                channel = os.path.basename(path)[:-len("_input")]
+                label = _read_text(os.path.join(hwmon, f"{channel}_label")) or channel
+                attr = _open(unique(f"{name}/{label}"), f"{name} {label}", "hwmon", path)
+                if attr:
+                    self.sensors.append(attr)
+
+        self.throttle = _open(
+            "throttled", "throttled", "firmware",
+            os.path.join(self.root, "devices/platform/soc/soc:firmware/get_throttled"),
+        )
+        self.cpu_sensor = next(
+            (s.id for s in self.sensors if any(hint in s.label.lower() for hint in _CPU_HINTS)),
+            self.sensors[0].id if self.sensors else None,
+        )
+        self.discovered = True
+        logger.info(
+            f"thermal: {len(self.sensors)} sensors, "
+            f"throttle flags {'available' if self.throttle or self.under_voltage else 'unavailable'}"
+        )
+
+    def _throttled(self) -> Optional[Dict[str, Any]]:
+        if self.throttle is not None:
+            raw = self.throttle.read()
+            try:
+                bits = int(raw, 16)
+            except (TypeError, ValueError):
+                return None
+            flags: Dict[str, Any] = {name: bool(bits >> bit & 1) for bit, name in THROTTLE_BITS.items()}
+            flags["raw"] = hex(bits)
+            return flags
+        if self.under_voltage is not None:
+            raw = self.under_voltage.read()
+            return {"under_voltage": raw == "1"} if raw is not None else None
+        return None
+
+    def read(self) -> Dict[str, Any]:
+        if not self.discovered:
+            self.discover()
+        sensors = []
+        for sensor in self.sensors:
+            raw = sensor.read()
+            try:
+                value = round(int(raw) / 1000.0, 1)
+            except (TypeError, ValueError):
+                value = None
+            sensors.append({"id": sensor.id, "label": sensor.label, "source": sensor.source, "value": value})
+        cpu = next((s["value"] for s in sensors if s["id"] == self.cpu_sensor), None)
+        result: Dict[str, Any] = {"cpu_temp": cpu if cpu is not None else 0, "unit": "C", "sensors": sensors}
+        throttled = self._throttled()
+        if throttled is not None:
+            result["throttled"] = throttled
+        return result
+
+    def close(self) -> None:
+        for attr in self.sensors + [self.throttle, self.under_voltage]:
+            if attr is not None:
+                try:
+                    os.close(attr.fd)
+                except OSError:
+                    pass
+        self.sensors = []
+        self.throttle = self.under_voltage = None
+        self.discovered = False
+
+
+class ThermalHistory:
+    """Rolling per-sensor and throttle-flag series, in the columnar history layout."""
+
+    def __init__(self, maxlen: int = HISTORY_POINTS):
+        self._ts: deque = deque(maxlen=maxlen)
+        self._series: Dict[str, deque] = {}
+
+    def append(self, reading: Dict[str, Any], ts: float) -> None:
+        values = {s["id"]: s["value"] for s in reading.get("sensors", [])}
+        for name, flag in (reading.get("throttled") or {}).items():
+            if isinstance(flag, bool):
+                values[name] = int(flag)
+        for name in [n for n in values if n not in self._series]:
+            # A series that appears later is padded so all columns line up with ts.
+            self._series[name] = deque([None] * len(self._ts), maxlen=self._ts.maxlen)
+        self._ts.append(ts)
+        for name, column in self._series.items():
+            column.append(values.get(name))
+
+    def load(self, columns: Dict[str, Any]) -> None:
+        """Refill from ``columns()`` output, e.g. a warm-restart snapshot."""
+        self._ts.extend(columns.get("ts", []))
+        for name, values in columns.get("series", {}).items():
+            self._series[name] = deque(values, maxlen=self._ts.maxlen)
+
+    def columns(self) -> Dict[str, Any]:
+        return {"ts": list(self._ts), "series": {name: list(column) for name, column in self._series.items()}}
+
+
+thermal_sensors = ThermalSensors()
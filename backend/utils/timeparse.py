@@ -0,0 +1,20 @@
+"""Query-string times shared by the log and history routes."""
+import re
+import time
+from typing import Optional
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_since(raw: Optional[str], now: Optional[float] = None, name: str = "since") -> Optional[int]:
+    """``10m``/``2h``/``90s``/``1d`` ago, or a unix timestamp, as a unix timestamp."""
+    if not raw:
+        return None
+    match = re.fullmatch(r"(\d+)([smhd]?)", raw.strip())
+    if not match:
+        raise ValueError(f"{name} must be a unix timestamp or a duration like 30s, 10m, 2h, 1d")
+    value, unit = int(match.group(1)), match.group(2)
+    if not unit:
+        return value
+    now = now if now is not None else time.time()
+    return int(now - value * _UNITS[unit])
@@ -0,0 +1,62 @@
+"""Rolling min/max/mean/p95 per dashboard series over several windows.
+
+Updated once per fast-collector sample; the published snapshot is read from
+the cache, so /api/metrics/stats does no aggregation per request.
+"""
+import time
+from typing import Any, Dict, Optional
+
+from utils.alerts import METRIC_PATHS
+from utils.rolling import BinnedHistogram, SlidingWindow
+
+STATS_WINDOWS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600}
+# (lowest, highest, bin width) for each series' p95 histogram.
+STATS_SERIES = {
+    "cpu": (0.0, 100.0, 0.5),
+    "memory": (0.0, 100.0, 0.5),
+    "temp": (0.0, 120.0, 0.5),
+}
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+class WindowStats:
+    def __init__(self):
+        self._windows = {
+            series: {
+                name: SlidingWindow(seconds, BinnedHistogram(*bins))
+                for name, seconds in STATS_WINDOWS.items()
+            }
+            for series, bins in STATS_SERIES.items()
+        }
+
+    def observe(self, summary: Dict[str, Any], ts: Optional[float] = None) -> None:
+        ts = ts if ts is not None else time.time()
+        for series, windows in self._windows.items():
+            group, field = METRIC_PATHS[series]
+            value = (summary.get(group) or {}).get(field)
+            if not isinstance(value, (int, float)):
+                continue
+            for window in windows.values():
+                window.push(ts, value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "windows": STATS_WINDOWS,
+            "series": {
+                series: {
+                    name: {
+                        "count": len(window),
+                        "min": _round(window.min),
+                        "max": _round(window.max),
+                        "mean": _round(window.mean),
+                        "p95": _round(window.quantile(0.95)),
+                        "complete": window.saturated,
+                    }
+                    for name, window in windows.items()
+                }
+                for series, windows in self._windows.items()
+            },
+        }
@@ -0,0 +1,97 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except Exception:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import cbor2
+    CBOR_AVAILABLE = True
+except Exception:
+    CBOR_AVAILABLE = False
+
+MEDIA_JSON = "application/json"
+MEDIA_MSGPACK = "application/msgpack"
+MEDIA_CBOR = "application/cbor"
+
+_ALIASES = {
+    "application/x-msgpack": MEDIA_MSGPACK,
+    "application/vnd.msgpack": MEDIA_MSGPACK,
+}
+
+
+def _supported() -> List[str]:
+    media = []
+    if MSGPACK_AVAILABLE:
+        media.append(MEDIA_MSGPACK)
+    if CBOR_AVAILABLE:
+        media.append(MEDIA_CBOR)
+    return media
+
+
+def _parse_accept(accept: str) -> List[Tuple[str, float]]:
+    ranges = []
+    for part in accept.split(","):
+        fields = [f.strip() for f in part.split(";")]
+        media = fields[0].lower()
+        if not media:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        ranges.append((_ALIASES.get(media, media), q))
+    return ranges
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick a response media type; JSON unless a binary format is explicitly preferred.
+
+    Equal q values are settled by the client's order: the first listed wins.
+    """
+    if not accept:
+        return MEDIA_JSON
+    best, best_q = MEDIA_JSON, 0.0
+    for media, q in _parse_accept(accept):
+        # Wildcards never select a binary format, so browsers keep getting JSON.
+        if (media in _supported() or media == MEDIA_JSON) and q > best_q:
+            best, best_q = media, q
+    return best
+
+
+def is_binary(request: Request) -> bool:
+    return negotiate(request.headers.get("accept")) != MEDIA_JSON
+
+
+def _cbor_default(encoder, value):
+    encoder.encode(str(value))
+
+
+def encode(payload: Any, media: str) -> bytes:
+    if media == MEDIA_MSGPACK:
+        return msgpack.packb(payload, use_bin_type=True, default=str)
+    if media == MEDIA_CBOR:
+        return cbor2.dumps(payload, default=_cbor_default)
+    raise ValueError(f"Unsupported media type: {media}")
+
+
+def render(request: Request, payload: Any, headers: Optional[Dict[str, str]] = None):
+    """Encode ``payload`` as JSON, msgpack or CBOR per the Accept header.
+
+    Every branch sends ``Vary: Accept`` so shared caches keep the encodings apart.
+    """
+    media = negotiate(request.headers.get("accept"))
+    response_headers = {"Vary": "Accept"}
+    response_headers.update(headers or {})
+    if media == MEDIA_JSON:
+        return JSONResponse(content=jsonable_encoder(payload), headers=response_headers)
+    return Response(content=encode(payload, media), media_type=media, headers=response_headers)
@@ -12,6 +12,23 @@ let cachedDashboardSummary = null;
 let cachedDashboardHealth = null;
 let cachedDashboardHistory = [];
 let cachedDashboardSettings = null;
+let cachedDashboardInterfaces = [];
+let cachedDashboardProcesses = null;
+
+// Interface addresses change rarely; the backend refreshes them on kernel events.
+const INTERFACES_REFRESH_MS = 60000;
+const PROCESS_FIELDS = [
+  'count',
+  'top_cpu.pid', 'top_cpu.name', 'top_cpu.cpu_percent',
+  'top_memory.pid', 'top_memory.name', 'top_memory.rss'
+].join(',');
+
+// About one point per 4px of chart width, rounded to a multiple of 30 so
+// similar screens share the server's cached LTTB result.
+function historyPoints() {
+  const points = Math.round(window.innerWidth / 4 / 30) * 30;
+  return Math.max(60, Math.min(450, points));
+}
 
 function getServiceLogo(service) {
   try {
@@ -31,7 +48,10 @@ function Dashboard() {
   const [refreshRate, setRefreshRate] = useState(2);
   const [loading, setLoading] = useState(!cachedDashboardSummary);
   const [settings, setSettings] = useState(cachedDashboardSettings);
+  const [interfaces, setInterfaces] = useState(cachedDashboardInterfaces);
+  const [processes, setProcesses] = useState(cachedDashboardProcesses);
   const lastUpdateRef = useRef(0);
+  const lastInterfacesRef = useRef(0);
 
   useEffect(() => {
     fetchData();
@@ -39,12 +59,38 @@ function Dashboard() {
     return () => clearInterval(interval);
   }, [refreshRate]);
 
+  const fetchInterfaces = async () => {
+    try {
+      const res = await axios.get(`${API_URL}/api/metrics/network/interfaces`);
+      const data = res.data.data || res.data;
+      cachedDashboardInterfaces = data?.interfaces || [];
+      setInterfaces(cachedDashboardInterfaces);
+    } catch (error) {
+      console.error('Error fetching network interfaces:', error);
+    }
+  };
+
+  const fetchProcesses = async () => {
+    try {
+      const res = await axios.get(`${API_URL}/api/metrics/processes`, { params: { fields: PROCESS_FIELDS } });
+      cachedDashboardProcesses = res.data.data || null;
+      setProcesses(cachedDashboardProcesses);
+    } catch (error) {
+      console.error('Error fetching processes:', error);
+    }
+  };
+
   const fetchData = async () => {
+    fetchProcesses();
+    if (Date.now() - lastInterfacesRef.current > INTERFACES_REFRESH_MS) {
+      lastInterfacesRef.current = Date.now();
+      fetchInterfaces();
+    }
     try {
       const [summaryRes, healthRes, historyRes, settingsRes] = await Promise.all([
         axios.get(`${API_URL}/api/metrics/summary`),
         axios.get(`${API_URL}/api/health`),
-        axios.get(`${API_URL}/api/metrics/history`),
+        axios.get(`${API_URL}/api/metrics/history`, { params: { points: historyPoints() } }),
         axios.get(`${API_URL}/api/settings/resolved/${window.location.hostname}`)
       ]);
 
@@ -276,7 +322,7 @@ function Dashboard() {
             <h3 className="text-xl font-semibold">Network Interfaces</h3>
           </div>
           <div className="space-y-3">
-            {summary.network.interfaces.map((iface, index) => (
+            {interfaces.map((iface, index) => (
               <div key={index} className="bg-dark-hover p-3 rounded">
                 <div className="font-semibold">{iface.name}</div>
                 {iface.addresses.map((addr, i) => (
@@ -309,6 +355,35 @@ function Dashboard() {
           </div>
         </div>
       </div>
+
+      {processes && (
+        <div className="grid grid-cols-1 lg:grid-cols-2 gap-6">
+          <div className="card">
+            <h3 className="text-xl font-semibold mb-4">Top Processes by CPU</h3>
+            <div className="space-y-2">
+              {(processes.top_cpu || []).map((proc) => (
+                <div key={proc.pid} className="flex justify-between text-sm bg-dark-hover p-2 rounded">
+                  <span className="truncate mr-4">{proc.name} <span className="text-gray-400">({proc.pid})</span></span>
+                  <span>{proc.cpu_percent.toFixed(1)}%</span>
+                </div>
+              ))}
+            </div>
+          </div>
+
+          <div className="card">
+            <h3 className="text-xl font-semibold mb-4">Top Processes by Memory</h3>
+            <div className="space-y-2">
+              {(processes.top_memory || []).map((proc) => (
+                <div key={proc.pid} className="flex justify-between text-sm bg-dark-hover p-2 rounded">
+                  <span className="truncate mr-4">{proc.name} <span className="text-gray-400">({proc.pid})</span></span>
+                  <span>{(proc.rss / (1024 ** 2)).toFixed(1)} MB</span>
+                </div>
+              ))}
+            </div>
+            <div className="text-xs text-gray-400 mt-3">{processes.count} processes</div>
+          </div>
+        </div>
+      )}
     </div>
   );
 }
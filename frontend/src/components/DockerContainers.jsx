@@ -1,17 +1,40 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { useAuth } from '../context/AuthContext';
-import { Container, Play, Square, RotateCw, Search } from 'lucide-react';
+import { Container, Play, Square, RotateCw, Search, Activity, FileText } from 'lucide-react';
 import { toast } from 'react-toastify';
+import TimeSeriesChart from './charts/TimeSeriesChart';
+
+const HISTORY_POINTS = 120;
+const JOB_POLL_MS = 1000;
+const JOB_TIMEOUT_MS = 120000;
+const LOG_TAIL = 200;
+const LOG_KEEP_LINES = 500;
+const ACTION_LABELS = { restart: 'Restarting...', stop: 'Stopping...', start: 'Starting...' };
+
+function historyRows(data) {
+  const { ts = [], series = {} } = data || {};
+  return ts.map((t, i) => ({
+    time: new Date(t * 1000).toLocaleTimeString('en-AU', { timeZone: 'Australia/Melbourne', hour: '2-digit', minute: '2-digit' }),
+    cpu: series.cpu_percent?.[i] ?? 0,
+    memory_mb: Math.round((series.memory_usage?.[i] ?? 0) / (1024 ** 2)),
+  }));
+}
 
 let cachedContainers = [];
 
 function DockerContainers() {
-  const { API_URL } = useAuth();
+  const { API_URL, token } = useAuth();
   const [containers, setContainers] = useState(cachedContainers);
   const [filteredContainers, setFilteredContainers] = useState(cachedContainers);
   const [search, setSearch] = useState('');
   const [loading, setLoading] = useState(cachedContainers.length === 0);
+  const [historyId, setHistoryId] = useState(null);
+  const [history, setHistory] = useState([]);
+  const [pending, setPending] = useState({});
+  const [logsId, setLogsId] = useState(null);
+  const [logLines, setLogLines] = useState([]);
+  const logAbort = useRef(null);
 
   useEffect(() => {
     fetchContainers();
@@ -19,6 +42,9 @@ function DockerContainers() {
     return () => clearInterval(interval);
   }, []);
 
+  // Stop following logs when leaving the page.
+  useEffect(() => () => logAbort.current?.abort(), []);
+
   useEffect(() => {
     if (search) {
       setFilteredContainers(
@@ -49,13 +75,94 @@ function DockerContainers() {
     }
   };
 
+  const waitForJob = async (statusUrl) => {
+    const deadline = Date.now() + JOB_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_MS));
+      const response = await axios.get(`${API_URL}${statusUrl}`);
+      if (response.data.state !== 'running') {
+        return response.data;
+      }
+    }
+    return { state: 'failed', error: 'Timed out waiting for Docker' };
+  };
+
   const handleAction = async (containerId, action) => {
+    setPending((prev) => ({ ...prev, [containerId]: action }));
     try {
-      await axios.post(`${API_URL}/api/docker/containers/${containerId}/${action}`);
-      toast.success(`Container ${action}ed successfully`);
-      setTimeout(fetchContainers, 1000);
+      const response = await axios.post(`${API_URL}/api/docker/containers/${containerId}/${action}`);
+      const job = await waitForJob(response.data.status_url);
+      if (job.state === 'succeeded') {
+        toast.success(job.result?.message || `Container ${action} done`);
+        // The backend has already refreshed this container's cache entry.
+        fetchContainers();
+      } else {
+        toast.error(job.error || `Failed to ${action} container`);
+      }
+    } catch (error) {
+      toast.error(error.response?.data?.detail || `Failed to ${action} container`);
+    } finally {
+      setPending((prev) => {
+        const next = { ...prev };
+        delete next[containerId];
+        return next;
+      });
+    }
+  };
+
+  const toggleHistory = async (containerId) => {
+    if (historyId === containerId) {
+      setHistoryId(null);
+      return;
+    }
+    setHistoryId(containerId);
+    setHistory([]);
+    try {
+      const response = await axios.get(`${API_URL}/api/docker/containers/${containerId}/history`, {
+        params: { points: HISTORY_POINTS }
+      });
+      setHistory(historyRows(response.data.data));
     } catch (error) {
-      toast.error(`Failed to ${action} container`);
+      toast.error('Failed to load container history');
+    }
+  };
+
+  const toggleLogs = async (containerId) => {
+    logAbort.current?.abort();
+    logAbort.current = null;
+    if (logsId === containerId) {
+      setLogsId(null);
+      return;
+    }
+    setLogsId(containerId);
+    setLogLines([]);
+    const controller = new AbortController();
+    logAbort.current = controller;
+    try {
+      const response = await fetch(
+        `${API_URL}/api/docker/containers/${containerId}/logs?tail=${LOG_TAIL}`,
+        { headers: { Authorization: `Bearer ${token}` }, signal: controller.signal }
+      );
+      if (!response.ok) {
+        const body = await response.json().catch(() => ({}));
+        toast.error(body.detail || 'Failed to load container logs');
+        return;
+      }
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let partial = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        const text = partial + decoder.decode(value, { stream: true });
+        const lines = text.split('\n');
+        partial = lines.pop();
+        setLogLines((prev) => prev.concat(lines).slice(-LOG_KEEP_LINES));
+      }
+    } catch (error) {
+      if (error.name !== 'AbortError') {
+        toast.error('Container log stream closed');
+      }
     }
   };
 
@@ -137,9 +244,18 @@ function DockerContainers() {
             </thead>
             <tbody>
               {filteredContainers.map((container) => (
-                <tr key={container.id} className="border-b border-dark-border hover:bg-dark-hover">
+                <React.Fragment key={container.id}>
+                <tr className="border-b border-dark-border hover:bg-dark-hover">
                   <td className="py-3 px-4 font-semibold">{container.name}</td>
-                  <td className="py-3 px-4 text-sm font-mono">{container.image}</td>
+                  <td className="py-3 px-4">
+                    <div className="text-sm font-mono">{container.image}</div>
+                    {container.image_size != null && (
+                      <div className="text-xs text-gray-400">
+                        {(container.image_size / (1024 ** 2)).toFixed(0)} MB
+                        {container.image_created && ` · ${new Date(container.image_created).toLocaleDateString('en-AU')}`}
+                      </div>
+                    )}
+                  </td>
                   <td className="py-3 px-4">
                     <span className={`font-semibold ${getStatusColor(container.status)}`}>
                       {container.status}
@@ -171,19 +287,35 @@ function DockerContainers() {
                     ) : 'None'}
                   </td>
                   <td className="py-3 px-4">
-                    <div className="flex space-x-2">
+                    <div className="flex items-center space-x-2">
+                      <button
+                        onClick={() => toggleHistory(container.id)}
+                        className="p-2 bg-gray-600 hover:bg-gray-700 rounded transition-colors"
+                        title="History"
+                      >
+                        <Activity size={16} />
+                      </button>
+                      <button
+                        onClick={() => toggleLogs(container.id)}
+                        className="p-2 bg-gray-600 hover:bg-gray-700 rounded transition-colors"
+                        title="Logs"
+                      >
+                        <FileText size={16} />
+                      </button>
                       {container.status === 'running' ? (
                         <>
                           <button
                             onClick={() => handleAction(container.id, 'restart')}
-                            className="p-2 bg-blue-600 hover:bg-blue-700 rounded transition-colors"
+                            disabled={Boolean(pending[container.id])}
+                            className="p-2 bg-blue-600 hover:bg-blue-700 rounded transition-colors disabled:opacity-50"
                             title="Restart"
                           >
                             <RotateCw size={16} />
                           </button>
                           <button
                             onClick={() => handleAction(container.id, 'stop')}
-                            className="p-2 bg-red-600 hover:bg-red-700 rounded transition-colors"
+                            disabled={Boolean(pending[container.id])}
+                            className="p-2 bg-red-600 hover:bg-red-700 rounded transition-colors disabled:opacity-50"
                             title="Stop"
                           >
                             <Square size={16} />
@@ -192,15 +324,45 @@ function DockerContainers() {
                       ) : (
                         <button
                           onClick={() => handleAction(container.id, 'start')}
-                          className="p-2 bg-green-600 hover:bg-green-700 rounded transition-colors"
+                          disabled={Boolean(pending[container.id])}
+                          className="p-2 bg-green-600 hover:bg-green-700 rounded transition-colors disabled:opacity-50"
                           title="Start"
                         >
                           <Play size={16} />
                         </button>
                       )}
+                      {pending[container.id] && (
+                        <span className="text-xs text-gray-400">{ACTION_LABELS[pending[container.id]]}</span>
+                      )}
                     </div>
                   </td>
                 </tr>
+                {historyId === container.id && (
+                  <tr className="border-b border-dark-border">
+                    <td colSpan={7} className="py-3 px-4">
+                      {history.length > 0 ? (
+                        <TimeSeriesChart
+                          data={history}
+                          dataKeys={['cpu', 'memory_mb']}
+                          colors={['#3b82f6', '#10b981']}
+                          height={200}
+                        />
+                      ) : (
+                        <div className="text-sm text-gray-400">No history recorded yet.</div>
+                      )}
+                    </td>
+                  </tr>
+                )}
+                {logsId === container.id && (
+                  <tr className="border-b border-dark-border">
+                    <td colSpan={7} className="py-3 px-4">
+                      <pre className="text-xs font-mono bg-dark-hover rounded p-3 max-h-96 overflow-y-auto whitespace-pre-wrap">
+                        {logLines.length > 0 ? logLines.join('\n') : 'Waiting for log output...'}
+                      </pre>
+                    </td>
+                  </tr>
+                )}
+                </React.Fragment>
               ))}
             </tbody>
           </table>
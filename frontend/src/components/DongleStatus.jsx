@@ -1,16 +1,23 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { useAuth } from '../context/AuthContext';
-import { Radio, Signal, Smartphone, Trash2, RefreshCw } from 'lucide-react';
+import { Radio, Signal, Smartphone, Trash2, RefreshCw, Search, ChevronLeft, ChevronRight } from 'lucide-react';
 import { toast } from 'react-toastify';
 import { formatMelbourne } from '../utils/time';
 
 let cachedDongleStatus = null;
 
+const SMS_PAGE_SIZE = 20;
+
 function DongleStatus() {
   const { API_URL } = useAuth();
   const [dongleData, setDongleData] = useState(cachedDongleStatus);
   const [loading, setLoading] = useState(!cachedDongleStatus);
+  const [smsPage, setSmsPage] = useState({ total: 0, items: [] });
+  const [smsOffset, setSmsOffset] = useState(0);
+  const [searchInput, setSearchInput] = useState('');
+  const [smsQuery, setSmsQuery] = useState('');
+  const [unreadOnly, setUnreadOnly] = useState(false);
 
   useEffect(() => {
     fetchDongleData();
@@ -18,6 +25,20 @@ function DongleStatus() {
     return () => clearInterval(interval);
   }, []);
 
+  useEffect(() => {
+    fetchSms();
+    const interval = setInterval(fetchSms, 7000);
+    return () => clearInterval(interval);
+  }, [smsOffset, smsQuery, unreadOnly]);
+
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      setSmsQuery(searchInput.trim());
+      setSmsOffset(0);
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [searchInput]);
+
   const fetchDongleData = async () => {
     try {
       const response = await axios.get(`${API_URL}/api/dongle/status`);
@@ -31,6 +52,17 @@ function DongleStatus() {
     }
   };
 
+  const fetchSms = async () => {
+    try {
+      const response = await axios.get(`${API_URL}/api/dongle/sms`, {
+        params: { offset: smsOffset, limit: SMS_PAGE_SIZE, q: smsQuery || undefined, unread: unreadOnly || undefined }
+      });
+      setSmsPage(response.data);
+    } catch (error) {
+      console.error('Error fetching SMS:', error);
+    }
+  };
+
   const deleteSMS = async (index) => {
     if (!window.confirm('Delete this SMS message?')) return;
     
@@ -38,6 +70,7 @@ function DongleStatus() {
       await axios.post(`${API_URL}/api/dongle/sms/${index}/delete`);
       toast.success('SMS deleted successfully');
       fetchDongleData();
+      fetchSms();
     } catch (error) {
       toast.error('Failed to delete SMS');
     }
@@ -174,17 +207,39 @@ function DongleStatus() {
 
       {/* SMS Messages */}
       <div className="card">
-        <div className="flex items-center justify-between mb-4">
+        <div className="flex flex-col gap-3 md:flex-row md:items-center md:justify-between mb-4">
           <div className="flex items-center space-x-2">
             <Smartphone size={24} className="text-purple-500" />
-            <h3 className="text-xl font-semibold">SMS Messages ({dongleData.sms_messages?.length || 0})</h3>
+            <h3 className="text-xl font-semibold">
+              SMS Messages ({dongleData.sms?.total ?? 0}{dongleData.sms?.unread ? `, ${dongleData.sms.unread} new` : ''})
+            </h3>
+          </div>
+          <div className="flex items-center gap-3">
+            <label className="flex items-center gap-2 text-sm text-gray-400">
+              <input
+                type="checkbox"
+                checked={unreadOnly}
+                onChange={(e) => { setUnreadOnly(e.target.checked); setSmsOffset(0); }}
+              />
+              Unread only
+            </label>
+            <div className="relative">
+              <Search size={16} className="absolute left-2 top-1/2 -translate-y-1/2 text-gray-500" />
+              <input
+                type="text"
+                value={searchInput}
+                onChange={(e) => setSearchInput(e.target.value)}
+                placeholder="Search sender or text"
+                className="input pl-8 py-1 text-sm"
+              />
+            </div>
           </div>
         </div>
 
-        {dongleData.sms_messages && dongleData.sms_messages.length > 0 ? (
+        {smsPage.items.length > 0 ? (
           <div className="space-y-3">
-            {dongleData.sms_messages.map((msg, index) => (
-              <div key={index} className={`bg-dark-hover p-4 rounded ${msg.unread ? 'border-l-4 border-blue-500' : ''}`}>
+            {smsPage.items.map((msg) => (
+              <div key={msg.index} className={`bg-dark-hover p-4 rounded ${msg.unread ? 'border-l-4 border-blue-500' : ''}`}>
                 <div className="flex justify-between items-start">
                   <div className="flex-1">
                     <div className="flex items-center space-x-3 mb-2">
@@ -209,7 +264,33 @@ function DongleStatus() {
           </div>
         ) : (
           <div className="text-center py-8 text-gray-400">
-            No SMS messages
+            {smsQuery || unreadOnly ? 'No matching SMS messages' : 'No SMS messages'}
+          </div>
+        )}
+
+        {smsPage.total > SMS_PAGE_SIZE && (
+          <div className="flex items-center justify-between mt-4 text-sm text-gray-400">
+            <span>
+              {smsOffset + 1}-{Math.min(smsOffset + SMS_PAGE_SIZE, smsPage.total)} of {smsPage.total}
+            </span>
+            <div className="flex gap-2">
+              <button
+                onClick={() => setSmsOffset(Math.max(0, smsOffset - SMS_PAGE_SIZE))}
+                disabled={smsOffset === 0}
+                className="btn-secondary p-2 disabled:opacity-50"
+                title="Newer"
+              >
+                <ChevronLeft size={16} />
+              </button>
+              <button
+                onClick={() => setSmsOffset(smsOffset + SMS_PAGE_SIZE)}
+                disabled={smsOffset + SMS_PAGE_SIZE >= smsPage.total}
+                className="btn-secondary p-2 disabled:opacity-50"
+                title="Older"
+              >
+                <ChevronRight size={16} />
+              </button>
+            </div>
           </div>
         )}
       </div>